@@ -8,11 +8,41 @@ import os
 import sys
 import subprocess
 import json
+import math
 import re
 import time
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 import argparse
+from array import array
+import asyncio
+import atexit
+import bz2
+import ctypes
+import ctypes.util
+import fcntl
+import functools
+import glob
+import gzip
+import hashlib
+import heapq
+import mmap
+import multiprocessing
+import pwd
+import random
+import resource
+import select
+import signal
+import struct
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+try:
+    import lzma
+except ImportError:  # Python compilato senza liblzma: le rotazioni .xz vengono saltate
+    lzma = None
 
 class Colors:
     RED = '\033[91m'
@@ -26,72 +56,4098 @@ class Colors:
     UNDERLINE = '\033[4m'
     RESET = '\033[0m'
 
-class SystemInfo:
-    """Classe per raccogliere informazioni di sistema"""
+class Profiler:
+    """Strumentazione dei tempi di esecuzione (attivata con --profile)
+    
+    Per ogni comando e sezione registra chiamate, tempo reale, tempo CPU dei
+    processi figli (RUSAGE_CHILDREN), byte di output e stato della cache.
+    Con comandi in parallelo il tempo CPU dei figli è attribuito in modo
+    approssimato, perché il contatore è unico per tutto il processo.
+    """
+    
+    enabled = False
+    _records = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def child_cpu_time() -> float:
+        """Tempo CPU (user + system) consumato dai processi figli terminati"""
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    
+    @staticmethod
+    def start() -> Tuple[float, float]:
+        """Istantanea iniziale da passare a stop()"""
+        return time.perf_counter(), Profiler.child_cpu_time()
+    
+    @staticmethod
+    def stop(kind: str, label: str, started: Tuple[float, float],
+             output_bytes: int = 0, cache_status: Optional[str] = None):
+        """Registra la misura di un comando ('command') o di una sezione ('section')"""
+        wall = time.perf_counter() - started[0]
+        child_cpu = Profiler.child_cpu_time() - started[1]
+        with Profiler._lock:
+            record = Profiler._records.get((kind, label))
+            if record is None:
+                record = {
+                    'kind': kind, 'label': label, 'calls': 0, 'wall': 0.0,
+                    'max_wall': 0.0, 'child_cpu': 0.0, 'bytes': 0,
+                    'cache_hits': 0, 'cache_misses': 0,
+                }
+                Profiler._records[(kind, label)] = record
+            record['calls'] += 1
+            record['wall'] += wall
+            record['max_wall'] = max(record['max_wall'], wall)
+            record['child_cpu'] += child_cpu
+            record['bytes'] += output_bytes
+            if cache_status == 'hit':
+                record['cache_hits'] += 1
+            elif cache_status == 'miss':
+                record['cache_misses'] += 1
+    
+    @staticmethod
+    def instrument(cls, names: List[str]):
+        """Avvolge i metodi statici names di una classe manager
+        
+        Vanno indicate solo le voci dei menu: avvolgere anche i metodi di
+        supporto, chiamati per ogni file o riga, aggiungerebbe lock e
+        getrusage a ogni chiamata falsando i tempi.
+        """
+        for name in names:
+            attr = vars(cls)[name]
+            if not isinstance(attr, staticmethod):
+                raise TypeError(f"{cls.__name__}.{name} non è un metodo statico")
+            func = attr.__func__
+            label = f"{cls.__name__}.{name}"
+            
+            def wrapper(*args, _func=func, _label=label, **kwargs):
+                started = Profiler.start()
+                try:
+                    return _func(*args, **kwargs)
+                finally:
+                    Profiler.stop('section', _label, started)
+            
+            setattr(cls, name, staticmethod(functools.wraps(func)(wrapper)))
+        return cls
+    
+    @staticmethod
+    def records() -> List[Dict]:
+        """Misure raccolte, ordinate per tempo reale totale decrescente"""
+        with Profiler._lock:
+            return sorted((dict(r) for r in Profiler._records.values()),
+                          key=lambda r: r['wall'], reverse=True)
+    
+    @staticmethod
+    def report(output: str = "-"):
+        """Stampa il report ordinato o lo salva in JSON se output è un percorso"""
+        records = Profiler.records()
+        if output != "-":
+            try:
+                with open(output, 'w') as f:
+                    json.dump({'generated': datetime.now().isoformat(), 'records': records}, f, indent=2)
+                print(f"{Colors.GREEN}✅ Report profiling salvato in {output}{Colors.RESET}")
+            except OSError as e:
+                print(f"{Colors.RED}❌ Impossibile salvare il report profiling: {e}{Colors.RESET}")
+            return
+        
+        print(f"\n{Colors.BLUE}{Colors.BOLD}⏱️  REPORT PROFILING{Colors.RESET}")
+        print("=" * 100)
+        if not records:
+            print("Nessuna misura registrata")
+            return
+        print(f"{'TIPO':8} {'CHIAMATE':>8} {'TOTALE s':>9} {'MAX s':>7} {'CPU FIGLI s':>11} {'OUTPUT':>8} {'CACHE H/M':>9}  ETICHETTA")
+        for record in records[:40]:
+            cache_info = f"{record['cache_hits']}/{record['cache_misses']}"
+            print(f"{record['kind']:8} {record['calls']:>8} {record['wall']:>9.3f} {record['max_wall']:>7.3f} "
+                  f"{record['child_cpu']:>11.3f} {ProcCollector.format_bytes(record['bytes']):>8} "
+                  f"{cache_info:>9}  {record['label'][:60]}")
+        if len(records) > 40:
+            print(f"... e altre {len(records) - 40} voci")
+
+class CommandCache:
+    """Cache LRU con scadenza (TTL) per output di comandi e collector
+    
+    Ogni voce è associata a una sorgente ('lvm', 'services', ...) che ne
+    determina il TTL e permette l'invalidazione mirata dopo operazioni che
+    modificano il sistema.
+    """
+    
+    # TTL in secondi per sorgente
+    DEFAULT_TTLS = {
+        'lvm': 30,
+        'services': 15,
+        'journal': 60,
+        'logs': 120,
+        'default': 10,
+    }
+    
+    def __init__(self, max_entries: int = 256, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries = OrderedDict()  # key -> (scadenza, sorgente, valore)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key) -> Tuple[bool, object]:
+        """Restituisce (trovato, valore) per una chiave ancora valida"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, entry[2]
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, value, source: str = 'default'):
+        """Memorizza un valore con il TTL della sorgente indicata"""
+        ttl = self.ttls.get(source, self.ttls['default'])
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, source, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def cached(self, source: str, key, func):
+        """Restituisce il valore in cache o lo calcola con func()"""
+        found, value = self.get((source, key))
+        if found:
+            return value
+        value = func()
+        self.put((source, key), value, source)
+        return value
+    
+    def invalidate(self, source: Optional[str] = None):
+        """Rimuove tutte le voci di una sorgente (o l'intera cache)"""
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+                return
+            for key in [k for k, entry in self._entries.items() if entry[1] == source]:
+                del self._entries[key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Contatori di utilizzo della cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+class CommandStream:
+    """Esecuzione in streaming di un comando passato come argv (senza shell)
+    
+    Iterando si ottengono le righe di stdout man mano che arrivano. Il
+    processo viene terminato quando si raggiunge max_lines, quando l'output
+    supera max_bytes, allo scadere di timeout o se il consumatore smette di
+    iterare. Al termine sono disponibili returncode, stderr e truncated.
+    """
+    
+    # Lunghezza massima di una singola riga: oltre viene spezzata
+    MAX_LINE_BYTES = 64 * 1024
+    # Byte di stderr conservati per i messaggi di errore
+    MAX_STDERR_BYTES = 4096
+    
+    def __init__(self, argv: List[str], max_lines: Optional[int] = None,
+                 max_bytes: Optional[int] = None, timeout: Optional[float] = 30):
+        self.argv = list(argv)
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.returncode = None
+        self.stderr = ""
+        self.truncated = False
+        self.timed_out = False
+        self.bytes_read = 0
+    
+    def __iter__(self):
+        started = Profiler.start() if Profiler.enabled else None
+        try:
+            proc = subprocess.Popen(
+                self.argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            self.returncode = 127
+            self.stderr = str(e)
+            return
+        
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=self._drain_stderr, args=(proc.stderr, stderr_chunks))
+        stderr_thread.daemon = True
+        stderr_thread.start()
+        
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self._kill_on_timeout, args=(proc,))
+            timer.daemon = True
+            timer.start()
+        
+        lines = 0
+        finished = False
+        try:
+            while True:
+                raw = proc.stdout.readline(self.MAX_LINE_BYTES)
+                if not raw:
+                    finished = True
+                    break
+                self.bytes_read += len(raw)
+                if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+                    self.truncated = True
+                    break
+                yield raw.decode('utf-8', 'replace').rstrip('\n')
+                lines += 1
+                if self.max_lines is not None and lines >= self.max_lines:
+                    # Verifica se c'era altro output senza leggerlo tutto
+                    self.truncated = bool(proc.stdout.read(1))
+                    break
+        finally:
+            if timer:
+                timer.cancel()
+            # A fine output il processo può non essere ancora terminato: va atteso, non ucciso
+            stopped_early = not finished and proc.poll() is None
+            if stopped_early:
+                proc.kill()
+            proc.stdout.close()
+            self.returncode = proc.wait()
+            if stopped_early:
+                # Interruzione voluta (limite raggiunto o consumatore uscito)
+                self.returncode = 0
+            stderr_thread.join(1)
+            self.stderr = b"".join(stderr_chunks).decode('utf-8', 'replace')
+            if self.timed_out:
+                self.returncode = -1
+                self.stderr = "Command timed out"
+            if started:
+                Profiler.stop('command', ' '.join(self.argv), started, self.bytes_read)
+    
+    def _kill_on_timeout(self, proc):
+        self.timed_out = True
+        proc.kill()
+    
+    def _drain_stderr(self, pipe, chunks: List[bytes]):
+        """Legge stderr fino alla fine conservandone solo l'inizio"""
+        kept = 0
+        for chunk in iter(lambda: pipe.read(4096), b""):
+            if kept < self.MAX_STDERR_BYTES:
+                chunks.append(chunk[:self.MAX_STDERR_BYTES - kept])
+                kept += len(chunks[-1])
+        pipe.close()
+    
+    def lines(self) -> List[str]:
+        """Consuma lo stream e restituisce la lista delle righe"""
+        return list(self)
+
+class MetricStore:
+    """Archivio in memoria di serie temporali su ring buffer a dimensione fissa
+    
+    Ogni metrica è conservata a più risoluzioni (TIERS: passo in secondi,
+    numero di slot). Ogni slot di ogni livello occupa array('d')/array('I')
+    preallocati con somma, conteggio, minimo e massimo del proprio
+    intervallo: la memoria dipende solo dal numero di metriche (al massimo
+    max_metrics) e non dalla durata della sessione.
+    """
+    
+    # 1 s per 10 minuti, 10 s per 6 ore, 1 min per 7 giorni
+    TIERS = [(1, 600), (10, 2160), (60, 10080)]
+    
+    SPARK_CHARS = "▁▂▃▄▅▆▇█"
+    
+    def __init__(self, tiers: Optional[List[Tuple[int, int]]] = None, max_metrics: int = 32):
+        self.tiers = tiers or self.TIERS
+        self.max_metrics = max_metrics
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def _new_series(self) -> List[Dict]:
+        series = []
+        for step, capacity in self.tiers:
+            series.append({
+                'step': step,
+                'capacity': capacity,
+                'start': array('d', [-1.0]) * capacity,  # inizio intervallo dello slot
+                'sum': array('d', [0.0]) * capacity,
+                'count': array('I', [0]) * capacity,
+                'min': array('d', [0.0]) * capacity,
+                'max': array('d', [0.0]) * capacity,
+            })
+        return series
+    
+    def add(self, name: str, value: float, timestamp: Optional[float] = None) -> bool:
+        """Aggiunge un campione; False se il limite di metriche è raggiunto"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                if len(self._series) >= self.max_metrics:
+                    return False
+                series = self._series[name] = self._new_series()
+            for tier in series:
+                step = tier['step']
+                bucket = timestamp - timestamp % step
+                slot = int(bucket // step) % tier['capacity']
+                if tier['start'][slot] != bucket:
+                    # Lo slot contiene un intervallo vecchio: viene riutilizzato
+                    tier['start'][slot] = bucket
+                    tier['sum'][slot] = value
+                    tier['count'][slot] = 1
+                    tier['min'][slot] = value
+                    tier['max'][slot] = value
+                else:
+                    tier['sum'][slot] += value
+                    tier['count'][slot] += 1
+                    if value < tier['min'][slot]:
+                        tier['min'][slot] = value
+                    if value > tier['max'][slot]:
+                        tier['max'][slot] = value
+        return True
+    
+    def _buckets(self, name: str, window: float, now: Optional[float]):
+        """Slot validi (inizio, somma, conteggio, min, max) del livello più fine che copre window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return []
+            tier = next((t for t in series if t['step'] * t['capacity'] >= window), series[-1])
+            step, capacity = tier['step'], tier['capacity']
+            last = now - now % step
+            count = min(int(window // step) + 1, capacity)
+            buckets = []
+            for i in range(count - 1, -1, -1):
+                bucket = last - i * step
+                slot = int(bucket // step) % capacity
+                if tier['start'][slot] == bucket and tier['count'][slot]:
+                    buckets.append((bucket, tier['sum'][slot], tier['count'][slot],
+                                    tier['min'][slot], tier['max'][slot]))
+            return buckets
+    
+    def points(self, name: str, window: float, now: Optional[float] = None) -> List[Tuple[float, float]]:
+        """Punti (inizio intervallo, media) degli ultimi window secondi, dal più vecchio"""
+        return [(bucket, total / count) for bucket, total, count, _, _ in self._buckets(name, window, now)]
+    
+    def stats(self, name: str, window: float, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """Minimo, massimo, media e ultimo valore degli ultimi window secondi"""
+        buckets = self._buckets(name, window, now)
+        if not buckets:
+            return None
+        total = sum(b[1] for b in buckets)
+        count = sum(b[2] for b in buckets)
+        return {
+            'min': min(b[3] for b in buckets),
+            'max': max(b[4] for b in buckets),
+            'avg': total / count,
+            'last': buckets[-1][1] / buckets[-1][2],
+            'samples': count,
+        }
+    
+    def sparkline(self, name: str, window: float, width: int = 40, now: Optional[float] = None) -> str:
+        """Grafico testuale degli ultimi width punti della finestra"""
+        return self.render_sparkline([value for _, value in self.points(name, window, now)][-width:])
+    
+    @staticmethod
+    def render_sparkline(values: List[float]) -> str:
+        """Una barra per valore, scalata tra minimo e massimo; i NaN diventano spazi"""
+        present = [value for value in values if value == value]
+        if not present:
+            return " " * len(values)
+        low, high = min(present), max(present)
+        span = (high - low) or 1.0
+        top = len(MetricStore.SPARK_CHARS) - 1
+        return "".join(MetricStore.SPARK_CHARS[int((value - low) / span * top)] if value == value else " "
+                       for value in values)
+    
+    def names(self) -> List[str]:
+        """Metriche presenti nell'archivio"""
+        with self._lock:
+            return sorted(self._series)
+    
+    def memory_bytes(self) -> int:
+        """Memoria occupata dai buffer preallocati"""
+        per_series = sum(capacity * (8 * 4 + array('I').itemsize) for _, capacity in self.tiers)
+        with self._lock:
+            return per_series * len(self._series)
+
+class MetricArchive:
+    """Archivio circolare su disco di campioni a record fissi, letto tramite mmap
+    
+    Il file contiene un header di HEADER_SIZE byte e CAPACITY record da
+    RECORD_SIZE byte: crc32, numero di sequenza, timestamp (double) e un
+    float32 per ciascuna delle METRICS (NaN se il valore manca). Il record
+    con sequenza n occupa lo slot n % capacità, quindi il file non cresce
+    mai. Il crc copre tutto il record: un record scritto a metà da un
+    crash, o sovrascritto mentre un lettore lo sta leggendo, viene
+    riconosciuto e scartato in lettura, come quello la cui sequenza non è
+    quella attesa per lo slot. Ogni SYNC_EVERY record lo scrittore esegue
+    msync e annota nell'header la sequenza ormai stabile su disco.
+    
+    Le letture cercano l'intervallo per bisezione sul timestamp ed
+    estraggono le colonne con slicing a passo fisso su memoryview, senza
+    copiare il file né creare un oggetto per record.
+    """
+    
+    MAGIC = b'SAHMETR1'
+    VERSION = 1
+    # magic, versione, dimensione record, capacità, record scritti, record sincronizzati
+    HEADER = struct.Struct('<8sIIIQQ')
+    HEADER_SIZE = 512
+    
+    # Metriche registrate, nell'ordine delle colonne del record
+    METRICS = [
+        'cpu.busy', 'cpu.iowait', 'cpu.steal', 'load.1m',
+        'memory.used_percent', 'memory.swap_percent', 'disk.root_percent',
+        'net.rx_rate', 'net.tx_rate', 'services.failed', 'journal.errors_per_min',
+    ]
+    # Colonne totali: quelle libere restano NaN e permettono di aggiungere metriche
+    SLOTS = 16
+    RECORD = struct.Struct('<IId' + 'f' * SLOTS)
+    RECORD_SIZE = RECORD.size
+    
+    # Una settimana di campioni ogni 10 secondi (circa 4.8 MB)
+    CAPACITY = 7 * 24 * 360
+    SYNC_EVERY = 60
+    
+    def __init__(self, path: Optional[str] = None, writable: bool = False, capacity: Optional[int] = None):
+        self.path = path or self.default_path()
+        self.writable = writable
+        self._file = None
+        self._map = None
+        self.capacity = 0
+        
+        if writable:
+            capacity = capacity or self.CAPACITY
+            size = self.HEADER_SIZE + capacity * self.RECORD_SIZE
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._file = os.fdopen(fd, 'r+b')
+            try:
+                # Un solo scrittore: un secondo daemon sullo stesso file fallisce subito
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                raise RuntimeError(f"archivio già in uso da un altro processo: {self.path}")
+            if os.fstat(fd).st_size == 0:
+                self._file.truncate(size)
+                self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD_SIZE, capacity, 0, 0))
+                self._file.flush()
+            self._map = mmap.mmap(fd, 0)
+        else:
+            try:
+                self._file = open(self.path, 'rb')
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self.close()
+                return
+        
+        magic, version, record_size, self.capacity, _, _ = self.HEADER.unpack_from(self._map, 0)
+        if (magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD_SIZE
+                or len(self._map) < self.HEADER_SIZE + self.capacity * self.RECORD_SIZE):
+            self.close()
+            raise ValueError(f"formato archivio non compatibile: {self.path}")
+    
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(SystemInfo.get_state_dir(), 'metrics.bin')
+    
+    def close(self):
+        if self._map is not None:
+            if self.writable:
+                self.sync()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *_):
+        self.close()
+    
+    @property
+    def written(self) -> int:
+        """Numero totale di record scritti dalla creazione del file"""
+        return self.HEADER.unpack_from(self._map, 0)[4] if self._map is not None else 0
+    
+    @property
+    def synced(self) -> int:
+        """Record già resi persistenti con msync"""
+        return self.HEADER.unpack_from(self._map, 0)[5] if self._map is not None else 0
+    
+    def sync(self):
+        """Forza su disco i record scritti e ne registra la sequenza nell'header"""
+        written = self.written
+        self._map.flush()
+        struct.pack_into('<Q', self._map, self.HEADER.size - 8, written)
+        self._map.flush(0, self.HEADER_SIZE)
+    
+    def append(self, values: Dict[str, float], timestamp: Optional[float] = None):
+        """Scrive un record; le metriche assenti sono registrate come NaN"""
+        timestamp = time.time() if timestamp is None else timestamp
+        sequence = self.written
+        columns = [float(values.get(name, math.nan)) for name in self.METRICS]
+        columns += [math.nan] * (self.SLOTS - len(columns))
+        record = bytearray(self.RECORD.pack(0, sequence & 0xFFFFFFFF, timestamp, *columns))
+        struct.pack_into('<I', record, 0, zlib.crc32(memoryview(record)[4:]))
+        
+        offset = self.HEADER_SIZE + (sequence % self.capacity) * self.RECORD_SIZE
+        self._map[offset:offset + self.RECORD_SIZE] = record
+        # Il contatore avanza solo a record completo
+        struct.pack_into('<Q', self._map, self.HEADER.size - 16, sequence + 1)
+        if (sequence + 1) % self.SYNC_EVERY == 0:
+            self.sync()
+    
+    def _offset(self, sequence: int) -> int:
+        return self.HEADER_SIZE + (sequence % self.capacity) * self.RECORD_SIZE
+    
+    def _valid(self, data, offset: int, sequence: int) -> bool:
+        """Il record in data[offset:] è integro (crc) ed è proprio quello con la sequenza attesa"""
+        crc, stored = struct.unpack_from('<II', data, offset)
+        return stored == sequence & 0xFFFFFFFF and crc == zlib.crc32(data[offset + 4:offset + self.RECORD_SIZE])
+    
+    def _timestamp(self, sequence: int, end: int) -> float:
+        """Timestamp del primo record valido da sequence in poi (infinito se nessuno)"""
+        while sequence < end:
+            offset = self._offset(sequence)
+            if self._valid(self._map, offset, sequence):
+                return struct.unpack_from('<d', self._map, offset + 8)[0]
+            sequence += 1
+        return math.inf
+    
+    def _bisect(self, timestamp: float, low: int, high: int) -> int:
+        """Prima sequenza in [low, high) con timestamp >= timestamp"""
+        end = high
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp(middle, end) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def read(self, since: float, until: Optional[float] = None,
+             metrics: Optional[List[str]] = None) -> Dict[str, List[float]]:
+        """Colonne dei record con since <= timestamp < until
+        
+        Restituisce {'timestamp': [...], metrica: [...]}; i record corrotti
+        sono esclusi e i valori mancanti restano NaN.
+        """
+        metrics = metrics or self.METRICS
+        result = {name: [] for name in ['timestamp'] + metrics}
+        if self._map is None:
+            return result
+        
+        written = self.written
+        oldest = max(written - self.capacity, 0)
+        first = self._bisect(since, oldest, written)
+        last = self._bisect(until, first, written) if until is not None else written
+        
+        floats_per_record = self.RECORD_SIZE // 4
+        doubles_per_record = self.RECORD_SIZE // 8
+        columns = [self.METRICS.index(name) for name in metrics]
+        while first < last:
+            # Tratto contiguo nel file: al più due, se l'intervallo attraversa la fine del buffer
+            count = min(last - first, self.capacity - first % self.capacity)
+            start = self._offset(first)
+            with memoryview(self._map)[start:start + count * self.RECORD_SIZE] as segment:
+                # Anche i record già sincronizzati vanno verificati: lo slot del più vecchio
+                # può essere sovrascritto dallo scrittore durante la lettura
+                valid = [self._valid(segment, index * self.RECORD_SIZE, first + index) for index in range(count)]
+                if sys.byteorder == 'little':
+                    with segment.cast('d') as doubles, segment.cast('f') as floats:
+                        extracted = [('timestamp', doubles[1::doubles_per_record].tolist())]
+                        for name, column in zip(metrics, columns):
+                            extracted.append((name, floats[4 + column::floats_per_record].tolist()))
+                else:
+                    # Le viste memoryview usano l'ordine nativo: su big-endian si decodifica record per record
+                    records = list(self.RECORD.iter_unpack(segment))
+                    extracted = [('timestamp', [record[2] for record in records])]
+                    extracted += [(name, [record[3 + column] for record in records])
+                                  for name, column in zip(metrics, columns)]
+            complete = all(valid)
+            for name, values in extracted:
+                result[name].extend(values if complete else (v for v, ok in zip(values, valid) if ok))
+            first += count
+        return result
+
+class SystemInfo:
+    """Classe per raccogliere informazioni di sistema"""
+    
+    # Numero massimo di comandi eseguiti in parallelo da run_commands()
+    MAX_PARALLEL_COMMANDS = 8
+    
+    # Cache condivisa per i risultati di comandi e collector
+    CACHE = CommandCache()
+    
+    # Storico in memoria delle metriche osservate durante la sessione
+    METRICS = MetricStore()
+    
+    # Limite di output per i comandi in streaming
+    STREAM_MAX_BYTES = 16 * 1024 * 1024
+    
+    @staticmethod
+    def run_command(cmd: str, capture_output: bool = True, timeout: float = 30,
+                    cache: Optional[str] = None) -> Tuple[int, str, str]:
+        """Esegue un comando e restituisce il risultato
+        
+        Se cache indica una sorgente (es. 'lvm'), i risultati con esito
+        positivo vengono riutilizzati per il TTL di quella sorgente.
+        """
+        started = Profiler.start() if Profiler.enabled else None
+        cache_status = None
+        
+        if cache and capture_output:
+            found, result = SystemInfo.CACHE.get(('cmd', cmd))
+            if found:
+                cache_status = 'hit'
+            else:
+                cache_status = 'miss'
+                result = SystemInfo._execute(cmd, capture_output, timeout)
+                if result[0] == 0:
+                    SystemInfo.CACHE.put(('cmd', cmd), result, cache)
+        else:
+            result = SystemInfo._execute(cmd, capture_output, timeout)
+        
+        if started:
+            Profiler.stop('command', cmd, started, len(result[1] or ""), cache_status)
+        return result
+    
+    @staticmethod
+    def _execute(cmd: str, capture_output: bool, timeout: float) -> Tuple[int, str, str]:
+        """Esecuzione effettiva del comando tramite shell"""
+        try:
+            result = subprocess.run(
+                cmd, 
+                shell=True, 
+                capture_output=capture_output,
+                text=True,
+                timeout=timeout
+            )
+            return result.returncode, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            return -1, "", "Command timed out"
+        except Exception as e:
+            return -1, "", str(e)
+    
+    @staticmethod
+    def run_commands(cmds: List, max_workers: Optional[int] = None,
+                     timeout: float = 30, cache: Optional[str] = None) -> List[Tuple[int, str, str]]:
+        """Esegue più comandi in parallelo e restituisce i risultati nello stesso ordine
+        
+        Il pool è limitato a max_workers thread (default MAX_PARALLEL_COMMANDS);
+        timeout si applica a ogni singolo comando. Ogni voce può essere un
+        comando oppure una coppia (comando, sorgente cache) che ha la
+        precedenza su cache.
+        """
+        if not cmds:
+            return []
+        
+        def run(item):
+            if isinstance(item, tuple):
+                return SystemInfo.run_command(item[0], timeout=timeout, cache=item[1])
+            return SystemInfo.run_command(item, timeout=timeout, cache=cache)
+        
+        workers = max(1, min(max_workers or SystemInfo.MAX_PARALLEL_COMMANDS, len(cmds)))
+        if workers == 1:
+            return [run(item) for item in cmds]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, cmds))
+    
+    @staticmethod
+    def stream_command(argv: List[str], max_lines: Optional[int] = None,
+                       max_bytes: Optional[int] = STREAM_MAX_BYTES,
+                       timeout: Optional[float] = 30) -> CommandStream:
+        """Esegue un comando in streaming (vedi CommandStream)"""
+        return CommandStream(argv, max_lines=max_lines, max_bytes=max_bytes, timeout=timeout)
+    
+    @staticmethod
+    def check_root():
+        """Verifica se il tool è eseguito come root"""
+        return os.geteuid() == 0
+    
+    @staticmethod
+    def get_state_dir() -> str:
+        """Directory per i dati persistenti del tool, creata se manca
+        
+        SYSADMIN_HELPER_STATE_DIR ha la precedenza; altrimenti
+        /var/lib/sysadmin-helper per root e $XDG_STATE_HOME (o
+        ~/.local/state)/sysadmin-helper per gli altri utenti.
+        """
+        path = os.environ.get('SYSADMIN_HELPER_STATE_DIR')
+        if not path:
+            if SystemInfo.check_root():
+                path = "/var/lib/sysadmin-helper"
+            else:
+                base = os.environ.get('XDG_STATE_HOME') or os.path.expanduser("~/.local/state")
+                path = os.path.join(base, "sysadmin-helper")
+        os.makedirs(path, exist_ok=True)
+        return path
+    
+    @staticmethod
+    def get_system_overview():
+        """Restituisce una panoramica del sistema
+        
+        Le chiavi storiche contengono stringhe leggibili; le chiavi con
+        suffisso _bytes/_seconds/_values riportano i valori numerici.
+        """
+        overview = {}
+        
+        # Sistema operativo
+        os_release = ProcCollector.os_release()
+        if 'PRETTY_NAME' in os_release:
+            overview['os'] = os_release['PRETTY_NAME']
+        
+        # Uptime
+        uptime_seconds = ProcCollector.uptime()
+        if uptime_seconds is not None:
+            overview['uptime'] = ProcCollector.format_uptime(uptime_seconds)
+            overview['uptime_seconds'] = uptime_seconds
+        
+        # Memoria
+        memory = ProcCollector.memory()
+        if memory:
+            overview['memory_total'] = ProcCollector.format_bytes(memory['total'])
+            overview['memory_used'] = ProcCollector.format_bytes(memory['used'])
+            overview['memory_available'] = ProcCollector.format_bytes(memory['available'])
+            overview['memory_total_bytes'] = memory['total']
+            overview['memory_used_bytes'] = memory['used']
+            overview['memory_available_bytes'] = memory['available']
+        
+        # Spazio disco
+        disk = ProcCollector.disk_usage("/")
+        if disk:
+            overview['disk_total'] = ProcCollector.format_bytes(disk['total'])
+            overview['disk_used'] = ProcCollector.format_bytes(disk['used'])
+            overview['disk_available'] = ProcCollector.format_bytes(disk['available'])
+            overview['disk_usage'] = f"{disk['percent']}%"
+            overview['disk_total_bytes'] = disk['total']
+            overview['disk_used_bytes'] = disk['used']
+            overview['disk_available_bytes'] = disk['available']
+            overview['disk_usage_percent'] = disk['percent']
+        
+        # Load average
+        load_avg = ProcCollector.load_average()
+        if load_avg:
+            overview['load_avg'] = [f"{value:.2f}" for value in load_avg]
+            overview['load_avg_values'] = load_avg
+        
+        return overview
+
+class ProcCollector:
+    """Raccolta nativa di metriche da /proc, /etc e statvfs (senza fork)"""
+    
+    @staticmethod
+    def read_file(path: str) -> Optional[str]:
+        """Legge un file di testo restituendo None in caso di errore"""
+        try:
+            with open(path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    @staticmethod
+    def os_release() -> Dict[str, str]:
+        """Parsing di /etc/os-release (con fallback su /usr/lib/os-release)"""
+        content = ProcCollector.read_file("/etc/os-release")
+        if content is None:
+            content = ProcCollector.read_file("/usr/lib/os-release") or ""
+        
+        info = {}
+        for line in content.split('\n'):
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                info[key.strip()] = value.strip().strip('"').strip("'")
+        return info
+    
+    @staticmethod
+    def uptime() -> Optional[float]:
+        """Secondi trascorsi dal boot (/proc/uptime)"""
+        content = ProcCollector.read_file("/proc/uptime")
+        if not content:
+            return None
+        try:
+            return float(content.split()[0])
+        except (ValueError, IndexError):
+            return None
+    
+    @staticmethod
+    def load_average() -> List[float]:
+        """Load average a 1, 5 e 15 minuti (/proc/loadavg)"""
+        content = ProcCollector.read_file("/proc/loadavg")
+        if not content:
+            return []
+        try:
+            return [float(value) for value in content.split()[0:3]]
+        except ValueError:
+            return []
+    
+    @staticmethod
+    def meminfo() -> Dict[str, int]:
+        """Contenuto di /proc/meminfo convertito in byte"""
+        content = ProcCollector.read_file("/proc/meminfo")
+        if not content:
+            return {}
+        
+        values = {}
+        for line in content.split('\n'):
+            parts = line.split()
+            if len(parts) >= 2:
+                try:
+                    value = int(parts[1])
+                except ValueError:
+                    continue
+                if len(parts) >= 3 and parts[2] == 'kB':
+                    value *= 1024
+                values[parts[0].rstrip(':')] = value
+        return values
+    
+    @staticmethod
+    def memory() -> Dict[str, int]:
+        """Memoria totale, usata e disponibile in byte (stessa logica di free)"""
+        info = ProcCollector.meminfo()
+        if 'MemTotal' not in info:
+            return {}
+        
+        total = info['MemTotal']
+        if 'MemAvailable' in info:
+            available = info['MemAvailable']
+        else:
+            # Kernel < 3.14: stima come free + cache
+            available = info.get('MemFree', 0) + info.get('Buffers', 0) + info.get('Cached', 0)
+        
+        return {
+            'total': total,
+            'used': max(total - available, 0),
+            'available': available,
+            'free': info.get('MemFree', 0),
+            'swap_total': info.get('SwapTotal', 0),
+            'swap_free': info.get('SwapFree', 0),
+        }
+    
+    @staticmethod
+    def disk_usage(path: str = "/") -> Dict[str, int]:
+        """Utilizzo del filesystem che contiene path, calcolato come df"""
+        try:
+            st = os.statvfs(path)
+        except OSError:
+            return {}
+        
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        available = st.f_bavail * st.f_frsize
+        # df arrotonda per eccesso la percentuale su used + available
+        usable = used + available
+        percent = -(-used * 100 // usable) if usable else 0
+        
+        return {
+            'total': total,
+            'used': used,
+            'available': available,
+            'percent': percent,
+        }
+    
+    @staticmethod
+    def net_dev() -> Dict[str, Dict[str, int]]:
+        """Contatori per interfaccia da /proc/net/dev"""
+        content = ProcCollector.read_file("/proc/net/dev") or ""
+        interfaces = {}
+        for line in content.split('\n')[2:]:
+            if ':' not in line:
+                continue
+            iface, data = line.split(':', 1)
+            parts = data.split()
+            if len(parts) >= 10:
+                interfaces[iface.strip()] = {
+                    'rx_bytes': int(parts[0]),
+                    'rx_packets': int(parts[1]),
+                    'tx_bytes': int(parts[8]),
+                    'tx_packets': int(parts[9]),
+                }
+        return interfaces
+    
+    @staticmethod
+    def format_bytes(value: float) -> str:
+        """Formatta una dimensione in byte come df/free -h"""
+        for unit in ['B', 'K', 'M', 'G', 'T']:
+            if abs(value) < 1024:
+                return f"{value:.0f}{unit}" if unit == 'B' else f"{value:.1f}{unit}"
+            value /= 1024
+        return f"{value:.1f}P"
+    
+    @staticmethod
+    def format_uptime(seconds: float) -> str:
+        """Formatta l'uptime come uptime -p"""
+        minutes = int(seconds // 60)
+        parts = []
+        for label, size in [("week", 10080), ("day", 1440), ("hour", 60), ("minute", 1)]:
+            count, minutes = divmod(minutes, size)
+            if count:
+                parts.append(f"{count} {label}{'s' if count > 1 else ''}")
+        return "up " + (", ".join(parts) if parts else "0 minutes")
+
+class CpuSampler:
+    """Utilizzo CPU calcolato per differenza tra due letture di /proc/stat
+    
+    Il campionatore conserva i contatori della lettura precedente: ogni
+    chiamata a sample() costa una sola lettura di /proc/stat, senza fork.
+    """
+    
+    # Ordine dei contatori nelle righe cpu di /proc/stat
+    FIELDS = ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal']
+    
+    def __init__(self):
+        self._previous = {}
+    
+    @staticmethod
+    def read_counters() -> Dict[str, List[int]]:
+        """Contatori in tick per la CPU totale ('cpu') e per ogni core ('cpuN')"""
+        content = ProcCollector.read_file("/proc/stat") or ""
+        counters = {}
+        for line in content.split('\n'):
+            if not line.startswith('cpu'):
+                break
+            parts = line.split()
+            # guest/guest_nice sono già inclusi in user/nice
+            values = [int(value) for value in parts[1:9]]
+            values += [0] * (len(CpuSampler.FIELDS) - len(values))
+            counters[parts[0]] = values
+        return counters
+    
+    def sample(self) -> Dict[str, Dict[str, float]]:
+        """Percentuali per CPU dall'ultima chiamata (vuoto alla prima)"""
+        current = self.read_counters()
+        usage = {}
+        for name, values in current.items():
+            previous = self._previous.get(name)
+            if previous is None:
+                continue
+            delta = dict(zip(self.FIELDS, (max(now - before, 0) for now, before in zip(values, previous))))
+            total = sum(delta.values())
+            if total == 0:
+                continue
+            idle = (delta['idle'] + delta['iowait']) * 100.0 / total
+            usage[name] = {
+                'user': (delta['user'] + delta['nice']) * 100.0 / total,
+                'system': delta['system'] * 100.0 / total,
+                'iowait': delta['iowait'] * 100.0 / total,
+                'steal': delta['steal'] * 100.0 / total,
+                'irq': (delta['irq'] + delta['softirq']) * 100.0 / total,
+                'idle': delta['idle'] * 100.0 / total,
+                'busy': 100.0 - idle,
+            }
+        self._previous = current
+        return usage
+
+class ProcessScanner:
+    """Tabella processi letta da /proc con aggiornamento incrementale
+    
+    I campi statici di ogni PID (utente, comando, istante di avvio) vengono
+    letti una sola volta; alle scansioni successive si rilegge solo
+    /proc/[pid]/stat, che contiene sia i tick di CPU sia l'RSS. La %CPU è
+    calcolata sulla differenza di tick dall'ultima scansione (alla prima
+    scansione è la media dall'avvio del processo, come in ps).
+    """
+    
+    def __init__(self):
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self._static = {}   # pid -> campi statici
+        self._ticks = {}    # pid -> tick utente + sistema all'ultima scansione
+        self._last_scan = None
+        self._users = {}
+    
+    def _user_name(self, uid: int) -> str:
+        name = self._users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._users[uid] = name
+        return name
+    
+    def _read_static(self, pid: int, comm: str, start_time: int) -> Optional[Dict]:
+        """Campi che non cambiano per tutta la vita del processo"""
+        try:
+            uid = os.stat(f"/proc/{pid}").st_uid
+            with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                # Separatori NUL e a capo diventano spazi singoli
+                cmdline = ' '.join(f.read().decode('utf-8', 'replace').replace('\0', ' ').split())
+        except OSError:
+            return None
+        return {
+            'start_time': start_time,
+            'uid': uid,
+            'user': self._user_name(uid),
+            'command': cmdline or f"[{comm}]",
+        }
+    
+    def scan(self) -> List[Dict]:
+        """Legge la tabella processi e calcola %CPU e memoria per ogni PID"""
+        now = time.monotonic()
+        elapsed = now - self._last_scan if self._last_scan else None
+        uptime = ProcCollector.uptime() or 0.0
+        mem_total = ProcCollector.meminfo().get('MemTotal', 0)
+        
+        processes = []
+        ticks_now = {}
+        try:
+            entries = os.scandir("/proc")
+        except OSError:
+            return []
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                pid = int(entry.name)
+                try:
+                    with open(f"/proc/{pid}/stat", 'rb') as f:
+                        raw = f.read()
+                except OSError:
+                    continue  # Processo terminato durante la scansione
+                
+                # Il nome del comando può contenere spazi e parentesi
+                rparen = raw.rfind(b')')
+                fields = raw[rparen + 2:].split()
+                if len(fields) < 22:
+                    continue
+                ticks = int(fields[11]) + int(fields[12])
+                start_time = int(fields[19])
+                rss = int(fields[21]) * self.page_size
+                
+                info = self._static.get(pid)
+                if info is None or info['start_time'] != start_time:
+                    # PID nuovo o riutilizzato: i tick precedenti non valgono
+                    comm = raw[raw.find(b'(') + 1:rparen].decode('utf-8', 'replace')
+                    info = self._read_static(pid, comm, start_time)
+                    if info is None:
+                        continue
+                    self._static[pid] = info
+                    self._ticks.pop(pid, None)
+                
+                previous = self._ticks.get(pid)
+                if previous is not None and elapsed:
+                    cpu = (ticks - previous) * 100.0 / self.clock_ticks / elapsed
+                else:
+                    lifetime = uptime - start_time / self.clock_ticks
+                    cpu = ticks * 100.0 / self.clock_ticks / lifetime if lifetime > 0 else 0.0
+                ticks_now[pid] = ticks
+                
+                processes.append({
+                    'pid': pid,
+                    'user': info['user'],
+                    'state': fields[0].decode(),
+                    'cpu': cpu,
+                    'rss': rss,
+                    'mem': rss * 100.0 / mem_total if mem_total else 0.0,
+                    'command': info['command'],
+                })
+        
+        # Dimentica i processi terminati
+        for pid in set(self._static) - set(ticks_now):
+            del self._static[pid]
+        self._ticks = ticks_now
+        self._last_scan = now
+        return processes
+    
+    def top(self, count: int = 10, key: str = 'cpu') -> List[Dict]:
+        """Esegue una scansione e restituisce i count processi con valore key più alto"""
+        return heapq.nlargest(count, self.scan(), key=lambda process: process[key])
+    
+    @staticmethod
+    def format_table(processes: List[Dict], width: int = 60) -> List[str]:
+        """Righe di tabella in stile ps per la visualizzazione"""
+        lines = [f"{'USER':10} {'PID':>7} {'%CPU':>6} {'%MEM':>5} {'RSS':>7}  COMMAND"]
+        for process in processes:
+            lines.append(f"{process['user'][:10]:10} {process['pid']:>7} {process['cpu']:>6.1f} "
+                         f"{process['mem']:>5.1f} {ProcCollector.format_bytes(process['rss']):>7}  "
+                         f"{process['command'][:width]}")
+        return lines
+
+class AsyncCollector:
+    """Motore di raccolta asincrono basato su asyncio
+    
+    Ogni sezione (system, services, network, lvm, audit, security) è una
+    coroutine che restituisce dati strutturati senza stampare nulla; la
+    visualizzazione è compito dei manager. collect() esegue le sezioni
+    richieste in parallelo, ciascuna con il proprio timeout: una sezione
+    lenta viene cancellata (terminando i suoi processi) e restituisce
+    {'error': 'timeout'} senza bloccare le altre.
+    """
+    
+    # Timeout in secondi per sezione
+    SECTION_TIMEOUTS = {
+        'system': 5,
+        'services': 10,
+        'network': 5,
+        'lvm': 10,
+        'audit': 20,
+        'security': 10,
+    }
+    
+    @staticmethod
+    async def run(argv: List[str], cache: Optional[str] = None) -> Tuple[int, str, str]:
+        """Esegue un comando (argv, senza shell) senza bloccare l'event loop"""
+        key = ('argv', tuple(argv))
+        if cache:
+            found, result = SystemInfo.CACHE.get(key)
+            if found:
+                return result
+        
+        started = Profiler.start() if Profiler.enabled else None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            return 127, "", str(e)
+        
+        try:
+            out, err = await proc.communicate()
+        except asyncio.CancelledError:
+            # Sezione cancellata (timeout): non lasciare processi orfani
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        
+        result = (proc.returncode, out.decode('utf-8', 'replace'), err.decode('utf-8', 'replace'))
+        if started:
+            Profiler.stop('command', ' '.join(argv), started, len(out), 'miss' if cache else None)
+        if cache and result[0] == 0:
+            SystemInfo.CACHE.put(key, result, cache)
+        return result
+    
+    @staticmethod
+    async def read_file(path: str) -> Optional[str]:
+        """Lettura di un file in un thread per non bloccare l'event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, ProcCollector.read_file, path)
+    
+    @staticmethod
+    async def section_system() -> Dict:
+        """Identificazione sistema e uptime"""
+        uname, uptime = await asyncio.gather(
+            AsyncCollector.run(["uname", "-a"]),
+            AsyncCollector.read_file("/proc/uptime"),
+        )
+        data = {'uname': uname[1].strip() if uname[0] == 0 else None}
+        if uptime:
+            data['uptime_seconds'] = float(uptime.split()[0])
+            data['uptime'] = ProcCollector.format_uptime(data['uptime_seconds'])
+        return data
+    
+    @staticmethod
+    async def section_services() -> Dict:
+        """Servizi attivi e falliti"""
+        active, failed = await asyncio.gather(
+            AsyncCollector.run(["systemctl", "list-units", "--type=service", "--state=active",
+                                "--no-legend", "--plain", "--no-pager"], cache='services'),
+            AsyncCollector.run(["systemctl", "list-units", "--failed", "--no-legend", "--plain",
+                                "--no-pager"], cache='services'),
+        )
+        if active[0] != 0 and failed[0] != 0:
+            message = (active[2] or failed[2]).strip()
+            return {'error': message.split('\n')[0] if message else "systemctl non disponibile"}
+        failed_units = [line.split()[0] for line in failed[1].split('\n') if line.strip()]
+        return {
+            'active_count': len([line for line in active[1].split('\n') if line.strip()]),
+            'failed_units': failed_units,
+        }
+    
+    @staticmethod
+    async def section_network() -> Dict:
+        """Gateway predefinito e porte in ascolto"""
+        route, listening = await asyncio.gather(
+            AsyncCollector.run(["ip", "route", "show", "default"]),
+            AsyncCollector.run(["ss", "-tuln"]),
+        )
+        gateway = None
+        for line in route[1].split('\n'):
+            parts = line.split()
+            if len(parts) > 2 and parts[0] == 'default':
+                gateway = parts[2]
+                break
+        return {
+            'gateway': gateway,
+            'listening_ports': sum(1 for line in listening[1].split('\n') if 'LISTEN' in line),
+        }
+    
+    @staticmethod
+    async def section_lvm() -> Dict:
+        """Volume Group e Logical Volume"""
+        vgs, lvs = await asyncio.gather(
+            AsyncCollector.run(["vgs", "--noheadings", "-o", "vg_name,vg_size,vg_free"], cache='lvm'),
+            AsyncCollector.run(["lvs", "--noheadings", "-o", "lv_name,vg_name,lv_size"], cache='lvm'),
+        )
+        groups = []
+        for line in vgs[1].split('\n'):
+            parts = line.split()
+            if len(parts) >= 3:
+                groups.append({'name': parts[0], 'size': parts[1], 'free': parts[2]})
+        volumes = []
+        for line in lvs[1].split('\n'):
+            parts = line.split()
+            if len(parts) >= 3:
+                volumes.append({'name': parts[0], 'vg': parts[1], 'size': parts[2],
+                                'path': f"/dev/{parts[1]}/{parts[0]}"})
+        return {'available': vgs[0] == 0, 'volume_groups': groups, 'logical_volumes': volumes}
+    
+    @staticmethod
+    async def section_audit() -> Dict:
+        """Conteggi eventi del journal nelle ultime 24h (JournalAggregator condiviso con le schermate di audit)"""
+        loop = asyncio.get_event_loop()
+        journal = await loop.run_in_executor(None, SystemAuditManager.journal_aggregate)
+        if journal.error:
+            return {'error': journal.error}
+        return {
+            'sessions_opened': journal.events['sessions_opened'],
+            'auth_failures': journal.events['auth_failures'],
+            'sudo': journal.events['sudo'],
+            'errors': journal.at_least('err'),
+            'warnings': journal.at_least('warning'),
+        }
+    
+    @staticmethod
+    async def section_security() -> Dict:
+        """Utenti sudo, servizi falliti e log di grandi dimensioni"""
+        sudo_group, failed, big_log = await asyncio.gather(
+            AsyncCollector.run(["getent", "group", "sudo"]),
+            AsyncCollector.run(["systemctl", "--failed", "--quiet"]),
+            AsyncCollector.run(["find", "/var/log", "-name", "*.log", "-size", "+100M", "-print", "-quit"]),
+        )
+        sudo_users = []
+        if sudo_group[0] == 0 and sudo_group[1].strip():
+            members = sudo_group[1].strip().split(':')[-1]
+            sudo_users = [user for user in members.split(',') if user.strip()]
+        return {
+            'sudo_users': sudo_users,
+            'has_failed_services': failed[0] != 0,
+            'has_big_logs': bool(big_log[1].strip()),
+        }
+    
+    @staticmethod
+    async def _guarded(name: str, timeout: float) -> Dict:
+        """Esegue una sezione applicando timeout e isolando gli errori"""
+        section = getattr(AsyncCollector, f"section_{name}")
+        started = Profiler.start() if Profiler.enabled else None
+        try:
+            return await asyncio.wait_for(section(), timeout)
+        except asyncio.TimeoutError:
+            return {'error': f"timeout dopo {timeout}s"}
+        except Exception as e:
+            return {'error': str(e)}
+        finally:
+            if started:
+                Profiler.stop('section', f"AsyncCollector.section_{name}", started)
+    
+    @staticmethod
+    async def gather(names: List[str], timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+        """Coroutine che raccoglie in parallelo le sezioni richieste"""
+        limits = dict(AsyncCollector.SECTION_TIMEOUTS)
+        if timeouts:
+            limits.update(timeouts)
+        results = await asyncio.gather(*(AsyncCollector._guarded(name, limits.get(name, 10)) for name in names))
+        return dict(zip(names, results))
+    
+    @staticmethod
+    def collect(names: List[str], timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+        """Punto di ingresso sincrono per i manager"""
+        return asyncio.run(AsyncCollector.gather(names, timeouts))
+
+class MonitorDaemon:
+    """Scheduler di campionamento per la modalità --monitor-daemon
+    
+    Ogni collector ha il proprio intervallo e una fase casuale fissata
+    all'avvio (jitter), così più nodi avviati insieme non campionano nello
+    stesso istante. Le scadenze sono calcolate dalla scadenza precedente e
+    non dall'orario di fine esecuzione, quindi non accumulano deriva; se un
+    collector sfora il proprio intervallo i tick persi vengono saltati invece
+    di essere recuperati in blocco.
+    
+    Il processo gira con priorità ridotta (NICE) e controlla il proprio
+    consumo di CPU, figli inclusi: se supera CPU_BUDGET gli intervalli
+    vengono allungati fino a MAX_SLOWDOWN volte, e ripristinati quando il
+    consumo rientra.
+    """
+    
+    # Intervallo di campionamento predefinito per collector (secondi)
+    INTERVALS = {
+        'cpu': 10,
+        'memory': 10,
+        'network': 10,
+        'disk': 60,
+        'services': 60,
+        'journal': 60,
+        'archive': 10,
+    }
+    
+    # Frazione dell'intervallo usata come fase casuale del collector
+    JITTER = 0.1
+    
+    NICE = 10
+    
+    # Frazione di un core utilizzabile dal daemon (processo e comandi figli)
+    CPU_BUDGET = 0.02
+    MAX_SLOWDOWN = 8
+    
+    # Ogni quanti secondi verificare il budget e stampare lo stato
+    STATUS_INTERVAL = 300
+    
+    # Finestra dei contatori del journal conservati dal daemon
+    JOURNAL_WINDOW = 3600
+    
+    # Interfacce con serie proprie nello store (due serie ciascuna): solo schede
+    # fisiche, perché veth, bridge e tap nascono e muoiono di continuo e le
+    # serie non vengono mai rimosse
+    MAX_INTERFACES = 4
+    SYS_NET = "/sys/class/net"
+    
+    def __init__(self, intervals: Optional[Dict[str, float]] = None, store: Optional[MetricStore] = None,
+                 cpu_budget: Optional[float] = None, status_interval: Optional[float] = None,
+                 archive: Optional[MetricArchive] = None):
+        self.intervals = dict(intervals or self.INTERVALS)
+        self.store = store or SystemInfo.METRICS
+        self.cpu_budget = self.CPU_BUDGET if cpu_budget is None else cpu_budget
+        self.status_interval = status_interval or self.STATUS_INTERVAL
+        self.slowdown = 1
+        self.stats = {name: {'runs': 0, 'skipped': 0, 'errors': 0, 'seconds': 0.0} for name in self.intervals}
+        self._stop = threading.Event()
+        self._cpu_sampler = CpuSampler()
+        self._net_previous = None
+        self._journal_since = None
+        self._journal = None
+        self._interfaces = set()
+        self._refused = set()
+        self.archive = archive
+    
+    def stop(self, *_):
+        """Richiede l'arresto; usabile anche come gestore di segnale"""
+        self._stop.set()
+    
+    @staticmethod
+    def log(message: str):
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+    
+    @staticmethod
+    def _cpu_seconds() -> float:
+        """CPU consumata dal processo e dai comandi figli terminati"""
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return time.process_time() + children.ru_utime + children.ru_stime
+    
+    def _add(self, name: str, value: float, now: float):
+        """Registra un campione; segnala una volta sola le metriche rifiutate dallo store pieno"""
+        if not self.store.add(name, value, now) and name not in self._refused:
+            self._refused.add(name)
+            self.log(f"⚠️  Metrica {name} scartata: raggiunto il limite di {self.store.max_metrics} serie")
+    
+    def _track_interface(self, iface: str) -> bool:
+        """True se l'interfaccia ha serie proprie (scheda fisica, entro MAX_INTERFACES)"""
+        if iface not in self._interfaces:
+            if len(self._interfaces) >= self.MAX_INTERFACES:
+                return False
+            if not os.path.exists(os.path.join(self.SYS_NET, iface, "device")):
+                return False
+            self._interfaces.add(iface)
+        return True
+    
+    # Collector: ognuno registra le proprie metriche nello store
+    
+    def collect_cpu(self, now: float):
+        usage = self._cpu_sampler.sample().get('cpu')
+        if usage:
+            self._add('cpu.busy', usage['busy'], now)
+            self._add('cpu.iowait', usage['iowait'], now)
+            self._add('cpu.steal', usage['steal'], now)
+        load_avg = ProcCollector.load_average()
+        if load_avg:
+            self._add('load.1m', load_avg[0], now)
+    
+    def collect_memory(self, now: float):
+        memory = ProcCollector.memory()
+        if memory:
+            self._add('memory.used_percent', memory['used'] * 100.0 / memory['total'], now)
+            if memory['swap_total']:
+                swap_used = memory['swap_total'] - memory['swap_free']
+                self._add('memory.swap_percent', swap_used * 100.0 / memory['swap_total'], now)
+    
+    def collect_disk(self, now: float):
+        disk = ProcCollector.disk_usage("/")
+        if disk:
+            self._add('disk.root_percent', disk['used'] * 100.0 / disk['total'], now)
+    
+    def collect_network(self, now: float):
+        counters = ProcCollector.net_dev()
+        previous, self._net_previous = self._net_previous, (now, counters)
+        if previous is None or now <= previous[0]:
+            return
+        elapsed = now - previous[0]
+        rates = {}
+        for iface, values in counters.items():
+            before = previous[1].get(iface)
+            if iface == 'lo' or before is None:
+                continue
+            rates[iface] = (max(values['rx_bytes'] - before['rx_bytes'], 0) / elapsed,
+                            max(values['tx_bytes'] - before['tx_bytes'], 0) / elapsed)
+        # I totali prima delle serie per interfaccia
+        self._add('net.rx_rate', sum(rx for rx, _ in rates.values()), now)
+        self._add('net.tx_rate', sum(tx for _, tx in rates.values()), now)
+        for iface, (rx_rate, tx_rate) in rates.items():
+            if self._track_interface(iface):
+                self._add(f"net.{iface}.rx_rate", rx_rate, now)
+                self._add(f"net.{iface}.tx_rate", tx_rate, now)
+    
+    def collect_services(self, now: float):
+        stream = SystemInfo.stream_command(
+            ["systemctl", "list-units", "--failed", "--no-legend", "--plain"],
+            timeout=min(self.intervals['services'], 30)
+        )
+        failed = sum(1 for line in stream if line.strip())
+        if stream.returncode == 0:
+            self._add('services.failed', failed, now)
+    
+    def collect_journal(self, now: float):
+        """Errori al minuto nel journal dall'ultima lettura (JournalAggregator con cursore persistente)"""
+        since, self._journal_since = self._journal_since, now
+        if self._journal is None:
+            self._journal = JournalAggregator(path=JournalAggregator.default_path('daemon'),
+                                              window=self.JOURNAL_WINDOW)
+        journal = self._journal.collect(timeout=min(self.intervals['journal'], 30), now=now)
+        if since is not None and journal.returncode == 0:
+            self._add('journal.errors_per_min', journal.new_errors * 60.0 / max(now - since, 1), now)
+    
+    def collect_archive(self, now: float):
+        """Scrive nell'archivio su disco la media delle metriche dall'ultimo record"""
+        if self.archive is None:
+            return
+        window = self.intervals['archive'] * self.slowdown
+        values = {}
+        for name in MetricArchive.METRICS:
+            # La finestra copre almeno un campione dei collector più lenti
+            stats = self.store.stats(name, max(window, self.intervals.get(name.split('.')[0], 0) * self.slowdown), now)
+            if stats:
+                values[name] = stats['avg'] if name.split('.')[0] not in ('disk', 'services') else stats['last']
+        self.archive.append(values, now)
+    
+    def run_collector(self, name: str, now: float):
+        started = time.monotonic()
+        try:
+            getattr(self, f"collect_{name}")(now)
+            self.stats[name]['runs'] += 1
+        except Exception as e:
+            self.stats[name]['errors'] += 1
+            self.log(f"collector {name}: errore - {e}")
+        self.stats[name]['seconds'] += time.monotonic() - started
+    
+    def _check_budget(self, cpu_used: float, elapsed: float):
+        """Adegua il rallentamento degli intervalli al consumo di CPU misurato"""
+        if elapsed <= 0:
+            return
+        usage = cpu_used / elapsed
+        if usage > self.cpu_budget and self.slowdown < self.MAX_SLOWDOWN:
+            self.slowdown *= 2
+            self.log(f"budget CPU superato ({usage * 100:.2f}% > {self.cpu_budget * 100:.2f}%): "
+                     f"intervalli x{self.slowdown}")
+        elif usage < self.cpu_budget / 2 and self.slowdown > 1:
+            self.slowdown //= 2
+            self.log(f"consumo CPU rientrato ({usage * 100:.2f}%): intervalli x{self.slowdown}")
+    
+    def _status(self):
+        parts = []
+        for name, stats in self.stats.items():
+            parts.append(f"{name}={stats['runs']}" + (f"/-{stats['skipped']}" if stats['skipped'] else "")
+                         + (f"/!{stats['errors']}" if stats['errors'] else ""))
+        self.log(f"stato: {' '.join(parts)} metriche={len(self.store.names())} "
+                 f"memoria={ProcCollector.format_bytes(self.store.memory_bytes())}")
+    
+    def run(self, duration: Optional[float] = None) -> Dict[str, Dict]:
+        """Ciclo principale fino a stop(), SIGTERM/SIGINT o scadenza di duration"""
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, self.stop)
+        try:
+            os.nice(self.NICE)
+        except OSError:
+            pass
+        
+        start = time.monotonic()
+        deadline = start + duration if duration is not None else None
+        # Coda delle scadenze: (istante, collector); la fase casuale sfasa i collector
+        schedule = [(start + random.uniform(0, interval * self.JITTER), name)
+                    for name, interval in self.intervals.items()]
+        heapq.heapify(schedule)
+        next_status = start + self.status_interval
+        window_start, window_cpu = start, self._cpu_seconds()
+        
+        self.log(f"daemon avviato (pid {os.getpid()}): " +
+                 ", ".join(f"{name} ogni {interval}s" for name, interval in self.intervals.items()))
+        
+        while not self._stop.is_set():
+            due, name = schedule[0]
+            wait_until = min(due, next_status) if deadline is None else min(due, next_status, deadline)
+            if self._stop.wait(max(wait_until - time.monotonic(), 0)):
+                break
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            
+            if now >= next_status:
+                cpu_now = self._cpu_seconds()
+                self._check_budget(cpu_now - window_cpu, now - window_start)
+                window_start, window_cpu = now, cpu_now
+                next_status += self.status_interval
+                self._status()
+                continue
+            if now < due:
+                continue
+            
+            heapq.heappop(schedule)
+            self.run_collector(name, time.time())
+            
+            # Prossima scadenza calcolata dalla precedente: i tick già passati vengono saltati
+            interval = self.intervals[name] * self.slowdown
+            next_due = due + interval
+            finished = time.monotonic()
+            if next_due <= finished:
+                missed = int((finished - next_due) // interval) + 1
+                self.stats[name]['skipped'] += missed
+                next_due += missed * interval
+            heapq.heappush(schedule, (next_due, name))
+        
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+        if self.archive is not None:
+            self.archive.close()
+        self._status()
+        self.log("daemon arrestato")
+        return self.stats
+
+class LogTimestamps:
+    """Riconoscimento del formato dei timestamp nelle righe di log
+    
+    Formati supportati: syslog (``Jan  2 15:04:05``, anno dedotto dalla
+    data di modifica del file), ISO 8601 (``2024-01-02T15:04:05+01:00``,
+    anche con spazio e frazioni di secondo) e Common Log Format
+    (``[02/Jan/2024:15:04:05 +0100]``).
+    """
+    
+    MONTHS = {name: index for index, name in enumerate(
+        ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+    
+    PATTERNS = {
+        'iso8601': re.compile(r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,]\d+)?(Z|[+-]\d{2}:?\d{2})?'),
+        'clf': re.compile(r'\[(\d{2})/([A-Z][a-z]{2})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-]\d{4})\]'),
+        'syslog': re.compile(r'([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})'),
+    }
+    
+    # Il timestamp deve trovarsi all'inizio della riga (entro questo numero di caratteri)
+    PREFIX = 64
+    # Byte letti in testa e in coda al file per ricavare primo e ultimo evento
+    SAMPLE_BYTES = 8192
+    # Ricerca binaria per data: byte letti a ogni sondaggio, e ampiezza sotto cui si
+    # prosegue con una lettura sequenziale
+    PROBE_BYTES = 16 * 1024
+    SEEK_LINEAR = 64 * 1024
+    
+    @staticmethod
+    def _offset(text: str) -> timezone:
+        if text == 'Z':
+            return timezone.utc
+        text = text.replace(':', '')
+        minutes = int(text[1:3]) * 60 + int(text[3:5])
+        return timezone(timedelta(minutes=-minutes if text[0] == '-' else minutes))
+    
+    @staticmethod
+    def parse(line: str, fmt: str, year: Optional[int] = None) -> Optional[float]:
+        """Timestamp Unix della riga nel formato fmt, None se non riconosciuto"""
+        match = LogTimestamps.PATTERNS[fmt].search(line, 0, LogTimestamps.PREFIX)
+        if not match:
+            return None
+        groups = match.groups()
+        try:
+            if fmt == 'iso8601':
+                tz = LogTimestamps._offset(groups[6]) if groups[6] else None
+                moment = datetime(*(int(value) for value in groups[:6]), tzinfo=tz)
+            elif fmt == 'clf':
+                moment = datetime(int(groups[2]), LogTimestamps.MONTHS[groups[1]], int(groups[0]),
+                                  int(groups[3]), int(groups[4]), int(groups[5]),
+                                  tzinfo=LogTimestamps._offset(groups[6]))
+            else:
+                moment = datetime(year or datetime.now().year, LogTimestamps.MONTHS[groups[0]], int(groups[1]),
+                                  int(groups[2]), int(groups[3]), int(groups[4]))
+        except (KeyError, ValueError):
+            return None
+        return moment.timestamp()
+    
+    @staticmethod
+    def parse_near(line: str, fmt: str, reference: float) -> Optional[float]:
+        """Come parse(), con l'anno dei syslog dedotto da reference (ad esempio l'mtime)
+        
+        Gli eventi che cadrebbero oltre un giorno dopo reference sono
+        dell'anno precedente (log a cavallo di capodanno).
+        """
+        year = datetime.fromtimestamp(reference).year
+        value = LogTimestamps.parse(line, fmt, year)
+        if value is not None and fmt == 'syslog' and value > reference + 86400:
+            value = LogTimestamps.parse(line, fmt, year - 1)
+        return value
+    
+    @staticmethod
+    def detect(lines: List[str]) -> Optional[str]:
+        """Formato riconosciuto nel maggior numero di righe del campione"""
+        best, best_count = None, 0
+        for fmt, pattern in LogTimestamps.PATTERNS.items():
+            count = sum(1 for line in lines if pattern.search(line, 0, LogTimestamps.PREFIX))
+            if count > best_count:
+                best, best_count = fmt, count
+        return best
+    
+    @staticmethod
+    def bounds(path: str, mtime: Optional[float] = None) -> Tuple[Optional[str], Optional[float], Optional[float]]:
+        """(formato, primo evento, ultimo evento) leggendo solo testa e coda del file"""
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(LogTimestamps.SAMPLE_BYTES)
+                size = f.seek(0, os.SEEK_END)
+                if size > LogTimestamps.SAMPLE_BYTES:
+                    f.seek(max(size - LogTimestamps.SAMPLE_BYTES, LogTimestamps.SAMPLE_BYTES))
+                    tail = f.read()
+                else:
+                    tail = head
+        except OSError:
+            return None, None, None
+        
+        head_lines = head.decode('utf-8', 'replace').split('\n')
+        fmt = LogTimestamps.detect(head_lines[:50])
+        if fmt is None:
+            return None, None, None
+        
+        # Il syslog non riporta l'anno: si usa quello dell'ultima modifica
+        reference = mtime if mtime is not None else time.time()
+        
+        def parse(line):
+            return LogTimestamps.parse_near(line, fmt, reference)
+        
+        first = next((value for value in map(parse, head_lines) if value is not None), None)
+        last = next((value for value in map(parse, reversed(tail.decode('utf-8', 'replace').split('\n')))
+                     if value is not None), None)
+        return fmt, first, last
+    
+    @staticmethod
+    def _dated_line(f, offset: int, end: int, fmt: str, reference: float) -> Tuple[Optional[float], int, int]:
+        """Prima riga datata che inizia in [offset, end): (timestamp, inizio, inizio della prima riga)
+        
+        Se offset non è un inizio riga si parte dalla riga successiva. Si
+        leggono al massimo PROBE_BYTES; senza righe datate il timestamp è None.
+        """
+        start = offset
+        if offset > 0:
+            f.seek(offset - 1)
+            data = f.read(LogTimestamps.PROBE_BYTES + 1)
+            cut = data.find(b'\n')
+            if cut < 0:
+                return None, end, end
+            start = offset + cut
+            data = data[cut + 1:]
+        else:
+            f.seek(0)
+            data = f.read(LogTimestamps.PROBE_BYTES)
+        first = start
+        position = 0
+        while start < end:
+            newline = data.find(b'\n', position)
+            if newline < 0:
+                break
+            value = LogTimestamps.parse_near(data[position:position + 2 * LogTimestamps.PREFIX].decode('utf-8', 'replace'),
+                                             fmt, reference)
+            if value is not None:
+                return value, start, first
+            start += newline + 1 - position
+            position = newline + 1
+        return None, min(start, end), first
+    
+    @staticmethod
+    def seek_time(f, since: float, fmt: str, reference: float, size: Optional[int] = None) -> int:
+        """Offset della prima riga con timestamp >= since, con ricerca binaria sui byte
+        
+        Presuppone timestamp crescenti nel file; le righe senza timestamp
+        (ad esempio gli stack trace) appartengono all'evento precedente. In
+        caso di dubbio il limite si sposta verso l'inizio: si leggono più
+        byte ma nessuna riga della finestra viene persa.
+        """
+        if size is None:
+            size = f.seek(0, os.SEEK_END)
+        low, high = 0, size
+        while high - low > LogTimestamps.SEEK_LINEAR:
+            middle = (low + high) // 2
+            value, start, first = LogTimestamps._dated_line(f, middle, high, fmt, reference)
+            if value is not None and value < since:
+                low = start
+            elif first < high:
+                high = first
+            else:
+                # Nessun inizio riga leggibile dopo middle (righe lunghissime)
+                break
+        
+        # Tratto finale letto in una volta sola
+        f.seek(low)
+        data = f.read(high - low + LogTimestamps.PROBE_BYTES)
+        position = 0
+        while low + position < high:
+            newline = data.find(b'\n', position)
+            if newline < 0:
+                break
+            value = LogTimestamps.parse_near(data[position:position + 2 * LogTimestamps.PREFIX].decode('utf-8', 'replace'),
+                                             fmt, reference)
+            if value is not None and value >= since:
+                return low + position
+            position = newline + 1
+        return min(low + position, high)
+    
+    @staticmethod
+    def first_in_window(data: bytes, end: int, since: float, fmt: str, reference: float) -> Optional[int]:
+        """Inizio della prima riga di data[:end] datata da since in poi, None se non ce ne sono
+        
+        Per i flussi che non si possono leggere a salti (file compressi): se
+        l'ultima riga datata del blocco precede since il blocco viene
+        scartato senza analizzare le altre.
+        """
+        def parse(start):
+            return LogTimestamps.parse_near(data[start:start + 2 * LogTimestamps.PREFIX].decode('utf-8', 'replace'),
+                                            fmt, reference)
+        
+        position = end
+        while position > 0:
+            start = data.rfind(b'\n', 0, position - 1) + 1
+            value = parse(start)
+            if value is not None:
+                if value < since:
+                    return None
+                break
+            position = start
+        position = 0
+        while position < end:
+            value = parse(position)
+            if value is not None and value >= since:
+                return position
+            newline = data.find(b'\n', position, end)
+            if newline < 0:
+                break
+            position = newline + 1
+        return None
+    
+    @staticmethod
+    def window_start(path: str, since: float) -> Optional[int]:
+        """Offset da cui leggere path per gli eventi da since in poi; None senza timestamp riconosciuti"""
+        try:
+            with open(path, 'rb') as f:
+                info = os.fstat(f.fileno())
+                head = f.read(LogTimestamps.SAMPLE_BYTES).decode('utf-8', 'replace').split('\n')[:50]
+                fmt = LogTimestamps.detect(head)
+                if fmt is None:
+                    return None
+                return LogTimestamps.seek_time(f, since, fmt, info.st_mtime, info.st_size)
+        except OSError:
+            return None
+
+class LogInventory:
+    """Inventario persistente dei file di log con riscoperta incrementale
+    
+    Per ogni directory visitata si conservano mtime, sottodirectory e file
+    di log: alla riscoperta le directory con mtime invariato non vengono
+    rilette e dei loro file si aggiornano con una stat solo quelli attivi
+    (i ruotati non cambiano più). Un cambio di inode sullo stesso percorso,
+    o una dimensione che diminuisce, indica una rotazione: formato, primo e
+    ultimo evento vengono ricalcolati solo per i file modificati.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.directories = {}
+        self.files = {}
+        if path:
+            self.load()
+    
+    @staticmethod
+    def default_path() -> Optional[str]:
+        try:
+            return os.path.join(SystemInfo.get_state_dir(), 'log_inventory.json')
+        except OSError:
+            return None
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION:
+            self.directories = data.get('directories', {})
+            self.files = data.get('files', {})
+    
+    def save(self):
+        """Scrittura atomica: un file temporaneo rinominato sopra il precedente"""
+        if not self.path:
+            return
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump({'version': self.VERSION, 'directories': self.directories, 'files': self.files}, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+    
+    def _update(self, record: Dict, counters: Dict[str, int]) -> Dict:
+        """Completa un record appena letto con i dati noti o ricalcolati"""
+        previous = self.files.get(record['path'])
+        if previous is not None:
+            unchanged_file = previous['inode'] == record['inode'] and previous['size'] <= record['size']
+            record['rotations'] = previous.get('rotations', 0) + (0 if unchanged_file else 1)
+            record['rotated_at'] = previous.get('rotated_at') if unchanged_file else time.time()
+            if not unchanged_file:
+                counters['rotations'] += 1
+            elif previous['size'] == record['size'] and previous['mtime'] == record['mtime']:
+                for key in ('format', 'first', 'last'):
+                    record[key] = previous.get(key)
+                return record
+        else:
+            record['rotations'] = 0
+            record['rotated_at'] = None
+        
+        counters['sampled'] += 1
+        if record['compressed']:
+            record['format'] = record['first'] = record['last'] = None
+        else:
+            record['format'], record['first'], record['last'] = LogTimestamps.bounds(record['path'], record['mtime'])
+        return record
+    
+    def _walk(self, root: str, skip: frozenset) -> Tuple[Dict, Dict, Dict[str, int]]:
+        directories, files = {}, {}
+        counters = {'directories': 0, 'rescanned': 0, 'rotations': 0, 'sampled': 0}
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            counters['directories'] += 1
+            known = self.directories.get(directory)
+            if known is not None and known['mtime'] == mtime:
+                subdirs = known['subdirs']
+                records = []
+                for name in known['files']:
+                    path = os.path.join(directory, name)
+                    previous = self.files.get(path)
+                    if previous is not None and previous['rotated']:
+                        records.append(dict(previous))
+                        continue
+                    try:
+                        info = os.stat(path, follow_symlinks=False)
+                    except OSError:
+                        continue
+                    kind = LogManager.classify_log_name(name)
+                    records.append({'path': path, 'size': info.st_size, 'mtime': info.st_mtime,
+                                    'inode': info.st_ino, 'compressed': kind[0], 'rotated': kind[1]})
+            else:
+                counters['rescanned'] += 1
+                subdirs, records = LogManager._list_dir(directory, skip)
+            
+            for record in records:
+                record['root'] = root
+                files[record['path']] = self._update(record, counters)
+            directories[directory] = {
+                'mtime': mtime,
+                'subdirs': subdirs,
+                'files': [os.path.basename(record['path']) for record in records],
+            }
+            pending.extend(subdirs)
+        return directories, files, counters
+    
+    def refresh(self, roots: Optional[List[str]] = None) -> Dict[str, int]:
+        """Aggiorna l'inventario visitando le radici in parallelo; restituisce i contatori"""
+        roots = LogManager.find_log_roots() if roots is None else roots
+        totals = {'directories': 0, 'rescanned': 0, 'rotations': 0, 'sampled': 0}
+        directories, files = {}, {}
+        if roots:
+            skip = frozenset(roots)
+            with ThreadPoolExecutor(max_workers=min(len(roots), SystemInfo.MAX_PARALLEL_COMMANDS)) as executor:
+                for walked_dirs, walked_files, counters in executor.map(
+                        lambda root: self._walk(root, skip - {root}), roots):
+                    directories.update(walked_dirs)
+                    files.update(walked_files)
+                    for key, value in counters.items():
+                        totals[key] += value
+        # File e directory non più presenti escono dall'inventario
+        self.directories, self.files = directories, files
+        return totals
+    
+    def by_root(self) -> Dict[str, List[Dict]]:
+        """Record raggruppati per radice: attivi prima dei ruotati, poi per percorso"""
+        grouped = {}
+        for record in sorted(self.files.values(), key=lambda record: (record['rotated'], record['path'])):
+            grouped.setdefault(record['root'], []).append(record)
+        return grouped
+
+class LogSearch:
+    """Ricerca regex nei file di log, in parallelo su più processi
+    
+    Ogni file è diviso in blocchi di CHUNK_SIZE byte allineati a inizio riga;
+    ogni processo del pool mappa il file con mmap e cerca nel proprio blocco
+    direttamente sui byte, senza caricarlo in memoria né decodificarlo. Le
+    rotazioni compresse (gzip, xz, bz2) sono decompresse in streaming, un
+    processo per file. I conteggi per file sono sempre esatti; le righe di
+    esempio si fermano a limit: raggiunto il limite i processi smettono di
+    raccoglierle e si limitano a contare.
+    
+    Uso: si itera su search(paths) per ricevere (file, riga) nell'ordine dei
+    file, dal più recente al più vecchio per data di modifica, così le
+    rotazioni compaiono in ordine di età; al termine counts, files,
+    bytes_scanned e bytes_decompressed riportano il risultato completo.
+    Con since si cercano solo gli eventi successivi: nei file non compressi
+    con timestamp riconosciuti la prima riga utile si trova con una ricerca
+    binaria sui byte (bytes_before_window sono i byte saltati), in quelli
+    compressi le righe precedenti vengono scartate durante la lettura. I
+    file senza timestamp riconosciuti sono cercati per intero e finiscono
+    in unfiltered.
+    """
+    
+    CHUNK_SIZE = 8 * 1024 * 1024
+    # Sotto questa dimensione totale la ricerca avviene nel processo corrente
+    POOL_THRESHOLD = 2 * CHUNK_SIZE
+    MAX_LINE_BYTES = 4096
+    DISPLAY_WIDTH = 300
+    
+    CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+    
+    # Formati di compressione leggibili con la libreria standard
+    DECOMPRESSORS = {suffix: module for suffix, module in [('.gz', gzip), ('.xz', lzma), ('.bz2', bz2)] if module}
+    # Errori di lettura di file spariti, troncati o con archivio corrotto
+    READ_ERRORS = (OSError, EOFError, ValueError) + ((lzma.LZMAError,) if lzma else ())
+    
+    # Evento condiviso con i processi del pool: limite di righe raggiunto
+    _stop = None
+    
+    def __init__(self, pattern: str, ignore_case: bool = False, limit: int = 50, workers: Optional[int] = None,
+                 index: Optional['TrigramIndex'] = None, since: Optional[float] = None):
+        self.flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.pattern = pattern.encode('utf-8', 'surrogateescape')
+        # Compilata subito: un pattern non valido solleva re.error al chiamante
+        self.regex = re.compile(pattern, self.flags)
+        re.compile(self.pattern, self.flags)
+        self.limit = limit
+        self.workers = workers or os.cpu_count() or 1
+        self.counts = {}
+        self.files = 0
+        self.bytes_scanned = 0
+        self.bytes_decompressed = 0
+        self.bytes_skipped = 0
+        self.binary = set()
+        # Con un indice e un pattern indicizzabile si leggono solo i blocchi candidati
+        self.index = index
+        self.index_bits = TrigramIndex.query_bits(pattern) if index is not None else None
+        # Finestra temporale: nei file con timestamp riconosciuti si parte dalla prima
+        # riga successiva a since (LogTimestamps.window_start)
+        self.since = since
+        self.bytes_before_window = 0
+        self.unfiltered = set()
+        # Formato dei timestamp e mtime dei file compressi da filtrare durante la lettura
+        self._formats = {}
+    
+    @staticmethod
+    def _init_worker(stop):
+        LogSearch._stop = stop
+    
+    @staticmethod
+    def open_log(path: str):
+        """File binario in lettura, decompresso in streaming per .gz/.xz/.bz2"""
+        module = LogSearch.DECOMPRESSORS.get(os.path.splitext(path)[1])
+        if module is None:
+            return open(path, 'rb')
+        return module.open(path, 'rb')
+    
+    @staticmethod
+    def is_searchable(path: str) -> bool:
+        """False per i formati compressi non supportati dalla libreria standard (ad esempio .zst)"""
+        return not path.endswith(LogManager.COMPRESSED_SUFFIXES) or \
+            os.path.splitext(path)[1] in LogSearch.DECOMPRESSORS
+    
+    @staticmethod
+    def _scan(regex, data, start: int, end: int, samples: List[bytes], max_samples: int) -> int:
+        """Conta le righe corrispondenti in data[start:end], aggiungendo esempi fino a max_samples"""
+        count = 0
+        position = start
+        while position < end:
+            match = regex.search(data, position, end)
+            if match is None:
+                break
+            line_start = data.rfind(b'\n', start, match.start()) + 1 or start
+            line_end = data.find(b'\n', match.start(), end)
+            if line_end < 0:
+                line_end = end
+            count += 1
+            if len(samples) < max_samples and not (LogSearch._stop is not None and LogSearch._stop.is_set()):
+                samples.append(bytes(data[line_start:min(line_end, line_start + LogSearch.MAX_LINE_BYTES)]))
+            position = line_end + 1
+        return count
+    
+    @staticmethod
+    def search_chunk(path: str, start: int, end: int, pattern: bytes, flags: int,
+                     max_samples: int) -> Tuple[str, int, List[bytes], int]:
+        """Righe corrispondenti in [start, end) di path: (file, conteggio, esempi, byte decompressi)"""
+        regex = re.compile(pattern, flags)
+        count = 0
+        samples = []
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                count = LogSearch._scan(regex, data, start, min(end, len(data)), samples, max_samples)
+        except (OSError, ValueError):
+            # File sparito, non leggibile o vuoto (mmap di lunghezza zero)
+            pass
+        return path, count, samples, 0
+    
+    @staticmethod
+    def search_compressed(path: str, pattern: bytes, flags: int, max_samples: int, since: Optional[float] = None,
+                          fmt: Optional[str] = None, reference: float = 0.0) -> Tuple[str, int, List[bytes], int]:
+        """Come search_chunk per un intero file compresso, letto a blocchi terminati a fine riga
+        
+        Con since e il formato dei timestamp si salta tutto ciò che precede
+        la prima riga datata da since in poi.
+        """
+        regex = re.compile(pattern, flags)
+        count = 0
+        samples = []
+        decompressed = 0
+        waiting = since is not None and fmt is not None
+        
+        def scan(data, end):
+            nonlocal waiting
+            start = 0
+            if waiting:
+                start = LogTimestamps.first_in_window(data, end, since, fmt, reference)
+                if start is None:
+                    return 0
+                waiting = False
+            return LogSearch._scan(regex, data, start, end, samples, max_samples)
+        
+        try:
+            with LogSearch.open_log(path) as f:
+                remainder = b''
+                while True:
+                    data = f.read(LogSearch.CHUNK_SIZE)
+                    decompressed += len(data)
+                    if not data:
+                        break
+                    data = remainder + data
+                    cut = data.rfind(b'\n') + 1
+                    remainder = data[cut:]
+                    count += scan(data, cut)
+                if remainder:
+                    count += scan(remainder, len(remainder))
+        except LogSearch.READ_ERRORS:
+            # Archivio troncato o corrotto: restano i conteggi fin qui
+            pass
+        return path, count, samples, decompressed
+    
+    def plan(self, paths: List[str]) -> List[Tuple[str, int, int]]:
+        """Blocchi (file, inizio, fine) con confini subito dopo un a capo
+        
+        I file compressi sono un unico blocco (file, 0, -1).
+        """
+        chunks = []
+        for path in paths:
+            try:
+                if path.endswith(LogManager.COMPRESSED_SUFFIXES):
+                    if not self.is_searchable(path):
+                        continue
+                    size = os.path.getsize(path)
+                    with self.open_log(path) as f:
+                        head = f.read(LogTimestamps.SAMPLE_BYTES)
+                    if b'\0' in head[:1024]:
+                        self.binary.add(path)
+                    if self.since is not None:
+                        fmt = LogTimestamps.detect(head.decode('utf-8', 'replace').split('\n')[:50])
+                        if fmt is None:
+                            self.unfiltered.add(path)
+                        else:
+                            self._formats[path] = (fmt, os.path.getmtime(path))
+                    chunks.append((path, 0, -1))
+                else:
+                    with open(path, 'rb') as f:
+                        size = os.fstat(f.fileno()).st_size
+                        if size == 0:
+                            continue
+                        # Contenuto binario: si contano le corrispondenze ma non si mostrano le righe
+                        if b'\0' in f.read(1024):
+                            self.binary.add(path)
+                        ranges = [(0, size)]
+                        if self.since is not None:
+                            start = LogTimestamps.window_start(path, self.since)
+                            if start is not None:
+                                ranges = [(start, size)] if start < size else []
+                                self.bytes_before_window += start
+                            else:
+                                self.unfiltered.add(path)
+                        if self.index_bits is not None and ranges:
+                            candidates = self.index.candidates(f, self.index_bits)
+                            if candidates is not None:
+                                window = ranges[0][0]
+                                ranges = [(max(start, window), end) for start, end in candidates if end > window]
+                                self.bytes_skipped += size - window - sum(end - start for start, end in ranges)
+                        # Si contano solo i byte che verranno effettivamente letti
+                        size = sum(end - start for start, end in ranges)
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                            for start, end in ranges:
+                                while start < end:
+                                    boundary = data.find(b'\n', min(start + self.CHUNK_SIZE, end) - 1, end) + 1 or end
+                                    chunks.append((path, start, boundary))
+                                    start = boundary
+            except LogSearch.READ_ERRORS:
+                continue
+            self.files += 1
+            self.bytes_scanned += size
+        return chunks
+    
+    def display(self, line: bytes) -> str:
+        """Riga decodificata in modo sicuro: UTF-8 non valido e caratteri di controllo sostituiti"""
+        text = self.CONTROL_CHARS.sub('?', line.decode('utf-8', 'replace').rstrip('\r'))
+        return text if len(text) <= self.DISPLAY_WIDTH else text[:self.DISPLAY_WIDTH] + "…"
+    
+    @staticmethod
+    def by_age(paths: List[str]) -> List[str]:
+        """Percorsi dal più recente al più vecchio per data di modifica"""
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0
+        return sorted(paths, key=mtime, reverse=True)
+    
+    def _task(self, chunk: Tuple[str, int, int], max_samples: int):
+        path, start, end = chunk
+        if end < 0:
+            fmt, reference = self._formats.get(path, (None, 0.0))
+            return LogSearch.search_compressed, (path, self.pattern, self.flags, max_samples, self.since, fmt, reference)
+        return LogSearch.search_chunk, (path, start, end, self.pattern, self.flags, max_samples)
+    
+    def search(self, paths: List[str]):
+        """Genera (file, riga) fino a limit righe; i conteggi proseguono fino alla fine"""
+        chunks = self.plan(self.by_age(paths))
+        compressed = any(end < 0 for _, _, end in chunks)
+        shown = 0
+        
+        def collect(path, count, samples, decompressed):
+            nonlocal shown
+            self.bytes_decompressed += decompressed
+            if count:
+                self.counts[path] = self.counts.get(path, 0) + count
+            if path in self.binary:
+                return []
+            lines = [self.display(line) for line in samples[:max(self.limit - shown, 0)]]
+            shown += len(lines)
+            return lines
+        
+        if self.workers == 1 or (self.bytes_scanned < self.POOL_THRESHOLD and not compressed):
+            for chunk in chunks:
+                function, args = self._task(chunk, max(self.limit - shown, 0))
+                result = function(*args)
+                for line in collect(*result):
+                    yield result[0], line
+            return
+        
+        stop = multiprocessing.Event()
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=LogSearch._init_worker, initargs=(stop,))
+        futures = [executor.submit(*((function,) + args))
+                   for function, args in (self._task(chunk, self.limit) for chunk in chunks)]
+        try:
+            # I risultati vengono emessi nell'ordine dei blocchi (età dei file) appena
+            # tutti i blocchi precedenti sono completati
+            following = 0
+            pending = set(futures)
+            while following < len(futures):
+                if not futures[following].done():
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    continue
+                result = futures[following].result()
+                following += 1
+                for line in collect(*result):
+                    yield result[0], line
+                if shown >= self.limit:
+                    stop.set()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+    
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+class TrigramIndex:
+    """Indice su disco dei trigrammi dei log, per restringere le ricerche ripetute
+    
+    Ogni file di log indicizzato ha un proprio file, chiamato come il
+    device:inode: si conserva quindi attraverso le rinomine di logrotate e
+    va ricostruito solo se il file viene troncato o sostituito. Il file è
+    diviso in blocchi di CHUNK_SIZE byte allineati alle righe; per ogni
+    blocco l'indice salva una bitmap di BITMAP_BITS bit in cui è acceso il
+    bit di ogni trigramma (sul testo in minuscolo) presente nel blocco.
+    
+    Un blocco può contenere una corrispondenza solo se tutti i trigrammi
+    dei letterali obbligatori del pattern hanno il bit acceso: gli altri
+    si saltano senza falsi negativi. I pattern senza letterali di almeno
+    tre caratteri (o con alternative |) non sono indicizzabili e usano la
+    scansione completa. Dopo un'aggiunta al log si indicizzano solo i byte
+    nuovi, a blocchi interi; la dimensione totale è limitata a MAX_BYTES.
+    L'header conserva un'impronta crc32 dei primi FINGERPRINT_BYTES byte:
+    un file riscritto sullo stesso inode (copytruncate) e già cresciuto
+    oltre la parte indicizzata non riusa le bitmap del contenuto precedente.
+    """
+    
+    MAGIC = b'SAHTRI2\0'
+    # magic, byte per bitmap, byte indicizzati, blocchi, lunghezza e crc32 dell'impronta
+    HEADER = struct.Struct('<8sIQIII')
+    ENTRY = struct.Struct('<QQ')
+    CHUNK_SIZE = 1024 * 1024
+    BITMAP_BITS = 1 << 17
+    BITMAP_BYTES = BITMAP_BITS // 8
+    MAX_BYTES = 256 * 1024 * 1024
+    FINGERPRINT_BYTES = 256
+    
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.path.join(SystemInfo.get_state_dir(), 'trigram_index')
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        os.makedirs(self.directory, exist_ok=True)
+        self.capped = False
+    
+    @staticmethod
+    def _bit(a: int, b: int, c: int) -> int:
+        return (((a << 16) | (b << 8) | c) * 2654435761 >> 8) & (TrigramIndex.BITMAP_BITS - 1)
+    
+    @staticmethod
+    def bitmap(data: bytes) -> bytes:
+        """Bitmap dei trigrammi presenti in data (confrontati in minuscolo)"""
+        data = data.lower()
+        bitmap = bytearray(TrigramIndex.BITMAP_BYTES)
+        for a, b, c in set(zip(data, data[1:], data[2:])):
+            bit = TrigramIndex._bit(a, b, c)
+            bitmap[bit >> 3] |= 1 << (bit & 7)
+        return bytes(bitmap)
+    
+    @staticmethod
+    def required_literals(pattern: str) -> List[str]:
+        """Sequenze letterali che ogni corrispondenza deve contenere ([] se non determinabili)
+        
+        Analisi prudente: si considerano solo i caratteri fuori dai gruppi e
+        dalle classi; un carattere seguito da *, ? o {} è opzionale.
+        """
+        if '|' in pattern:
+            return []
+        literals, current = [], ''
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if char == '\\' and index + 1 < len(pattern):
+                escaped = pattern[index + 1]
+                index += 2
+                if escaped in 'xuUN' or escaped.isdigit():
+                    # Codici esadecimali, unicode e riferimenti: analisi rinunciata
+                    return []
+                if escaped.isalnum():
+                    # \d, \w, \b, \n...: classi o ancore, non letterali
+                    literals.append(current)
+                    current = ''
+                else:
+                    current += escaped
+                continue
+            if char in '*?{':
+                current = current[:-1]
+                literals.append(current)
+                current = ''
+                if char == '{':
+                    closing = pattern.find('}', index)
+                    index = len(pattern) if closing < 0 else closing
+            elif char in '([':
+                literals.append(current)
+                current = ''
+                # Salta il gruppo o la classe, con eventuali annidamenti
+                depth, closing = 0, {'(': ')', '[': ']'}[char]
+                while index < len(pattern):
+                    if pattern[index] == '\\':
+                        index += 1
+                    elif pattern[index] == char:
+                        depth += 1
+                    elif pattern[index] == closing:
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    index += 1
+            elif char in '.^$)]+':
+                # Con + il carattere precedente resta obbligatorio ma la sequenza si interrompe
+                literals.append(current)
+                current = ''
+            else:
+                current += char
+            index += 1
+        literals.append(current)
+        return [literal for literal in literals if len(literal) >= 3]
+    
+    @staticmethod
+    def query_bits(pattern: str) -> Optional[List[int]]:
+        """Bit da verificare nelle bitmap per il pattern, None se non indicizzabile"""
+        bits = set()
+        for literal in TrigramIndex.required_literals(pattern):
+            data = literal.encode('utf-8').lower()
+            bits.update(TrigramIndex._bit(a, b, c) for a, b, c in zip(data, data[1:], data[2:]))
+        return sorted(bits) or None
+    
+    def _path(self, device: int, inode: int) -> str:
+        return os.path.join(self.directory, f"{device}-{inode}.idx")
+    
+    def size(self) -> int:
+        """Byte occupati dall'indice"""
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.idx'):
+                    try:
+                        total += entry.stat().st_size
+                    except OSError:
+                        pass
+        return total
+    
+    def _read_header(self, path: str) -> Optional[Tuple[int, int, int, int]]:
+        """(byte indicizzati, blocchi, lunghezza e crc dell'impronta) di un file d'indice valido"""
+        try:
+            with open(path, 'rb') as f:
+                magic, bitmap_bytes, indexed, chunks, length, crc = self.HEADER.unpack(f.read(self.HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != self.MAGIC or bitmap_bytes != self.BITMAP_BYTES:
+            return None
+        return indexed, chunks, length, crc
+    
+    @staticmethod
+    def _current(header: Optional[Tuple[int, int, int, int]], f, size: int) -> bool:
+        """L'indice descrive ancora il file aperto in f (non troncato né riscritto)"""
+        return header is not None and header[0] <= size and LogCursors._fingerprint(f, header[2]) == header[3]
+    
+    @staticmethod
+    def _build_chunk(path: str, start: int, end: int) -> bytes:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return TrigramIndex.bitmap(f.read(end - start))
+    
+    def update(self, paths: List[str], workers: Optional[int] = None) -> Dict[str, int]:
+        """Indicizza i byte nuovi dei file (non compressi) indicati
+        
+        I blocchi sono calcolati in parallelo da un pool di processi e
+        aggiunti in coda al file d'indice, poi l'header viene aggiornato.
+        """
+        stats = {'files': 0, 'chunks': 0, 'bytes': 0}
+        budget = self.max_bytes - self.size()
+        entry_cost = self.ENTRY.size + self.BITMAP_BYTES
+        jobs = []
+        for path in paths:
+            if path.endswith(LogManager.COMPRESSED_SUFFIXES):
+                continue
+            ranges = []
+            try:
+                with open(path, 'rb') as f:
+                    info = os.fstat(f.fileno())
+                    index_path = self._path(info.st_dev, info.st_ino)
+                    header = self._read_header(index_path)
+                    if self._current(header, f, info.st_size):
+                        indexed, fingerprint = header[0], header[2:]
+                    else:
+                        # Nuovo file, oppure troncato o riscritto: l'indice riparte da zero
+                        indexed = 0
+                        length = min(info.st_size, self.FINGERPRINT_BYTES)
+                        fingerprint = (length, LogCursors._fingerprint(f, length))
+                        try:
+                            os.unlink(index_path)
+                        except OSError:
+                            pass
+                    position = indexed
+                    # Solo blocchi completi: la coda più corta di CHUNK_SIZE viene letta
+                    # direttamente in ricerca, così le piccole aggiunte non frammentano l'indice
+                    while position + self.CHUNK_SIZE <= info.st_size and budget >= entry_cost:
+                        f.seek(position + self.CHUNK_SIZE - 1)
+                        cut = f.read(self.CHUNK_SIZE).find(b'\n')
+                        if cut < 0:
+                            break
+                        end = position + self.CHUNK_SIZE + cut
+                        ranges.append((position, end))
+                        budget -= entry_cost
+                        position = end
+            except OSError:
+                continue
+            if budget < entry_cost:
+                self.capped = True
+            if ranges:
+                jobs.append((path, index_path, ranges, fingerprint))
+        
+        if not jobs:
+            return stats
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for path, index_path, ranges, fingerprint in jobs:
+                if executor is not None:
+                    bitmaps = list(executor.map(TrigramIndex._build_chunk, *zip(*((path, s, e) for s, e in ranges))))
+                else:
+                    bitmaps = [self._build_chunk(path, start, end) for start, end in ranges]
+                header = self._read_header(index_path)
+                chunks = header[1] if header else 0
+                with open(index_path, 'r+b' if header else 'w+b') as f:
+                    if header is None:
+                        f.write(self.HEADER.pack(self.MAGIC, self.BITMAP_BYTES, 0, 0, *fingerprint))
+                    f.seek(0, os.SEEK_END)
+                    for (start, end), bitmap in zip(ranges, bitmaps):
+                        f.write(self.ENTRY.pack(start, end) + bitmap)
+                    f.flush()
+                    # L'header si aggiorna per ultimo: un'interruzione lascia l'indice precedente valido
+                    f.seek(0)
+                    f.write(self.HEADER.pack(self.MAGIC, self.BITMAP_BYTES, ranges[-1][1], chunks + len(ranges),
+                                             *fingerprint))
+                stats['files'] += 1
+                stats['chunks'] += len(ranges)
+                stats['bytes'] += ranges[-1][1] - ranges[0][0]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return stats
+    
+    def candidates(self, f, bits: List[int]) -> Optional[List[Tuple[int, int]]]:
+        """Intervalli del file aperto in f da verificare con la regex, None se non è indicizzato
+        
+        Comprende i blocchi compatibili con i bit richiesti e la parte del
+        file successiva all'ultimo byte indicizzato.
+        """
+        info = os.fstat(f.fileno())
+        index_path = self._path(info.st_dev, info.st_ino)
+        header = self._read_header(index_path)
+        if not self._current(header, f, info.st_size):
+            return None
+        indexed, chunks = header[:2]
+        ranges = []
+        entry_size = self.ENTRY.size + self.BITMAP_BYTES
+        try:
+            with open(index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for chunk in range(chunks):
+                    offset = self.HEADER.size + chunk * entry_size
+                    bitmap = offset + self.ENTRY.size
+                    if all(data[bitmap + (bit >> 3)] & (1 << (bit & 7)) for bit in bits):
+                        start, end = self.ENTRY.unpack_from(data, offset)
+                        if ranges and ranges[-1][1] == start:
+                            ranges[-1] = (ranges[-1][0], end)
+                        else:
+                            ranges.append((start, end))
+        except (OSError, ValueError):
+            return None
+        if indexed < info.st_size:
+            ranges.append((indexed, info.st_size))
+        return ranges
+    
+    def prune(self, paths: List[str]) -> int:
+        """Rimuove gli indici dei file non più presenti tra paths; restituisce quanti"""
+        live = set()
+        for path in paths:
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            live.add(f"{info.st_dev}-{info.st_ino}.idx")
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.idx') and entry.name not in live:
+                    try:
+                        os.unlink(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+class LogTemplates:
+    """Raggruppamento in streaming delle righe di log in template (algoritmo Drain)
+    
+    Le parti variabili (indirizzi IP, valori esadecimali, numeri) sono
+    mascherate, e UUID e hash diventano sequenze di <HEX>/<NUM>; la riga viene poi divisa in token e instradata in un
+    albero a profondità fissa: numero di token, poi i primi PREFIX_TOKENS
+    token (quelli con parti mascherate diventano <*>). Nella foglia si
+    sceglie il template più simile: se almeno SIMILARITY dei token
+    coincide la riga vi confluisce e i token diversi diventano <*>,
+    altrimenti nasce un nuovo template.
+    
+    La memoria è limitata: al più MAX_CHILDREN figli per nodo (gli altri
+    token vanno nel ramo <*>) e max_clusters template; oltre il limite si
+    scarta quello usato meno di recente e le sue righe restano contate in
+    evicted.
+    """
+    
+    WILDCARD = '<*>'
+    # Poche espressioni semplici: il mascheramento è la parte più costosa. UUID e
+    # hash diventano sequenze di <HEX>/<NUM> e confluiscono comunque in <*>
+    MASKS = [
+        (re.compile(r'\b\d+\.\d+\.\d+\.\d+(?::\d+)?\b'), '<IP>'),
+        (re.compile(r'\b(?:0x[0-9a-fA-F]+|\d+[a-fA-F][0-9a-fA-F]*|[a-fA-F]+\d[0-9a-fA-F]*)\b'), '<HEX>'),
+        (re.compile(r'\d+(?:\.\d+)?'), '<NUM>'),
+    ]
+    PREFIX_TOKENS = 2
+    SIMILARITY = 0.5
+    MAX_CHILDREN = 100
+    MAX_CLUSTERS = 1000
+    
+    def __init__(self, max_clusters: Optional[int] = None):
+        self.max_clusters = max_clusters or self.MAX_CLUSTERS
+        self.root = {}
+        # Identificativo -> template, in ordine di utilizzo (LRU)
+        self.clusters = OrderedDict()
+        self.lines = 0
+        self.evicted = 0
+        self._next_id = 0
+    
+    @staticmethod
+    def mask(line: str) -> str:
+        for regex, replacement in LogTemplates.MASKS:
+            line = regex.sub(replacement, line)
+        return line
+    
+    def _leaf(self, tokens: List[str]) -> List[int]:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.PREFIX_TOKENS]:
+            key = self.WILDCARD if '<' in token else token
+            if key not in node and len(node) >= self.MAX_CHILDREN:
+                key = self.WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault('', [])
+    
+    def _best(self, leaf: List[int], tokens: List[str]) -> Optional[int]:
+        best, best_score = None, (-1.0, -1)
+        for cluster_id in leaf:
+            template = self.clusters[cluster_id]['tokens']
+            same = wildcards = 0
+            for mine, theirs in zip(template, tokens):
+                if mine == self.WILDCARD:
+                    wildcards += 1
+                elif mine == theirs:
+                    same += 1
+            score = (same / len(tokens), wildcards)
+            if score > best_score:
+                best, best_score = cluster_id, score
+        if best is not None and best_score[0] >= self.SIMILARITY:
+            return best
+        return None
+    
+    def add(self, line: str, count: int = 1):
+        """Assegna la riga (non mascherata) a un template"""
+        line = line.rstrip('\r\n')
+        self._add(self.mask(line).split(), line, count)
+    
+    def _add(self, tokens: List[str], line: str, count: int = 1):
+        if not tokens:
+            return
+        self.lines += count
+        leaf = self._leaf(tokens)
+        cluster_id = self._best(leaf, tokens)
+        if cluster_id is not None:
+            cluster = self.clusters[cluster_id]
+            self.clusters.move_to_end(cluster_id)
+            template = cluster['tokens']
+            for position, token in enumerate(tokens):
+                if template[position] != token and template[position] != self.WILDCARD:
+                    template[position] = self.WILDCARD
+            cluster['count'] += count
+            cluster['last_line'] = line
+            return
+        
+        if len(self.clusters) >= self.max_clusters:
+            old_id, old = self.clusters.popitem(last=False)
+            old['leaf'].remove(old_id)
+            self.evicted += old['count']
+        cluster_id = self._next_id
+        self._next_id += 1
+        leaf.append(cluster_id)
+        self.clusters[cluster_id] = {'tokens': tokens, 'count': count, 'first_line': line, 'last_line': line,
+                                     'leaf': leaf}
+    
+    def feed(self, block):
+        """Analizza un blocco (str o bytes) di righe"""
+        if isinstance(block, bytes):
+            block = block.decode('utf-8', 'replace')
+        # Le maschere non toccano gli a capo: un'unica passata per maschera sull'intero blocco
+        for line, masked in zip(block.split('\n'), self.mask(block).split('\n')):
+            self._add(masked.split(), line.rstrip('\r'))
+    
+    def top(self, limit: int = 10, reference: Optional[float] = None) -> List[Dict]:
+        """Template più frequenti: testo, righe, primo e ultimo evento (se datati), esempio"""
+        reference = reference if reference is not None else time.time()
+        result = []
+        for cluster in heapq.nlargest(limit, self.clusters.values(), key=lambda cluster: cluster['count']):
+            fmt = LogTimestamps.detect([cluster['first_line'], cluster['last_line']])
+            first = last = None
+            if fmt is not None:
+                first = LogTimestamps.parse_near(cluster['first_line'], fmt, reference)
+                last = LogTimestamps.parse_near(cluster['last_line'], fmt, reference)
+            result.append({'template': ' '.join(cluster['tokens']), 'count': cluster['count'],
+                           'first': first, 'last': last, 'example': cluster['first_line']})
+        return result
+    
+    def state(self) -> List[List]:
+        """Template in forma serializzabile in JSON, dal meno al più recente"""
+        return [[cluster['tokens'], cluster['count'], cluster['first_line'], cluster['last_line']]
+                for cluster in self.clusters.values()]
+    
+    @staticmethod
+    def from_state(state: Optional[List[List]], max_clusters: Optional[int] = None) -> 'LogTemplates':
+        miner = LogTemplates(max_clusters)
+        state = state or []
+        # Con un limite più basso si tengono i più recenti (lo stato va dal meno recente)
+        for _, count, _, _ in state[:-miner.max_clusters]:
+            miner.evicted += count
+            miner.lines += count
+        for tokens, count, first_line, last_line in state[-miner.max_clusters:]:
+            leaf = miner._leaf(tokens)
+            leaf.append(miner._next_id)
+            miner.clusters[miner._next_id] = {'tokens': list(tokens), 'count': count, 'first_line': first_line,
+                                              'last_line': last_line, 'leaf': leaf}
+            miner._next_id += 1
+            miner.lines += count
+        return miner
+
+class MultiPatternMatcher:
+    """Classificazione delle righe di log rispetto a molte categorie in una sola passata
+    
+    I pattern letterali sono compilati in un'unica espressione a trie
+    (i prefissi comuni sono condivisi, come negli stati di un automa
+    Aho-Corasick) eseguita dal motore re sul testo già convertito in
+    minuscolo; i pattern con metacaratteri regex finiscono in
+    un'alternanza combinata che seleziona le righe candidate, verificate
+    poi pattern per pattern. Il costo è una lettura dei dati qualunque sia
+    il numero di pattern.
+    
+    Dopo feed()/scan_file(): counts (righe per categoria), pattern_counts
+    (righe per pattern), pattern_sources (origini con almeno una riga per
+    pattern) e samples (prime righe per categoria, con origine). Con
+    templates=True le righe corrispondenti sono raggruppate anche in
+    template (LogTemplates), uno per origine in templates.
+    """
+    
+    REGEX_CHARS = re.compile(r'[.^$*+?{}\[\]\\|()]')
+    BLOCK_SIZE = 4 * 1024 * 1024
+    
+    def __init__(self, categories: Dict[str, List[str]], max_samples: int = 5, templates: bool = False):
+        self.categories = categories
+        self.max_samples = max_samples
+        self.templates = {} if templates else None
+        self.counts = {category: 0 for category in categories}
+        self.pattern_counts = {}
+        self.pattern_sources = {}
+        self.samples = {category: [] for category in categories}
+        self.lines = 0
+        
+        # Pattern -> categorie che lo contengono
+        self._owners = {}
+        for category, patterns in categories.items():
+            for pattern in patterns:
+                self._owners.setdefault(pattern, []).append(category)
+                self.pattern_counts[pattern] = 0
+                self.pattern_sources[pattern] = set()
+        # Letterale in minuscolo -> pattern originali (la ricerca ignora le maiuscole)
+        self._literals = {}
+        self._regexes = []
+        for pattern in self._owners:
+            if self.REGEX_CHARS.search(pattern):
+                self._regexes.append(pattern)
+            else:
+                self._literals.setdefault(pattern.lower(), []).append(pattern)
+        # La regex a trie restituisce il letterale più lungo in ogni posizione:
+        # i letterali che ne sono prefisso vanno riportati insieme a lui
+        self._outputs = {
+            literal: [pattern for other, patterns in self._literals.items() if literal.startswith(other)
+                      for pattern in patterns]
+            for literal in self._literals
+        }
+        self._compiled = {}
     
     @staticmethod
-    def run_command(cmd: str, capture_output: bool = True) -> Tuple[int, str, str]:
-        """Esegue un comando e restituisce il risultato"""
+    def trie_pattern(literals: List[str]) -> str:
+        """Espressione regolare equivalente all'alternanza dei letterali, con prefissi condivisi"""
+        root = {}
+        for literal in literals:
+            node = root
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def build(node):
+            final = '' in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return f'(?:{body})?' if final else body
+        
+        return build(root)
+    
+    def _patterns(self, binary: bool):
+        """Espressioni compilate per testo str o bytes"""
+        if binary not in self._compiled:
+            encode = (lambda text: text.encode('utf-8')) if binary else (lambda text: text)
+            literal = re.compile(encode(self.trie_pattern(list(self._literals)))) if self._literals else None
+            combined = single = None
+            if self._regexes:
+                combined = re.compile(encode('|'.join(f'(?:{pattern})' for pattern in self._regexes)), re.IGNORECASE)
+                single = [(pattern, re.compile(encode(pattern), re.IGNORECASE)) for pattern in self._regexes]
+            self._compiled[binary] = (literal, combined, single)
+        return self._compiled[binary]
+    
+    def _record(self, line, matched: set, source: Optional[str]):
+        if self.templates is not None:
+            if source not in self.templates:
+                self.templates[source] = LogTemplates()
+            self.templates[source].add(line.decode('utf-8', 'replace') if isinstance(line, bytes) else line)
+        categories = set()
+        for pattern in matched:
+            self.pattern_counts[pattern] += 1
+            self.pattern_sources[pattern].add(source)
+            categories.update(self._owners[pattern])
+        for category in categories:
+            self.counts[category] += 1
+            if len(self.samples[category]) < self.max_samples:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8', 'replace')
+                self.samples[category].append((source, line.strip()))
+    
+    def _find_literals(self, literal, lowered, offset: int, newline, binary: bool, found: Dict[int, set]):
+        """Registra in found (inizio riga + offset -> pattern) i letterali trovati nel testo in minuscolo"""
+        position = 0
+        while True:
+            # Ripartendo dal carattere successivo all'inizio si trovano anche
+            # i letterali sovrapposti (ad esempio "error" dentro "fatal error")
+            match = literal.search(lowered, position)
+            if match is None:
+                break
+            text = match.group(0)
+            line_start = offset + lowered.rfind(newline, 0, match.start()) + 1
+            found.setdefault(line_start, set()).update(self._outputs[text.decode('utf-8') if binary else text])
+            position = match.start() + 1
+    
+    def feed(self, block, source: Optional[str] = None):
+        """Analizza un blocco (str o bytes) di righe complete"""
+        binary = isinstance(block, bytes)
+        newline = b'\n' if binary else '\n'
+        literal, combined, single = self._patterns(binary)
+        self.lines += block.count(newline) + (0 if block.endswith(newline) or not block else 1)
+        
+        # Pattern trovati per riga, indicizzati dall'inizio della riga
+        found = {}
+        if literal is not None:
+            lowered = block.lower()
+            if len(lowered) == len(block):
+                self._find_literals(literal, lowered, 0, newline, binary, found)
+            else:
+                # str.lower() può cambiare la lunghezza (ad esempio 'İ'): gli offset del testo
+                # in minuscolo non valgono per il blocco, si procede riga per riga
+                line_start = 0
+                for line in block.split(newline):
+                    self._find_literals(literal, line.lower(), line_start, newline, binary, found)
+                    line_start += len(line) + 1
+        if combined is not None:
+            position = 0
+            while True:
+                match = combined.search(block, position)
+                if match is None:
+                    break
+                line_start = block.rfind(newline, 0, match.start()) + 1
+                line_end = block.find(newline, match.start())
+                line_end = len(block) if line_end < 0 else line_end
+                line = block[line_start:line_end]
+                found.setdefault(line_start, set()).update(
+                    pattern for pattern, regex in single if regex.search(line))
+                position = line_end + 1
+        
+        for line_start in sorted(found):
+            line_end = block.find(newline, line_start)
+            self._record(block[line_start:line_end if line_end >= 0 else len(block)], found[line_start], source)
+    
+    def feed_lines(self, lines, source: Optional[str] = None, batch: int = 5000):
+        """Analizza un iterabile di righe (ad esempio uno stream di comando) a blocchi"""
+        pending = []
+        for line in lines:
+            pending.append(line)
+            if len(pending) >= batch:
+                self.feed('\n'.join(pending), source)
+                pending = []
+        if pending:
+            self.feed('\n'.join(pending), source)
+    
+    def scan_file(self, path: str):
+        """Legge il file (anche compresso) a blocchi di BLOCK_SIZE terminati a fine riga"""
         try:
-            result = subprocess.run(
-                cmd, 
-                shell=True, 
-                capture_output=capture_output,
-                text=True,
-                timeout=30
-            )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return -1, "", "Command timed out"
-        except Exception as e:
-            return -1, "", str(e)
+            with LogSearch.open_log(path) as f:
+                remainder = b''
+                while True:
+                    data = f.read(self.BLOCK_SIZE)
+                    if not data:
+                        break
+                    data = remainder + data
+                    cut = data.rfind(b'\n') + 1
+                    if cut == 0:
+                        remainder = data
+                        continue
+                    remainder = data[cut:]
+                    self.feed(data[:cut], path)
+                if remainder:
+                    self.feed(remainder, path)
+        except LogSearch.READ_ERRORS:
+            pass
     
-    @staticmethod
-    def check_root():
-        """Verifica se il tool è eseguito come root"""
-        return os.geteuid() == 0
+    def merge(self, other: 'MultiPatternMatcher'):
+        """Somma i risultati di un altro matcher con le stesse categorie"""
+        self.lines += other.lines
+        for category, count in other.counts.items():
+            self.counts[category] += count
+            free = self.max_samples - len(self.samples[category])
+            self.samples[category].extend(other.samples[category][:max(free, 0)])
+        for pattern, count in other.pattern_counts.items():
+            self.pattern_counts[pattern] += count
+            self.pattern_sources[pattern].update(other.pattern_sources[pattern])
+        if self.templates is not None and other.templates:
+            self.templates.update(other.templates)
     
     @staticmethod
-    def get_system_overview():
-        """Restituisce una panoramica del sistema"""
-        overview = {}
+    def _scan_one(categories: Dict[str, List[str]], max_samples: int, templates: bool,
+                  path: str) -> 'MultiPatternMatcher':
+        matcher = MultiPatternMatcher(categories, max_samples, templates)
+        matcher.scan_file(path)
+        matcher._compiled = {}
+        return matcher
+    
+    def scan_files(self, paths: List[str], workers: Optional[int] = None):
+        """Analizza i file dal più recente; i compressi sono decompressi in processi separati"""
+        paths = LogSearch.by_age([path for path in paths if LogSearch.is_searchable(path)])
+        compressed = [path for path in paths if path.endswith(LogManager.COMPRESSED_SUFFIXES)]
+        workers = workers or os.cpu_count() or 1
+        if not compressed or workers == 1:
+            for path in paths:
+                self.scan_file(path)
+            return
         
-        # Sistema operativo
-        ret, out, _ = SystemInfo.run_command("cat /etc/os-release")
-        if ret == 0:
-            for line in out.split('\n'):
-                if line.startswith('PRETTY_NAME='):
-                    overview['os'] = line.split('=')[1].strip('"')
+        with ProcessPoolExecutor(max_workers=min(workers, len(compressed))) as executor:
+            futures = {path: executor.submit(MultiPatternMatcher._scan_one, self.categories, self.max_samples,
+                                             self.templates is not None, path)
+                       for path in compressed}
+            # I file non compressi si analizzano qui nel frattempo; l'unione segue l'ordine per età
+            for path in paths:
+                if path in futures:
+                    self.merge(futures[path].result())
+                else:
+                    self.scan_file(path)
+
+class LogCursors:
+    """Cursori persistenti sui file di log: ogni analisi legge solo i byte aggiunti
+    
+    Per ogni file, identificato da device:inode (il cursore segue quindi il
+    file anche dopo la rinomina di logrotate), si conservano l'offset della
+    prima riga non ancora letta, un'impronta crc32 dei primi byte e le righe
+    per categoria di MultiPatternMatcher, in totale e per ora. Un file più
+    corto dell'offset, o con l'impronta cambiata, è stato troncato o
+    riscritto e viene riletto dall'inizio; i conteggi già fatti restano.
+    
+    L'ora di un blocco di BLOCK_SIZE byte è quella dell'ultima riga con
+    timestamp riconosciuto (LogTimestamps), altrimenti la data di modifica
+    del file. Con templates > 0 ogni cursore conserva anche fino a quel
+    numero di template (LogTemplates) delle righe corrispondenti. I dati
+    orari sono conservati per RETENTION secondi. I file
+    compressi sono esclusi, e le rotazioni con inode nuovo (copytruncate)
+    sono saltate se l'archivio esiste già: sono copie di dati già contati
+    sul file attivo. Un cambio delle categorie invalida l'archivio.
+    """
+    
+    VERSION = 1
+    BLOCK_SIZE = 1024 * 1024
+    # Oltre questa lunghezza una riga senza a capo viene analizzata a pezzi
+    MAX_LINE_BYTES = 64 * 1024
+    FINGERPRINT_BYTES = 256
+    RETENTION = 7 * 86400
+    
+    def __init__(self, categories: Dict[str, List[str]], path: Optional[str] = None, templates: int = 0):
+        self.categories = categories
+        self.signature = json.dumps(categories, sort_keys=True)
+        self.templates = templates
+        self.path = path
+        self.cursors = {}
+        if path:
+            self.load()
+    
+    @staticmethod
+    def default_path(name: str) -> Optional[str]:
+        try:
+            return os.path.join(SystemInfo.get_state_dir(), f'log_cursors_{name}.json')
+        except OSError:
+            return None
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION and data.get('signature') == self.signature:
+            self.cursors = data.get('cursors', {})
+    
+    def save(self):
+        """Scrittura atomica: un file temporaneo rinominato sopra il precedente"""
+        if not self.path:
+            return
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump({'version': self.VERSION, 'signature': self.signature, 'cursors': self.cursors}, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _fingerprint(f, length: int) -> int:
+        f.seek(0)
+        return zlib.crc32(f.read(length))
+    
+    @staticmethod
+    def _hour(block: bytes, fmt: str, mtime: float) -> str:
+        """Inizio dell'ora dell'ultima riga datata del blocco, come chiave JSON"""
+        moment = None
+        if fmt:
+            end = len(block) - 1
+            for _ in range(5):
+                start = block.rfind(b'\n', 0, end) + 1
+                line = block[start:start + 2 * LogTimestamps.PREFIX].decode('utf-8', 'replace')
+                moment = LogTimestamps.parse_near(line, fmt, mtime)
+                if moment is not None:
                     break
-        
-        # Uptime
-        ret, out, _ = SystemInfo.run_command("uptime -p")
-        if ret == 0:
-            overview['uptime'] = out.strip()
-        
-        # Memoria
-        ret, out, _ = SystemInfo.run_command("free -h")
-        if ret == 0:
-            lines = out.split('\n')[1].split()
-            overview['memory_total'] = lines[1]
-            overview['memory_used'] = lines[2]
-            overview['memory_available'] = lines[6]
-        
-        # Spazio disco
-        ret, out, _ = SystemInfo.run_command("df -h / | tail -1")
-        if ret == 0:
-            parts = out.split()
-            overview['disk_total'] = parts[1]
-            overview['disk_used'] = parts[2]
-            overview['disk_available'] = parts[3]
-            overview['disk_usage'] = parts[4]
-        
-        # Load average
-        ret, out, _ = SystemInfo.run_command("cat /proc/loadavg")
-        if ret == 0:
-            overview['load_avg'] = out.split()[0:3]
-        
-        return overview
+                if start == 0:
+                    break
+                end = start - 1
+        if moment is None:
+            moment = mtime
+        return str(int(moment // 3600 * 3600))
+    
+    def _scan(self, f, cursor: Dict, mtime: float) -> int:
+        """Analizza le righe complete dopo l'offset; restituisce i byte consumati"""
+        matcher = MultiPatternMatcher(self.categories, max_samples=0, templates=bool(self.templates))
+        if self.templates:
+            matcher.templates[cursor['path']] = LogTemplates.from_state(cursor.get('templates'), self.templates)
+        f.seek(cursor['offset'])
+        consumed = 0
+        remainder = b''
+        while True:
+            data = f.read(self.BLOCK_SIZE)
+            if not data:
+                break
+            data = remainder + data
+            cut = data.rfind(b'\n') + 1
+            if len(data) - cut > self.MAX_LINE_BYTES:
+                # Riga senza a capo troppo lunga: analizzata così com'è invece di accumularla
+                cut = len(data)
+            if cut == 0:
+                remainder = data
+                continue
+            block, remainder = data[:cut], data[cut:]
+            if cursor['format'] is None:
+                sample = block[:LogTimestamps.SAMPLE_BYTES].decode('utf-8', 'replace').split('\n')[:50]
+                cursor['format'] = LogTimestamps.detect(sample) or ''
+            before = dict(matcher.counts)
+            matcher.feed(block, cursor['path'])
+            bucket = cursor['hourly'].setdefault(self._hour(block, cursor['format'], mtime), {})
+            for category, count in matcher.counts.items():
+                if count > before[category]:
+                    bucket[category] = bucket.get(category, 0) + count - before[category]
+            consumed += cut
+        # Una riga finale senza a capo è ancora in scrittura: verrà letta al prossimo giro
+        cursor['offset'] += consumed
+        cursor['lines'] += matcher.lines
+        if self.templates:
+            cursor['templates'] = matcher.templates[cursor['path']].state()
+        for category, count in matcher.counts.items():
+            cursor['counts'][category] = cursor['counts'].get(category, 0) + count
+        return consumed
+    
+    def update(self, paths: List[str], now: Optional[float] = None) -> Dict[str, int]:
+        """Porta i cursori dei file indicati alla fine; restituisce file letti, byte e riavvii"""
+        now = now if now is not None else time.time()
+        stats = {'files': 0, 'bytes': 0, 'restarted': 0}
+        seen = set()
+        known = bool(self.cursors)
+        for path in paths:
+            if path.endswith(LogManager.COMPRESSED_SUFFIXES):
+                continue
+            try:
+                f = open(path, 'rb')
+            except OSError:
+                continue
+            with f:
+                try:
+                    info = os.fstat(f.fileno())
+                    key = f"{info.st_dev}:{info.st_ino}"
+                    seen.add(key)
+                    cursor = self.cursors.get(key)
+                    if cursor is not None:
+                        length, crc = cursor['fingerprint']
+                        if info.st_size < cursor['offset'] or info.st_size < length or \
+                                self._fingerprint(f, length) != crc:
+                            cursor['offset'] = 0
+                            cursor['format'] = None
+                            stats['restarted'] += 1
+                    else:
+                        cursor = self.cursors[key] = {'path': path, 'offset': 0, 'fingerprint': [0, 0], 'format': None,
+                                                      'lines': 0, 'counts': {}, 'hourly': {}}
+                        classified = LogManager.classify_log_name(os.path.basename(path))
+                        if known and classified and classified[1]:
+                            # Rotazione nuova con copytruncate: il contenuto è già stato
+                            # contato sul file originale
+                            cursor['offset'] = info.st_size
+                    cursor['path'] = path
+                    cursor['updated'] = now
+                    if info.st_size > cursor['offset']:
+                        stats['bytes'] += self._scan(f, cursor, info.st_mtime)
+                        stats['files'] += 1
+                    if cursor['fingerprint'][0] < self.FINGERPRINT_BYTES:
+                        length = min(info.st_size, self.FINGERPRINT_BYTES)
+                        cursor['fingerprint'] = [length, self._fingerprint(f, length)]
+                except OSError:
+                    continue
+        
+        # Storico orario e cursori di file spariti oltre il periodo di conservazione
+        horizon = now - self.RETENTION
+        for key in list(self.cursors):
+            cursor = self.cursors[key]
+            if key not in seen and cursor.get('updated', 0) < horizon:
+                del self.cursors[key]
+                continue
+            for hour in [hour for hour in cursor['hourly'] if int(hour) + 3600 <= horizon]:
+                del cursor['hourly'][hour]
+        return stats
+    
+    def totals(self, since: Optional[float] = None) -> Tuple[Dict[str, int], Dict[str, set]]:
+        """Righe per categoria e file con almeno una riga, nelle ore successive a since"""
+        counts = {category: 0 for category in self.categories}
+        sources = {category: set() for category in self.categories}
+        for cursor in self.cursors.values():
+            for hour, bucket in cursor['hourly'].items():
+                if since is not None and int(hour) + 3600 <= since:
+                    continue
+                for category, count in bucket.items():
+                    if category in counts:
+                        counts[category] += count
+                        sources[category].add(cursor['path'])
+        return counts, sources
+    
+    def file_templates(self) -> Dict[str, 'LogTemplates']:
+        """Template conservati per file"""
+        return {cursor['path']: LogTemplates.from_state(cursor['templates'], self.templates)
+                for cursor in self.cursors.values() if cursor.get('templates')}
+    
+    def hourly(self, hours: int = 24, now: Optional[float] = None) -> Dict[str, List[int]]:
+        """Righe per categoria in ciascuna delle ultime hours ore, dalla più vecchia"""
+        now = now if now is not None else time.time()
+        current = int(now // 3600 * 3600)
+        series = {category: [0] * hours for category in self.categories}
+        for cursor in self.cursors.values():
+            for hour, bucket in cursor['hourly'].items():
+                index = hours - 1 - (current - int(hour)) // 3600
+                if 0 <= index < hours:
+                    for category, count in bucket.items():
+                        if category in series:
+                            series[category][index] += count
+        return series
+
+class LogFollower:
+    """Follow in-process di più file di log, come tail -F
+    
+    Le directory dei file seguiti sono osservate con inotify (tramite
+    ctypes): il processo resta fermo in select() finché un file non
+    cambia, quindi a riposo non consuma CPU. Se inotify non è disponibile
+    (kernel, limiti di watch, filesystem di rete) si ricade sul polling
+    ogni POLL_INTERVAL secondi; in ogni caso un controllo completo ogni
+    SWEEP_INTERVAL secondi recupera eventi persi.
+    
+    La rotazione (rinomina e nuovo file con lo stesso nome) si riconosce
+    dal cambio di device:inode: il vecchio file viene letto fino alla fine
+    prima di passare al nuovo, letto dall'inizio. Un file più corto
+    dell'offset letto è stato troncato (copytruncate) e si riparte da zero.
+    
+    poll() restituisce blocchi di righe complete per file, al massimo
+    MAX_BATCH byte per file e chiamata: durante un picco il resto viene
+    letto alle chiamate successive senza attendere nuovi eventi. In
+    files[path] restano i contatori lines, bytes, rotations e truncations;
+    in notices le rotazioni e i troncamenti da segnalare.
+    """
+    
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')
+    
+    READ_SIZE = 1024 * 1024
+    MAX_BATCH = 8 * 1024 * 1024
+    MAX_LINE_BYTES = 64 * 1024
+    POLL_INTERVAL = 0.5
+    SWEEP_INTERVAL = 5.0
+    
+    def __init__(self, paths: List[str], from_end: bool = True, use_inotify: bool = True):
+        self.files = {}
+        self.notices = []
+        self._pending = set()
+        self._watches = {}
+        self._inotify = None
+        self._last_sweep = time.monotonic()
+        for path in dict.fromkeys(os.path.abspath(path) for path in paths):
+            self.files[path] = {'file': None, 'device': None, 'inode': None, 'offset': 0, 'partial': b'',
+                                'lines': 0, 'bytes': 0, 'rotations': 0, 'truncations': 0}
+            self._open(path, from_end)
+        if use_inotify:
+            self._inotify = self._start_inotify()
+    
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify is not None else 'polling'
+    
+    def _start_inotify(self) -> Optional[int]:
+        """Descrittore inotify con un watch per directory, None se non disponibile"""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+            init = libc.inotify_init1
+            add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+        add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = init(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            return None
+        for directory in dict.fromkeys(os.path.dirname(path) for path in self.files):
+            wd = add_watch(fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                # Ad esempio max_user_watches esaurito: tutto in polling
+                os.close(fd)
+                return None
+            self._watches[wd] = directory
+        return fd
+    
+    def _open(self, path: str, from_end: bool = False):
+        state = self.files[path]
+        try:
+            f = open(path, 'rb', buffering=0)
+        except OSError:
+            return
+        info = os.fstat(f.fileno())
+        state.update(file=f, device=info.st_dev, inode=info.st_ino, partial=b'',
+                     offset=info.st_size if from_end else 0)
+        f.seek(state['offset'])
+    
+    def _close(self, path: str):
+        state = self.files[path]
+        if state['file'] is not None:
+            state['file'].close()
+            state['file'] = None
+    
+    def _read_events(self):
+        """Segna come da leggere i file citati negli eventi inotify in coda"""
+        while True:
+            try:
+                buffer = os.read(self._inotify, 64 * 1024)
+            except BlockingIOError:
+                return
+            except OSError:
+                return
+            if not buffer:
+                return
+            position = 0
+            while position + self.EVENT.size <= len(buffer):
+                wd, mask, _, length = self.EVENT.unpack_from(buffer, position)
+                name = buffer[position + self.EVENT.size:position + self.EVENT.size + length].rstrip(b'\0')
+                position += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    self._pending.update(self.files)
+                elif wd in self._watches and name:
+                    path = os.path.join(self._watches[wd], os.fsdecode(name))
+                    if path in self.files:
+                        self._pending.add(path)
+    
+    def _check(self, path: str) -> bytes:
+        """Legge i byte nuovi di un file gestendo rotazione e troncamento; restituisce righe complete"""
+        state = self.files[path]
+        if state['file'] is None:
+            self._open(path)
+            if state['file'] is None:
+                return b''
+        try:
+            info = os.stat(path)
+        except OSError:
+            # Rinominato o cancellato e non ancora ricreato: si finisce di leggere il vecchio
+            info = None
+        
+        f = state['file']
+        if os.fstat(f.fileno()).st_size < state['offset']:
+            f.seek(0)
+            state['offset'] = 0
+            state['partial'] = b''
+            state['truncations'] += 1
+            self.notices.append((path, 'truncated'))
+        
+        chunks = []
+        read = 0
+        while read < self.MAX_BATCH:
+            data = f.read(self.READ_SIZE)
+            if not data:
+                break
+            chunks.append(data)
+            read += len(data)
+        state['offset'] += read
+        state['bytes'] += read
+        data = state['partial'] + b''.join(chunks)
+        
+        if read >= self.MAX_BATCH:
+            self._pending.add(path)
+        elif info is not None and (info.st_dev, info.st_ino) != (state['device'], state['inode']):
+            # Vecchio file letto fino in fondo: l'ultima riga incompleta è comunque una riga
+            if data and not data.endswith(b'\n'):
+                data += b'\n'
+            self._close(path)
+            self._open(path)
+            state['rotations'] += 1
+            self.notices.append((path, 'rotated'))
+            self._pending.add(path)
+        
+        cut = data.rfind(b'\n') + 1
+        if len(data) - cut > self.MAX_LINE_BYTES:
+            # Riga senza fine troppo lunga: viene restituita così com'è
+            data += b'\n'
+            cut = len(data)
+        state['partial'] = data[cut:]
+        block = data[:cut]
+        state['lines'] += block.count(b'\n')
+        return block
+    
+    def poll(self, timeout: float = 1.0) -> List[Tuple[str, bytes]]:
+        """Attende al massimo timeout secondi e restituisce (percorso, righe nuove) per file"""
+        if not self._pending:
+            if self._inotify is not None:
+                try:
+                    ready, _, _ = select.select([self._inotify], [], [], timeout)
+                except InterruptedError:
+                    ready = []
+                if ready:
+                    self._read_events()
+            else:
+                time.sleep(min(timeout, self.POLL_INTERVAL))
+                self._pending.update(self.files)
+        if time.monotonic() - self._last_sweep >= self.SWEEP_INTERVAL:
+            self._last_sweep = time.monotonic()
+            self._pending.update(self.files)
+        
+        results = []
+        for path in [path for path in self.files if path in self._pending]:
+            self._pending.discard(path)
+            try:
+                block = self._check(path)
+            except OSError:
+                self._close(path)
+                continue
+            if block:
+                results.append((path, block))
+        return results
+    
+    def close(self):
+        for path in self.files:
+            self._close(path)
+        if self._inotify is not None:
+            os.close(self._inotify)
+            self._inotify = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class LargestFiles:
+    """I file più grandi sotto una o più directory, in una sola visita con os.scandir
+    
+    Durante la visita si tiene uno heap di al più limit file (il più piccolo
+    in cima): la memoria non dipende dal numero di file e non si ordina mai
+    l'elenco completo. Per ogni file si riportano la dimensione apparente
+    (st_size) e lo spazio allocato (st_blocks da 512 byte, come du), che
+    decide la classifica: i file sparsi come lastlog non risultano enormi.
+    Si sommano anche file, directory e spazio totale, con i link fisici
+    contati una volta. Le sottodirectory di primo livello sono visitate in
+    parallelo da più thread.
+    
+    Con select (una funzione sul nome del file) nella stessa visita si tiene
+    un secondo heap dei soli file selezionati, che i file esclusi non
+    possono far uscire dalla classifica, e per ogni soglia di thresholds il
+    numero esatto di file selezionati che la superano.
+    """
+    
+    LIMIT = 100
+    
+    def __init__(self, limit: Optional[int] = None, select: Optional[Callable[[str], object]] = None,
+                 thresholds: Tuple[int, ...] = ()):
+        self.limit = limit or self.LIMIT
+        self.select = select
+        self.thresholds = tuple(thresholds)
+        self.over = dict.fromkeys(self.thresholds, 0)
+        self.files = 0
+        self.directories = 0
+        self.apparent = 0
+        self.allocated = 0
+        self.errors = 0
+        self._top = []
+        self._selected = []
+        # Inode con più link fisici già contati, condivisi tra i thread
+        self._links = set()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _push(heap: List, item: Tuple, limit: int):
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    
+    def _walk(self, top: str, descend: bool = True):
+        """Visita top: (heap, heap dei selezionati, contatori, file oltre le soglie, sottodirectory non visitate)"""
+        heap, selected = [], []
+        over = [0] * len(self.thresholds)
+        files = directories = apparent = allocated = errors = 0
+        pending = [top]
+        skipped = []
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    directories += 1
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                (pending if descend else skipped).append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            info = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            errors += 1
+                            continue
+                        if info.st_nlink > 1:
+                            key = (info.st_dev, info.st_ino)
+                            with self._lock:
+                                if key in self._links:
+                                    continue
+                                self._links.add(key)
+                        used = info.st_blocks * 512
+                        files += 1
+                        apparent += info.st_size
+                        allocated += used
+                        item = (used, info.st_size, entry.path, info.st_mtime)
+                        self._push(heap, item, self.limit)
+                        if self.select is not None and self.select(entry.name):
+                            self._push(selected, item, self.limit)
+                            for index, threshold in enumerate(self.thresholds):
+                                if used >= threshold:
+                                    over[index] += 1
+            except OSError:
+                errors += 1
+        return heap, selected, (files, directories, apparent, allocated, errors), over, skipped
+    
+    def _merge(self, heap, selected, counters, over):
+        self._top = heapq.nlargest(self.limit, self._top + heap)
+        self._selected = heapq.nlargest(self.limit, self._selected + selected)
+        for threshold, count in zip(self.thresholds, over):
+            self.over[threshold] += count
+        self.files += counters[0]
+        self.directories += counters[1]
+        self.apparent += counters[2]
+        self.allocated += counters[3]
+        self.errors += counters[4]
+    
+    def scan(self, roots: List[str]) -> 'LargestFiles':
+        """Visita le radici (quelle contenute in un'altra radice sono ignorate)"""
+        roots = [os.path.realpath(root) for root in roots]
+        roots = [root for root in dict.fromkeys(roots)
+                 if not any(root.startswith(other.rstrip(os.sep) + os.sep) for other in roots)]
+        subdirs = []
+        for root in roots:
+            *result, skipped = self._walk(root, descend=False)
+            self._merge(*result)
+            subdirs.extend(skipped)
+        if subdirs:
+            with ThreadPoolExecutor(max_workers=min(len(subdirs), SystemInfo.MAX_PARALLEL_COMMANDS)) as executor:
+                for *result, _ in executor.map(self._walk, subdirs):
+                    self._merge(*result)
+        return self
+    
+    def largest(self, count: Optional[int] = None, min_allocated: int = 0, selected: bool = False) -> List[Dict]:
+        """File dal più grande per spazio allocato, almeno min_allocated byte (solo i selezionati se selected)"""
+        top = self._selected if selected else self._top
+        return [{'path': path, 'size': size, 'allocated': used, 'mtime': mtime}
+                for used, size, path, mtime in top[:count] if used >= min_allocated]
+
+class DDSketch:
+    """Quantili in streaming con errore relativo garantito (DDSketch)
+    
+    Ogni valore positivo finisce nel bucket ceil(log_gamma(v)), con
+    gamma = (1 + a) / (1 - a): il quantile restituito dista al più a (in
+    proporzione) da quello esatto. I bucket sono al più max_buckets (oltre
+    si fondono i più bassi, sacrificando la precisione dei quantili minori)
+    e due sketch con la stessa accuratezza si fondono sommando i bucket.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.bins = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+    
+    def add(self, value: float, count: int = 1):
+        self.count += count
+        self.total += value * count
+        if value <= 1e-9:
+            self.zeros += count
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_buckets:
+            self._collapse()
+    
+    def _collapse(self):
+        lowest = sorted(self.bins)[:len(self.bins) - self.max_buckets + 1]
+        target = lowest[-1]
+        for key in lowest[:-1]:
+            self.bins[target] += self.bins.pop(key)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+    
+    def merge(self, other: 'DDSketch'):
+        self.count += other.count
+        self.total += other.total
+        self.zeros += other.zeros
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_buckets:
+            self._collapse()
+
+
+class HeavyHitters:
+    """Elementi più frequenti con count-min sketch e una classifica top-k
+    
+    Il count-min sketch (depth righe da width contatori) stima la frequenza
+    di qualunque elemento per eccesso con memoria fissa (conservative
+    update per ridurre la sovrastima); la classifica
+    conserva i k elementi con la stima più alta. L'hash a 64 bit (blake2b)
+    è stabile tra processi, quindi gli sketch sono fondibili.
+    """
+    
+    def __init__(self, k: int = 20, width: int = 4096, depth: int = 4):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.tables = [array('Q', bytes(8 * width)) for _ in range(depth)]
+        self.candidates = {}
+        self._floor = 0
+    
+    @staticmethod
+    def hash64(item: str) -> int:
+        return int.from_bytes(hashlib.blake2b(item.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'little')
+    
+    def _cells(self, hashed: int):
+        low, high = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        return [(low + row * high) % self.width for row in range(self.depth)]
+    
+    def estimate(self, item: str, hashed: Optional[int] = None) -> int:
+        cells = self._cells(hashed if hashed is not None else self.hash64(item))
+        return min(table[cell] for table, cell in zip(self.tables, cells))
+    
+    def add(self, item: str, count: int = 1, hashed: Optional[int] = None):
+        cells = self._cells(hashed if hashed is not None else self.hash64(item))
+        # Conservative update: si alzano solo i contatori sotto la nuova stima
+        estimate = min(table[cell] for table, cell in zip(self.tables, cells)) + count
+        for table, cell in zip(self.tables, cells):
+            if table[cell] < estimate:
+                table[cell] = estimate
+        if item in self.candidates or len(self.candidates) < self.k:
+            self.candidates[item] = estimate
+        elif estimate > self._floor:
+            del self.candidates[min(self.candidates, key=self.candidates.get)]
+            self.candidates[item] = estimate
+        else:
+            return
+        if len(self.candidates) >= self.k:
+            self._floor = min(self.candidates.values())
+    
+    def top(self, count: Optional[int] = None) -> List[Tuple[str, int]]:
+        return sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)[:count]
+    
+    def merge(self, other: 'HeavyHitters'):
+        for table, others in zip(self.tables, other.tables):
+            for cell, value in enumerate(others):
+                if value:
+                    table[cell] += value
+        items = set(self.candidates) | set(other.candidates)
+        estimates = {item: self.estimate(item) for item in items}
+        self.candidates = dict(heapq.nlargest(self.k, estimates.items(), key=lambda item: item[1]))
+        self._floor = min(self.candidates.values()) if len(self.candidates) >= self.k else 0
+
+
+class HyperLogLog:
+    """Stima della cardinalità (elementi distinti) con 2^precision registri da un byte
+    
+    Errore standard circa 1.04 / sqrt(2^precision), 0.8% con la precisione
+    predefinita in 16 KB; per cardinalità piccole si usa il linear counting.
+    """
+    
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def add_hash(self, hashed: int):
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def add(self, item: str):
+        self.add_hash(HeavyHitters.hash64(item))
+    
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    
+    def merge(self, other: 'HyperLogLog'):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+
+class AccessLogAnalyzer:
+    """Statistiche in streaming sui log di accesso web (Common e Combined Log Format)
+    
+    Le righe sono divise con str.find/split invece che con una regex. Per
+    ogni richiesta si aggiornano: conteggi per codice di stato, DDSketch di
+    dimensione della risposta e, se presente, della latenza (ultimo campo
+    dopo lo user agent), HeavyHitters di URL
+    (senza query string) e client, HyperLogLog dei client distinti e le
+    richieste per secondo degli ultimi RATE_WINDOW secondi del log. La
+    memoria è costante qualunque sia il numero di righe; due analizzatori
+    si fondono con merge().
+    
+    Un intero in fondo alla riga può essere una latenza (%D di Apache) ma
+    anche un conteggio di byte (%I %O di combinedio): senza latency si
+    legge solo un decimale, in secondi come $request_time di nginx; con
+    latency (una chiave di LATENCY_UNITS) l'ultimo campo è sempre la
+    latenza in quell'unità.
+    """
+    
+    RATE_WINDOW = 60
+    MAX_URL = 200
+    # Millisecondi per unità della latenza configurata
+    LATENCY_UNITS = {'s': 1000.0, 'ms': 1.0, 'us': 0.001}
+    
+    def __init__(self, top: int = 10, latency: Optional[str] = None):
+        self.latency_scale = self.LATENCY_UNITS[latency] if latency else None
+        self.requests = 0
+        self.unparsed = 0
+        self.bytes = 0
+        self.statuses = {}
+        self.sizes = DDSketch()
+        self.latencies = DDSketch()
+        self.urls = HeavyHitters(top)
+        self.clients = HeavyHitters(top)
+        self.unique_clients = HyperLogLog()
+        self.first = None
+        self.last = None
+        self.seconds = deque(maxlen=self.RATE_WINDOW)
+        self._clock = (None, None)
+    
+    def _time(self, text: str) -> Optional[float]:
+        # Le righe dello stesso secondo condividono il testo del timestamp
+        if text != self._clock[0]:
+            self._clock = (text, LogTimestamps.parse(f'[{text}]', 'clf'))
+        return self._clock[1]
+    
+    def _add_line(self, line: str, urls: Dict[str, int], clients: Dict[str, int]):
+        space = line.find(' ')
+        opening = line.find('[', space)
+        closing = line.find(']', opening)
+        quote = line.find('"', closing)
+        end_quote = line.find('"', quote + 1)
+        if space <= 0 or min(opening, closing, quote, end_quote) < 0:
+            self.unparsed += 1
+            return
+        fields = line[end_quote + 1:].split(None, 2)
+        if len(fields) < 2 or len(fields[0]) != 3 or not fields[0].isdigit():
+            self.unparsed += 1
+            return
+        client = line[:space]
+        request = line[quote + 1:end_quote].split(' ')
+        url = request[1] if len(request) > 1 else request[0]
+        url = url.split('?', 1)[0][:self.MAX_URL]
+        status = fields[0]
+        size = int(fields[1]) if fields[1].isdigit() else 0
+        
+        self.requests += 1
+        self.bytes += size
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.sizes.add(size)
+        urls[url] = urls.get(url, 0) + 1
+        clients[client] = clients.get(client, 0) + 1
+        
+        # Combined con campi aggiuntivi dopo lo user agent: l'ultimo può essere la latenza
+        if line.count('"', end_quote + 1) >= 4:
+            tail = line[line.rfind('"') + 1:].split()
+            if tail and (self.latency_scale is not None or '.' in tail[-1]):
+                try:
+                    self.latencies.add(float(tail[-1]) * (self.latency_scale or 1000.0))
+                except ValueError:
+                    pass
+        
+        moment = self._time(line[opening + 1:closing])
+        if moment is not None:
+            if self.first is None or moment < self.first:
+                self.first = moment
+            if self.last is None or moment > self.last:
+                self.last = moment
+            second = int(moment)
+            if self.seconds and self.seconds[-1][0] == second:
+                self.seconds[-1][1] += 1
+            elif not self.seconds or second > self.seconds[-1][0]:
+                self.seconds.append([second, 1])
+    
+    def feed(self, block):
+        """Analizza un blocco (str o bytes) di righe complete
+        
+        URL e client sono prima contati nel blocco, così gli sketch si
+        aggiornano una volta per valore distinto invece che per riga.
+        """
+        if isinstance(block, bytes):
+            block = block.decode('utf-8', 'replace')
+        urls, clients = {}, {}
+        for line in block.splitlines():
+            if line:
+                self._add_line(line, urls, clients)
+        for url, count in urls.items():
+            self.urls.add(url, count)
+        for client, count in clients.items():
+            hashed = HeavyHitters.hash64(client)
+            self.clients.add(client, count, hashed)
+            self.unique_clients.add_hash(hashed)
+    
+    def rate(self) -> float:
+        """Richieste al secondo negli ultimi RATE_WINDOW secondi di log"""
+        if not self.seconds:
+            return 0.0
+        span = self.seconds[-1][0] - self.seconds[0][0] + 1
+        return sum(count for _, count in self.seconds) / span
+    
+    def status_classes(self) -> Dict[str, int]:
+        classes = {}
+        for status, count in self.statuses.items():
+            classes[status[0] + 'xx'] = classes.get(status[0] + 'xx', 0) + count
+        return dict(sorted(classes.items()))
+    
+    def merge(self, other: 'AccessLogAnalyzer'):
+        self.requests += other.requests
+        self.unparsed += other.unparsed
+        self.bytes += other.bytes
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.sizes.merge(other.sizes)
+        self.latencies.merge(other.latencies)
+        self.urls.merge(other.urls)
+        self.clients.merge(other.clients)
+        self.unique_clients.merge(other.unique_clients)
+        for bound in ('first', 'last'):
+            values = [value for value in (getattr(self, bound), getattr(other, bound)) if value is not None]
+            if values:
+                setattr(self, bound, min(values) if bound == 'first' else max(values))
+
+class JournalAggregator:
+    """Aggregazione incrementale del journal per le schermate di audit
+    
+    Legge `journalctl -o json` limitato ai campi utili e alimenta in una
+    passata tutti i contatori: messaggi per priorità, per unità (o
+    identificatore syslog), sessioni aperte e utenti, tentativi di accesso
+    falliti, comandi sudo ed eventi critici, con le righe più recenti di
+    esempio per categoria e per sessioni, sudo e SSH. I pattern sono
+    letterali confrontati sul messaggio in minuscolo con un'unica regex a
+    trie (MultiPatternMatcher.trie_pattern).
+    
+    I contatori sono tenuti per minuto (BUCKET) e i totali coprono gli
+    ultimi window secondi. Con path lo stato (cursore dell'ultima voce,
+    bucket, righe recenti) è salvato su disco e ogni collect() legge solo
+    le voci successive al cursore. Il cursore è riletto insieme alle voci
+    nuove (--cursor è inclusivo): se la prima voce restituita non è la
+    sua, il journal è stato ruotato/svuotato (vacuum) o era volatile e il
+    sistema è stato riavviato; si riparte dalla posizione più vicina
+    saltando le voci non più recenti dell'ultima già contata. Il cambio di
+    boot è rilevato da /proc/sys/kernel/random/boot_id. Un cambio dei
+    pattern invalida lo stato.
+    """
+    
+    VERSION = 1
+    WINDOW = 24 * 3600
+    BUCKET = 60
+    PRIORITIES = ['emerg', 'alert', 'crit', 'err', 'warning', 'notice', 'info', 'debug']
+    AUTH_FAILURES = ["authentication failure", "failed login", "invalid user", "failed password"]
+    CRITICAL_EVENTS = {
+        "Kernel Panic": "kernel panic",
+        "Out of Memory": "out of memory",
+        "Disk Full": "no space left",
+        "Hardware Error": "hardware error",
+        "System Crash": "segmentation fault",
+        "Network Error": "network unreachable",
+        "Authentication Failure": "authentication failure",
+    }
+    SESSION_OPENED = "session opened"
+    SESSION_USER = re.compile(r'session opened for user ([^\s(]+)')
+    # Accessi SSH: da OpenSSH 9.8 le righe Accepted/Failed arrivano da sshd-session
+    SSH_UNITS = ('ssh.service', 'sshd.service')
+    # Campi richiesti a journalctl (__CURSOR e __REALTIME_TIMESTAMP sono sempre presenti)
+    FIELDS = ['PRIORITY', '_SYSTEMD_UNIT', 'SYSLOG_IDENTIFIER', '_COMM', '_PID', '_HOSTNAME', 'MESSAGE']
+    RECENT = 20
+    BOOT_ID = "/proc/sys/kernel/random/boot_id"
+    
+    def __init__(self, max_samples: int = 3, path: Optional[str] = None, window: float = WINDOW):
+        self.max_samples = max_samples
+        self.path = path
+        self.window = window
+        self.signature = json.dumps([self.AUTH_FAILURES, self.CRITICAL_EVENTS], sort_keys=True)
+        self.cursor = None
+        self.boot_id = None
+        self.last_realtime = 0  # µs dell'ultima voce contata
+        self.buckets = {}  # inizio del minuto -> {'p:err': n, 'u:unità': n, 'user:nome': n, 'e:evento': n}
+        self.samples = {name: deque(maxlen=max_samples) for name in self.AUTH_FAILURES + list(self.CRITICAL_EVENTS)}
+        self.sessions = deque(maxlen=self.RECENT)  # (timestamp, riga)
+        self.sudo_commands = deque(maxlen=self.RECENT)
+        self.ssh = deque(maxlen=self.RECENT)
+        self.notices = []  # 'boot', 'vacuumed', 'reset'
+        self.new_entries = 0
+        self.new_errors = 0
+        self.parsed = 0
+        self.returncode = None
+        self.error = None
+        self._reset_totals()
+        
+        patterns = {}
+        for name in self.AUTH_FAILURES:
+            patterns.setdefault(name, []).append(name)
+        for name, pattern in self.CRITICAL_EVENTS.items():
+            patterns.setdefault(pattern, []).append(name)
+        patterns.setdefault(self.SESSION_OPENED, [])
+        self._patterns = patterns
+        self._selector = re.compile(MultiPatternMatcher.trie_pattern(list(patterns)))
+        if path:
+            self.load()
+    
+    def _reset_totals(self):
+        self.entries = 0
+        self.first = None
+        self.last = None
+        self.priorities = dict.fromkeys(self.PRIORITIES, 0)
+        self.units = {}
+        self.users = {}
+        # auth_failures conta una volta le voci che corrispondono ad almeno un pattern di AUTH_FAILURES
+        self.events = dict.fromkeys(['sessions_opened', 'auth_failures', 'sudo'] + self.AUTH_FAILURES +
+                                    list(self.CRITICAL_EVENTS), 0)
+    
+    @staticmethod
+    def default_path(name: str) -> Optional[str]:
+        try:
+            return os.path.join(SystemInfo.get_state_dir(), f'journal_{name}.json')
+        except OSError:
+            return None
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.VERSION or data.get('signature') != self.signature:
+            return
+        self.cursor = data.get('cursor')
+        self.boot_id = data.get('boot_id')
+        self.last_realtime = data.get('last_realtime', 0)
+        self.buckets = {int(minute): counts for minute, counts in data.get('buckets', {}).items()}
+        for name, lines in data.get('samples', {}).items():
+            if name in self.samples:
+                self.samples[name].extend(tuple(line) for line in lines)
+        for name in ('sessions', 'sudo_commands', 'ssh'):
+            getattr(self, name).extend(tuple(line) for line in data.get(name, []))
+        self._rebuild()
+    
+    def save(self):
+        """Scrittura atomica: un file temporaneo rinominato sopra il precedente"""
+        if not self.path:
+            return
+        state = {
+            'version': self.VERSION, 'signature': self.signature, 'cursor': self.cursor,
+            'boot_id': self.boot_id, 'last_realtime': self.last_realtime,
+            'buckets': {str(minute): counts for minute, counts in self.buckets.items()},
+            'samples': {name: list(lines) for name, lines in self.samples.items()},
+            'sessions': list(self.sessions), 'sudo_commands': list(self.sudo_commands), 'ssh': list(self.ssh),
+        }
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'w') as f:
+                json.dump(state, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+    
+    def _rebuild(self):
+        """Ricalcola i totali dai bucket"""
+        self._reset_totals()
+        totals = {'p': self.priorities, 'u': self.units, 'user': self.users, 'e': self.events}
+        for minute, counts in self.buckets.items():
+            for key, count in counts.items():
+                kind, name = key.split(':', 1)
+                target = totals[kind]
+                target[name] = target.get(name, 0) + count
+            if self.first is None or minute < self.first:
+                self.first = minute
+        self.entries = sum(self.priorities.values()) + sum(counts.get('n', 0) for counts in self.buckets.values())
+        self.last = self.last_realtime / 1e6 if self.buckets else None
+    
+    def expire(self, now: Optional[float] = None):
+        """Scarta i bucket e le righe più vecchi della finestra e ricalcola i totali"""
+        cutoff = (now if now is not None else time.time()) - self.window
+        for minute in [minute for minute in self.buckets if minute + self.BUCKET <= cutoff]:
+            del self.buckets[minute]
+        for lines in [*self.samples.values(), self.sessions, self.sudo_commands, self.ssh]:
+            while lines and lines[0][0] < cutoff:
+                lines.popleft()
+        self._rebuild()
+    
+    @staticmethod
+    def format_entry(entry: Dict) -> str:
+        """Riga nel formato breve di journalctl: data, host, identificatore[pid]: messaggio"""
+        moment = datetime.fromtimestamp(int(entry.get('__REALTIME_TIMESTAMP', 0)) / 1e6)
+        identifier = entry.get('SYSLOG_IDENTIFIER') or entry.get('_COMM') or '?'
+        pid = f"[{entry['_PID']}]" if entry.get('_PID') else ""
+        return (f"{moment.strftime('%b %d %H:%M:%S')} {entry.get('_HOSTNAME', '')} "
+                f"{identifier}{pid}: {JournalAggregator.message(entry)}")
+    
+    @staticmethod
+    def message(entry: Dict) -> str:
+        """Campo MESSAGE come testo (journalctl lo esporta come array di byte se non è UTF-8)"""
+        message = entry.get('MESSAGE')
+        if isinstance(message, list):
+            return bytes(value & 0xFF for value in message if isinstance(value, int)).decode('utf-8', 'replace')
+        return message if isinstance(message, str) else ""
+    
+    def _count(self, bucket: Dict[str, int], totals: Dict[str, int], kind: str, name: str):
+        key = f"{kind}:{name}"
+        bucket[key] = bucket.get(key, 0) + 1
+        totals[name] = totals.get(name, 0) + 1
+    
+    def add(self, entry: Dict):
+        """Aggiorna i contatori con una voce del journal già decodificata"""
+        realtime = int(entry.get('__REALTIME_TIMESTAMP') or time.time() * 1e6)
+        timestamp = realtime / 1e6
+        minute = int(timestamp // self.BUCKET * self.BUCKET)
+        bucket = self.buckets.setdefault(minute, {})
+        self.entries += 1
+        self.new_entries += 1
+        if self.first is None or minute < self.first:
+            self.first = minute
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+        self.last_realtime = max(self.last_realtime, realtime)
+        if entry.get('__CURSOR'):
+            self.cursor = entry['__CURSOR']
+        
+        priority = entry.get('PRIORITY')
+        if priority and priority.isdigit() and int(priority) < len(self.PRIORITIES):
+            self._count(bucket, self.priorities, 'p', self.PRIORITIES[int(priority)])
+            if int(priority) <= 3:
+                self.new_errors += 1
+        else:
+            # Voci senza priorità: contano solo nel totale
+            bucket['n'] = bucket.get('n', 0) + 1
+        identifier = entry.get('SYSLOG_IDENTIFIER') or entry.get('_COMM')
+        unit = entry.get('_SYSTEMD_UNIT') or identifier
+        if unit:
+            self._count(bucket, self.units, 'u', unit)
+        
+        message = self.message(entry)
+        if identifier == 'sudo' and 'COMMAND=' in message:
+            self._count(bucket, self.events, 'e', 'sudo')
+            self.sudo_commands.append((timestamp, self.format_entry(entry)))
+        elif ((identifier or '').startswith('sshd') or entry.get('_SYSTEMD_UNIT') in self.SSH_UNITS) \
+                and ('Accepted' in message or 'Failed' in message):
+            self.ssh.append((timestamp, self.format_entry(entry)))
+        
+        lowered = message.lower()
+        if self._selector.search(lowered) is None:
+            return
+        line = None
+        failed = False
+        for pattern, names in self._patterns.items():
+            if pattern not in lowered:
+                continue
+            failed = failed or pattern in self.AUTH_FAILURES
+            line = line or self.format_entry(entry)
+            if pattern == self.SESSION_OPENED:
+                self._count(bucket, self.events, 'e', 'sessions_opened')
+                self.sessions.append((timestamp, line))
+                user = self.SESSION_USER.search(message)
+                if user:
+                    self._count(bucket, self.users, 'user', user.group(1))
+            for name in names:
+                self._count(bucket, self.events, 'e', name)
+                self.samples[name].append((timestamp, line))
+        if failed:
+            self._count(bucket, self.events, 'e', 'auth_failures')
+    
+    def feed_lines(self, lines, cursor: Optional[str] = None, after: Optional[int] = None):
+        """Analizza righe di `journalctl -o json` (una voce per riga)
+        
+        Con cursor la prima voce deve essere quella del cursore (già
+        contata); altrimenti il cursore non è più valido e, come con after,
+        si saltano le voci con __REALTIME_TIMESTAMP non successivo
+        all'ultimo contato.
+        """
+        check = cursor is not None
+        self.parsed = 0
+        for line in lines:
+            if not line.startswith('{'):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.parsed += 1
+            if check:
+                check = False
+                if entry.get('__CURSOR') == cursor:
+                    continue
+                self.notices.append('vacuumed')
+                after = self.last_realtime
+            if after is not None and int(entry.get('__REALTIME_TIMESTAMP') or 0) <= after:
+                continue
+            self.add(entry)
+        return self
+    
+    def _read(self, position: List[str], timeout: float, cursor: Optional[str] = None,
+              after: Optional[int] = None) -> 'CommandStream':
+        argv = ["journalctl", "--no-pager", "--quiet", "-o", "json"] + position
+        stream = SystemInfo.stream_command(argv + ["--output-fields=" + ",".join(self.FIELDS)],
+                                           max_bytes=None, timeout=timeout)
+        self.feed_lines(stream, cursor, after)
+        if stream.returncode != 0 and not self.parsed and 'output-fields' in stream.stderr:
+            # journalctl precedente a systemd 236: tutti i campi
+            stream = SystemInfo.stream_command(argv, max_bytes=None, timeout=timeout)
+            self.feed_lines(stream, cursor, after)
+        return stream
+    
+    def collect(self, timeout: float = 120, now: Optional[float] = None) -> 'JournalAggregator':
+        """Legge le voci nuove (dal cursore o dall'inizio della finestra) e salva lo stato"""
+        now = now if now is not None else time.time()
+        self.notices = []
+        self.new_entries = self.new_errors = 0
+        self.error = None
+        boot_id = (ProcCollector.read_file(self.BOOT_ID) or '').strip() or None
+        if boot_id and self.boot_id and boot_id != self.boot_id:
+            self.notices.append('boot')
+        self.boot_id = boot_id or self.boot_id
+        
+        stream = None
+        if self.cursor:
+            stream = self._read(["--cursor", self.cursor], timeout, self.cursor)
+            if stream.returncode != 0 and not self.parsed:
+                # Cursore rifiutato da journalctl: si riparte dall'ultima voce contata
+                self.notices.append('reset')
+                self.cursor = None
+            elif not self.parsed:
+                # Nessuna voce, nemmeno quella del cursore: journal svuotato
+                self.notices.append('vacuumed')
+        if not self.cursor:
+            since = max(now - self.window, self.last_realtime / 1e6)
+            stream = self._read(["--since", f"@{int(since)}"], timeout, after=self.last_realtime or None)
+        
+        self.returncode = stream.returncode
+        if stream.returncode != 0 and not self.parsed and not self.buckets:
+            message = stream.stderr.strip()
+            self.error = message.split('\n')[0] if message else "journalctl non disponibile"
+        self.expire(now)
+        self.save()
+        return self
+    
+    def at_least(self, level: str, since: Optional[float] = None) -> int:
+        """Messaggi con priorità level o più grave (come journalctl -p level), nella finestra o da since"""
+        levels = self.PRIORITIES[:self.PRIORITIES.index(level) + 1]
+        if since is None:
+            return sum(self.priorities[name] for name in levels)
+        start = since // self.BUCKET * self.BUCKET
+        return sum(counts.get(f"p:{name}", 0) for minute, counts in self.buckets.items() if minute >= start
+                   for name in levels)
+    
+    def top_units(self, count: int = 10) -> List[Tuple[str, int]]:
+        return heapq.nlargest(count, self.units.items(), key=lambda item: item[1])
+    
+    def top_users(self, count: int = 10) -> List[Tuple[str, int]]:
+        return heapq.nlargest(count, self.users.items(), key=lambda item: item[1])
 
 class MenuSystem:
     """Sistema di menu interattivo"""
@@ -182,7 +4238,7 @@ class LVMManager:
         
         # Physical Volumes
         print(f"\n{Colors.CYAN}🔷 Physical Volumes:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("pvdisplay")
+        ret, out, err = SystemInfo.run_command("pvdisplay", cache='lvm')
         if ret == 0 and out.strip():
             print(out)
         else:
@@ -190,7 +4246,7 @@ class LVMManager:
         
         # Volume Groups
         print(f"\n{Colors.CYAN}🔶 Volume Groups:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("vgdisplay")
+        ret, out, err = SystemInfo.run_command("vgdisplay", cache='lvm')
         if ret == 0 and out.strip():
             print(out)
         else:
@@ -198,7 +4254,7 @@ class LVMManager:
         
         # Logical Volumes
         print(f"\n{Colors.CYAN}🔸 Logical Volumes:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("lvdisplay")
+        ret, out, err = SystemInfo.run_command("lvdisplay", cache='lvm')
         if ret == 0 and out.strip():
             print(out)
         else:
@@ -231,14 +4287,14 @@ class LVMManager:
         
         # Spazio libero nei VG esistenti
         print(f"\n{Colors.YELLOW}📊 Spazio libero nei Volume Groups:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("vgdisplay | grep -E '(VG Name|Free)'")
+        ret, out, err = SystemInfo.run_command("vgdisplay | grep -E '(VG Name|Free)'", cache='lvm')
         if ret == 0 and out.strip():
             print(out)
     
     @staticmethod
     def get_logical_volumes():
         """Restituisce lista dei Logical Volumes"""
-        ret, out, err = SystemInfo.run_command("lvs --noheadings -o lv_name,vg_name,lv_size")
+        ret, out, err = SystemInfo.run_command("lvs --noheadings -o lv_name,vg_name,lv_size", cache='lvm')
         volumes = []
         if ret == 0:
             for line in out.split('\n'):
@@ -256,7 +4312,7 @@ class LVMManager:
     @staticmethod
     def get_volume_groups():
         """Restituisce lista dei Volume Groups con spazio libero"""
-        ret, out, err = SystemInfo.run_command("vgs --noheadings -o vg_name,vg_size,vg_free")
+        ret, out, err = SystemInfo.run_command("vgs --noheadings -o vg_name,vg_size,vg_free", cache='lvm')
         groups = []
         if ret == 0:
             for line in out.split('\n'):
@@ -339,6 +4395,7 @@ class LVMManager:
         # Esecuzione espansione
         print(f"\n{Colors.BLUE}🔄 Espansione del Logical Volume...{Colors.RESET}")
         ret, out, err = SystemInfo.run_command(f"lvextend -L {size_input} {selected_lv['path']}")
+        SystemInfo.CACHE.invalidate('lvm')
         
         if ret != 0:
             print(f"{Colors.RED}❌ Errore nell'espansione del LV: {err}{Colors.RESET}")
@@ -426,32 +4483,44 @@ class LVMManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}📋 REPORT COMPLETO STORAGE{Colors.RESET}")
         print("=" * 60)
         
+        # Tutti i comandi del report vengono lanciati insieme
+        results = SystemInfo.run_commands([
+            "lsblk -o NAME,SIZE,TYPE,MOUNTPOINT,FSTYPE,UUID",
+            ("pvs --noheadings", 'lvm'),
+            ("pvs", 'lvm'),
+            ("vgs", 'lvm'),
+            ("lvs", 'lvm'),
+            "iostat -x 1 1 2>/dev/null || echo 'iostat non disponibile'",
+            "mount | grep -v tmpfs | grep -v devpts | grep -v sysfs | grep -v proc",
+        ])
+        lsblk, pvs_check, pvs, vgs, lvs, iostat, mounts = results
+        
         # Informazioni generali
         print(f"\n{Colors.CYAN}📊 PANORAMICA GENERALE{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("lsblk -o NAME,SIZE,TYPE,MOUNTPOINT,FSTYPE,UUID")
+        ret, out, err = lsblk
         if ret == 0:
             print(out)
         
         # Statistiche LVM se disponibile
-        ret, out, err = SystemInfo.run_command("pvs --noheadings")
+        ret, out, err = pvs_check
         if ret == 0 and out.strip():
             print(f"\n{Colors.CYAN}🔷 STATISTICHE LVM{Colors.RESET}")
             print("Physical Volumes:")
-            SystemInfo.run_command("pvs")
+            print(pvs[1])
             print("\nVolume Groups:")
-            SystemInfo.run_command("vgs") 
+            print(vgs[1])
             print("\nLogical Volumes:")
-            SystemInfo.run_command("lvs")
+            print(lvs[1])
         
         # I/O Statistics
         print(f"\n{Colors.CYAN}📈 STATISTICHE I/O{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("iostat -x 1 1 2>/dev/null || echo 'iostat non disponibile'")
+        ret, out, err = iostat
         if ret == 0:
             print(out)
         
         # Mount options
         print(f"\n{Colors.CYAN}🔧 OPZIONI MOUNT{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("mount | grep -v tmpfs | grep -v devpts | grep -v sysfs | grep -v proc")
+        ret, out, err = mounts
         if ret == 0:
             print(out)
 
@@ -555,9 +4624,8 @@ class NetworkManager:
         
         # Porte in ascolto
         print(f"\n{Colors.WHITE}👂 Porte in ascolto:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("ss -tuln | head -20")
-        if ret == 0:
-            print(out)
+        for line in SystemInfo.stream_command(["ss", "-tuln"], max_lines=20):
+            print(line)
     
     @staticmethod
     def traffic_statistics():
@@ -565,28 +4633,42 @@ class NetworkManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}📈 STATISTICHE TRAFFICO{Colors.RESET}")
         print("=" * 60)
         
-        # Statistiche interfacce
+        # Statistiche interfacce: due letture a un secondo di distanza per il throughput
         print(f"\n{Colors.CYAN}📊 Statistiche per interfaccia:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("cat /proc/net/dev")
-        if ret == 0:
-            lines = out.split('\n')
-            print(f"{'Interface':<10} {'RX Bytes':<12} {'RX Packets':<12} {'TX Bytes':<12} {'TX Packets':<12}")
-            print("-" * 70)
-            for line in lines[2:]:  # Skip header lines
-                if ':' in line:
-                    parts = line.split()
-                    if len(parts) >= 10:
-                        iface = parts[0].rstrip(':')
-                        rx_bytes = int(parts[1])
-                        rx_packets = int(parts[2])
-                        tx_bytes = int(parts[9])
-                        tx_packets = int(parts[10])
-                        
-                        # Format bytes in human readable
-                        rx_mb = rx_bytes / (1024*1024)
-                        tx_mb = tx_bytes / (1024*1024)
-                        
-                        print(f"{iface:<10} {rx_mb:<12.1f} {rx_packets:<12} {tx_mb:<12.1f} {tx_packets:<12}")
+        before = ProcCollector.net_dev()
+        started = time.monotonic()
+        time.sleep(1)
+        after = ProcCollector.net_dev()
+        elapsed = time.monotonic() - started
+        
+        print(f"{'Interface':<10} {'RX MB':<12} {'RX Packets':<12} {'TX MB':<12} {'TX Packets':<12} {'RX/s':>9} {'TX/s':>9}")
+        print("-" * 90)
+        for iface, counters in after.items():
+            rx_rate = max(counters['rx_bytes'] - before.get(iface, counters)['rx_bytes'], 0) / elapsed
+            tx_rate = max(counters['tx_bytes'] - before.get(iface, counters)['tx_bytes'], 0) / elapsed
+            SystemInfo.METRICS.add(f"net.{iface}.rx_rate", rx_rate)
+            SystemInfo.METRICS.add(f"net.{iface}.tx_rate", tx_rate)
+            
+            # Format bytes in human readable
+            rx_mb = counters['rx_bytes'] / (1024*1024)
+            tx_mb = counters['tx_bytes'] / (1024*1024)
+            
+            print(f"{iface:<10} {rx_mb:<12.1f} {counters['rx_packets']:<12} {tx_mb:<12.1f} {counters['tx_packets']:<12} "
+                  f"{ProcCollector.format_bytes(rx_rate):>9} {ProcCollector.format_bytes(tx_rate):>9}")
+        
+        # Andamento nella sessione (o dal daemon) per le interfacce con storico
+        history = [iface for iface in after
+                   if (SystemInfo.METRICS.stats(f"net.{iface}.rx_rate", 3600) or {}).get('samples', 0) > 1]
+        if history:
+            print(f"\n{Colors.CYAN}📈 Andamento throughput (ultima ora):{Colors.RESET}")
+            for iface in history:
+                for direction in ['rx', 'tx']:
+                    name = f"net.{iface}.{direction}_rate"
+                    stats = SystemInfo.METRICS.stats(name, 3600)
+                    print(f"  {iface:<10} {direction.upper()} {SystemInfo.METRICS.sparkline(name, 3600, 30):30} "
+                          f"min {ProcCollector.format_bytes(stats['min'])}/s  "
+                          f"avg {ProcCollector.format_bytes(stats['avg'])}/s  "
+                          f"max {ProcCollector.format_bytes(stats['max'])}/s")
         
         # Connessioni attive
         print(f"\n{Colors.CYAN}🔗 Connessioni attive (top 10):{Colors.RESET}")
@@ -764,43 +4846,54 @@ class NetworkManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}📋 REPORT COMPLETO RETE{Colors.RESET}")
         print("=" * 60)
         
+        config_files = [
+            "/etc/network/interfaces",
+            "/etc/netplan/*.yaml",
+            "/etc/NetworkManager/NetworkManager.conf"
+        ]
+        config_checks = [
+            f"ls {config} 2>/dev/null" if "*" in config else f"test -f {config}"
+            for config in config_files
+        ]
+        
+        # Tutti i comandi del report vengono lanciati insieme
+        results = SystemInfo.run_commands([
+            "hostname -f",
+            "hostname -d",
+            "ip -o addr show | awk '{print $2, $4}'",
+            "ss -tuln | awk 'NR>1 {print $1, $5}' | sort -u",
+        ] + config_checks)
+        fqdn, domain, interfaces, services = results[:4]
+        
         # Hostname e dominio
         print(f"\n{Colors.CYAN}🏷️  Identificazione sistema:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("hostname -f")
+        ret, out, err = fqdn
         if ret == 0:
             print(f"FQDN: {out.strip()}")
         
-        ret, out, err = SystemInfo.run_command("hostname -d")
+        ret, out, err = domain
         if ret == 0 and out.strip():
             print(f"Dominio: {out.strip()}")
         
         # Interfacce summary
         print(f"\n{Colors.CYAN}📊 Summary interfacce:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("ip -o addr show | awk '{print $2, $4}'")
+        ret, out, err = interfaces
         if ret == 0:
             print(out)
         
         # Servizi di rete attivi
         print(f"\n{Colors.CYAN}⚡ Servizi rete attivi:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("ss -tuln | awk 'NR>1 {print $1, $5}' | sort -u")
+        ret, out, err = services
         if ret == 0:
             print(out)
         
         # Configurazioni importanti
         print(f"\n{Colors.CYAN}⚙️  File configurazione principali:{Colors.RESET}")
-        config_files = [
-            "/etc/network/interfaces",
-            "/etc/netplan/*.yaml",
-            "/etc/NetworkManager/NetworkManager.conf"
-        ]
-        
-        for config in config_files:
+        for config, (ret, out, err) in zip(config_files, results[4:]):
             if "*" in config:
-                ret, out, err = SystemInfo.run_command(f"ls {config} 2>/dev/null")
                 if ret == 0 and out.strip():
                     print(f"✅ {config} (esistente)")
             else:
-                ret, out, err = SystemInfo.run_command(f"test -f {config}")
                 if ret == 0:
                     print(f"✅ {config}")
 
@@ -821,6 +4914,123 @@ class LogManager:
         "/usr/local/*/logs"
     ]
     
+    # Desinenze dei file di log: .log, httpd (access_log, error_log), rsyslog per livello (mail.err)
+    LOG_SUFFIXES = ('.log', '_log', '.err', '.warn', '.warning', '.info', '.notice', '.crit')
+    # File di log senza desinenza riconoscibile (syslog classico)
+    SYSLOG_NAMES = {'syslog', 'messages', 'secure', 'maillog', 'cron', 'debug', 'dmesg', 'kern', 'auth', 'daemon'}
+    COMPRESSED_SUFFIXES = ('.gz', '.xz', '.bz2', '.zst')
+    # Suffisso di rotazione: numerico (app.log.1) o data di dateext (messages-20240101)
+    ROTATION_SUFFIX = re.compile(r'(?:\.\d+|-\d{8}(?:\d{2})?)$')
+    # Pattern contati per ora dalle statistiche log (cursori persistenti)
+    STATISTICS_PATTERNS = ["error", "fail", "exception"]
+    # Template conservati per file dalle statistiche log
+    STATISTICS_TEMPLATES = 50
+    # Follow in tempo reale: righe mostrate al secondo e intervallo della riga di stato
+    FOLLOW_MAX_LINES = 40
+    FOLLOW_STATUS_INTERVAL = 5
+    # Log di accesso web analizzati in tempo reale (AccessLogAnalyzer) e intervallo del riepilogo
+    ACCESS_LOGS = ["/var/log/nginx/access.log", "/var/log/apache2/access.log", "/var/log/httpd/access_log"]
+    ACCESS_DASHBOARD_INTERVAL = 10
+    # Unità della latenza in fondo alle righe di accesso (chiave di AccessLogAnalyzer.LATENCY_UNITS,
+    # ad esempio 'us' per %D di Apache); None legge solo i decimali in secondi di nginx
+    ACCESS_LATENCY_UNIT = None
+    # Soglie dei log grandi (pulizia sistema, gestione rotazione) e voci mostrate
+    LARGE_LOG_THRESHOLDS = (10 * 1024 * 1024, 100 * 1024 * 1024)
+    LARGE_LOG_SHOWN = 20
+    # Modalità dell'analisi real-time: titolo, file candidati, categorie di pattern
+    REALTIME_SOURCES = {
+        "3": ("🔒 Monitoring security logs", ["/var/log/auth.log", "/var/log/secure"],
+              {"Accessi falliti": ["failed password", "authentication failure", "invalid user"],
+               "Accessi riusciti": ["accepted password", "accepted publickey"],
+               "Sudo": ["sudo:"]}),
+        "4": ("📧 Monitoring mail logs", ["/var/log/mail.log", "/var/log/maillog"],
+              {"Inviati": ["status=sent"], "Rimandati": ["status=deferred"],
+               "Rifiutati": ["reject:", "status=bounced"]}),
+    }
+    
+    @staticmethod
+    def classify_log_name(name: str) -> Optional[Tuple[bool, bool]]:
+        """(compresso, ruotato) se il nome è quello di un log, altrimenti None"""
+        compressed = name.endswith(LogManager.COMPRESSED_SUFFIXES)
+        if compressed:
+            name = name[:name.rindex('.')]
+        base = LogManager.ROTATION_SUFFIX.sub('', name)
+        rotated = base != name
+        if base.endswith(LogManager.LOG_SUFFIXES) or base in LogManager.SYSLOG_NAMES:
+            return compressed, rotated or compressed
+        return None
+    
+    @staticmethod
+    def find_log_roots() -> List[str]:
+        """Directory di LOG_DIRECTORIES esistenti, con i pattern glob espansi"""
+        roots = []
+        for pattern in LogManager.LOG_DIRECTORIES:
+            for path in sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]:
+                path = os.path.realpath(path)
+                if os.path.isdir(path) and path not in roots:
+                    roots.append(path)
+        return roots
+    
+    @staticmethod
+    def _list_dir(directory: str, skip: frozenset = frozenset()) -> Tuple[List[str], List[Dict]]:
+        """Sottodirectory da visitare e record dei file di log contenuti in directory
+        
+        Tipo e stat vengono presi dalle DirEntry senza seguire i link.
+        """
+        subdirs, records = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in skip:
+                                subdirs.append(entry.path)
+                            continue
+                        kind = LogManager.classify_log_name(entry.name)
+                        if kind is None or not entry.is_file(follow_symlinks=False):
+                            continue
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    records.append({
+                        'path': entry.path,
+                        'size': info.st_size,
+                        'mtime': info.st_mtime,
+                        'inode': info.st_ino,
+                        'compressed': kind[0],
+                        'rotated': kind[1],
+                    })
+        except OSError:
+            pass
+        return subdirs, records
+    
+    @staticmethod
+    def _scan_dir(root: str, skip: frozenset = frozenset()) -> List[Dict]:
+        """Visita root con os.scandir e restituisce un record per ogni file di log
+        
+        Le sottodirectory in skip sono escluse perché scandite come radici a sé.
+        """
+        records = []
+        pending = [root]
+        while pending:
+            subdirs, found = LogManager._list_dir(pending.pop(), skip)
+            pending.extend(subdirs)
+            records.extend(found)
+        # Log attivi prima dei ruotati, poi per percorso
+        records.sort(key=lambda record: (record['rotated'], record['path']))
+        return records
+    
+    @staticmethod
+    def scan_log_directories() -> Dict[str, List[Dict]]:
+        """Scansione di tutte le radici di log in parallelo, una per thread"""
+        roots = LogManager.find_log_roots()
+        if not roots:
+            return {}
+        skip = frozenset(roots)
+        with ThreadPoolExecutor(max_workers=min(len(roots), SystemInfo.MAX_PARALLEL_COMMANDS)) as executor:
+            results = executor.map(lambda root: LogManager._scan_dir(root, skip - {root}), roots)
+            return {root: records for root, records in zip(roots, results) if records}
+    
     @staticmethod
     def show_log_menu():
         """Mostra il menu gestione log"""
@@ -837,53 +5047,300 @@ class LogManager:
         print(f"0. ↩️  Torna al menu principale")
         print(f"{Colors.RESET}")
     
+    _inventory = None
+    
+    @staticmethod
+    def inventory() -> LogInventory:
+        """Inventario condiviso, caricato da disco al primo uso"""
+        if LogManager._inventory is None:
+            LogManager._inventory = LogInventory(LogInventory.default_path())
+        return LogManager._inventory
+    
+    @staticmethod
+    def log_inventory() -> Dict[str, List[Dict]]:
+        """Log per radice dall'inventario, riscoperto in modo incrementale (con cache)"""
+        def refresh():
+            inventory = LogManager.inventory()
+            inventory.refresh()
+            inventory.save()
+            return inventory.by_root()
+        return SystemInfo.CACHE.cached('logs', 'inventory', refresh)
+    
+    @staticmethod
+    def follow_logs(paths: List[str], categories: Optional[Dict[str, List[str]]] = None,
+                    show_all: bool = True):
+        """Segue i log in tempo reale (LogFollower) fino a Ctrl+C
+        
+        Le righe nuove sono confrontate con i pattern delle categorie
+        (MultiPatternMatcher) ed evidenziate; con show_all=False si mostrano
+        solo quelle che corrispondono. Si mostrano al massimo FOLLOW_MAX_LINES
+        righe al secondo, le altre sono solo contate; ogni
+        FOLLOW_STATUS_INTERVAL secondi una riga di stato riporta righe/s per
+        file e occorrenze/s per categoria.
+        """
+        categories = categories or {}
+        patterns = [pattern for group in categories.values() for pattern in group]
+        matcher = MultiPatternMatcher(categories, max_samples=0) if categories else None
+        highlight = selector = None
+        if patterns:
+            combined = '|'.join(f'(?:{pattern})' for pattern in patterns)
+            highlight = re.compile(combined, re.IGNORECASE)
+            selector = re.compile(combined.encode('utf-8'), re.IGNORECASE)
+        if not show_all and selector is None:
+            show_all = True
+        
+        def lines_to_show(block: bytes, budget: int) -> List[bytes]:
+            if show_all:
+                return block[:-1].split(b'\n', budget)[:budget] if budget else []
+            lines = []
+            position = 0
+            while len(lines) < budget:
+                match = selector.search(block, position)
+                if match is None:
+                    break
+                start = block.rfind(b'\n', 0, match.start()) + 1
+                end = block.find(b'\n', match.start())
+                end = len(block) if end < 0 else end
+                lines.append(block[start:end])
+                position = end + 1
+            return lines
+        
+        notices = {'rotated': "🔄 {}: rotazione rilevata, lettura del nuovo file",
+                   'truncated': "✂️  {}: file troncato, lettura dall'inizio"}
+        multiple = len(paths) > 1
+        hidden = 0
+        with LogFollower(paths) as follower:
+            print(f"{Colors.GREEN}📡 Monitoring di {len(follower.files)} file ({follower.mode}, "
+                  f"Ctrl+C per uscire)...{Colors.RESET}")
+            started = last_status = time.monotonic()
+            previous_lines = {path: 0 for path in follower.files}
+            previous_counts = dict(matcher.counts) if matcher else {}
+            second, shown = int(started), 0
+            try:
+                while True:
+                    for path, block in follower.poll(1.0):
+                        if matcher is not None:
+                            matcher.feed(block, path)
+                        now = int(time.monotonic())
+                        if now != second:
+                            second, shown = now, 0
+                        lines = lines_to_show(block, LogManager.FOLLOW_MAX_LINES - shown)
+                        shown += len(lines)
+                        if show_all:
+                            hidden += block.count(b'\n') - len(lines)
+                        prefix = f"{Colors.CYAN}[{os.path.basename(path)}]{Colors.RESET} " if multiple else ""
+                        for line in lines:
+                            text = line.decode('utf-8', 'replace')[:LogSearch.DISPLAY_WIDTH]
+                            if highlight is not None:
+                                text = highlight.sub(lambda m: f"{Colors.YELLOW}{Colors.BOLD}{m.group(0)}{Colors.RESET}", text)
+                            print(f"{prefix}{text}")
+                    for path, kind in follower.notices:
+                        print(f"{Colors.YELLOW}{notices[kind].format(path)}{Colors.RESET}")
+                    follower.notices.clear()
+                    
+                    now = time.monotonic()
+                    if now - last_status >= LogManager.FOLLOW_STATUS_INTERVAL:
+                        elapsed = now - last_status
+                        rates = [f"{os.path.basename(path)} {(state['lines'] - previous_lines[path]) / elapsed:.1f} righe/s"
+                                 for path, state in follower.files.items() if state['lines'] > previous_lines[path]]
+                        if matcher is not None:
+                            rates.append(" ".join(f"{category} {(count - previous_counts[category]) / elapsed:.1f}/s"
+                                                  for category, count in matcher.counts.items()))
+                        if hidden:
+                            rates.append(f"{hidden} righe non mostrate")
+                        if rates:
+                            print(f"{Colors.BLUE}📈 {datetime.now().strftime('%H:%M:%S')} "
+                                  f"{' | '.join(rates)}{Colors.RESET}")
+                        previous_lines = {path: state['lines'] for path, state in follower.files.items()}
+                        previous_counts = dict(matcher.counts) if matcher else {}
+                        last_status, hidden = now, 0
+            except KeyboardInterrupt:
+                pass
+            
+            elapsed = max(time.monotonic() - started, 1e-9)
+            print(f"\n{Colors.WHITE}📊 Riepilogo ({elapsed:.0f}s):{Colors.RESET}")
+            for path, state in follower.files.items():
+                extra = ""
+                if state['rotations'] or state['truncations']:
+                    extra = f", {state['rotations']} rotazioni, {state['truncations']} troncamenti"
+                print(f"   {path}: {state['lines']} righe ({ProcCollector.format_bytes(state['bytes'])}{extra})")
+            if matcher is not None:
+                for category, count in matcher.counts.items():
+                    print(f"   {category}: {count} righe ({count / elapsed:.2f}/s)")
+    
+    @staticmethod
+    def analyze_access_logs(paths: List[str], from_start: bool = False):
+        """Analisi in tempo reale dei log di accesso web fino a Ctrl+C
+        
+        Le righe nuove (o, con from_start, anche quelle già presenti)
+        alimentano un AccessLogAnalyzer; ogni ACCESS_DASHBOARD_INTERVAL
+        secondi e all'uscita si mostra il riepilogo.
+        """
+        analyzer = AccessLogAnalyzer(latency=LogManager.ACCESS_LATENCY_UNIT)
+        with LogFollower(paths, from_end=not from_start) as follower:
+            print(f"{Colors.GREEN}🌐 Analisi di {len(follower.files)} log di accesso ({follower.mode}, "
+                  f"Ctrl+C per uscire)...{Colors.RESET}")
+            last_dashboard = time.monotonic()
+            try:
+                while True:
+                    for _, block in follower.poll(1.0):
+                        analyzer.feed(block)
+                    for path, kind in follower.notices:
+                        event = "rotazione rilevata" if kind == 'rotated' else "file troncato"
+                        print(f"{Colors.YELLOW}🔄 {path}: {event}{Colors.RESET}")
+                    follower.notices.clear()
+                    if time.monotonic() - last_dashboard >= LogManager.ACCESS_DASHBOARD_INTERVAL:
+                        LogManager.print_access_summary(analyzer)
+                        last_dashboard = time.monotonic()
+            except KeyboardInterrupt:
+                pass
+        LogManager.print_access_summary(analyzer)
+    
+    @staticmethod
+    def print_access_summary(analyzer: 'AccessLogAnalyzer', top: int = 5):
+        """Riepilogo di un AccessLogAnalyzer: traffico, codici di stato, percentili e classifiche"""
+        print(f"\n{Colors.WHITE}{Colors.BOLD}🌐 {datetime.now().strftime('%H:%M:%S')} "
+              f"{analyzer.requests} richieste, {ProcCollector.format_bytes(analyzer.bytes)}{Colors.RESET}")
+        if not analyzer.requests:
+            if analyzer.unparsed:
+                print(f"{Colors.YELLOW}⚠️  {analyzer.unparsed} righe non in formato CLF/Combined{Colors.RESET}")
+            return
+        
+        span = ""
+        if analyzer.first is not None and analyzer.last > analyzer.first:
+            span = f" (media {analyzer.requests / (analyzer.last - analyzer.first):.1f}/s dall'inizio)"
+        print(f"   Richieste/s (ultimo minuto di log): {analyzer.rate():.1f}{span}")
+        
+        mix = []
+        for status_class, count in analyzer.status_classes().items():
+            color = Colors.RED if status_class == '5xx' else Colors.YELLOW if status_class == '4xx' else Colors.GREEN
+            mix.append(f"{color}{status_class} {count * 100 / analyzer.requests:.1f}%{Colors.RESET}")
+        print(f"   Codici di stato: {'  '.join(mix)}")
+        
+        quantiles = (0.5, 0.9, 0.99)
+        sizes = [ProcCollector.format_bytes(analyzer.sizes.quantile(q)) for q in quantiles]
+        print(f"   Dimensione risposta p50/p90/p99: {' / '.join(sizes)}")
+        if analyzer.latencies.count:
+            latencies = [f"{analyzer.latencies.quantile(q):.1f} ms" for q in quantiles]
+            print(f"   Latenza p50/p90/p99: {' / '.join(latencies)} ({analyzer.latencies.count} richieste)")
+        
+        print(f"   Client distinti (stima): ~{analyzer.unique_clients.count()}")
+        for title, hitters in (("URL più richiesti", analyzer.urls), ("Client più attivi", analyzer.clients)):
+            print(f"   {Colors.CYAN}{title} (stima):{Colors.RESET}")
+            for item, count in hitters.top(top):
+                print(f"     {count:>8}  {item}")
+        if analyzer.unparsed:
+            print(f"   {Colors.YELLOW}{analyzer.unparsed} righe non riconosciute{Colors.RESET}")
+    
     @staticmethod
-    def discover_logs():
-        """Scopre i log applicativi nel sistema"""
-        print(f"\n{Colors.BLUE}{Colors.BOLD}🔍 SCOPERTA LOG APPLICATIVI{Colors.RESET}")
-        print("=" * 60)
-        
-        discovered_logs = {}
-        
+    def largest_files() -> 'LargestFiles':
+        """File più grandi e spazio totale nelle radici dei log, da un'unica visita (con cache)
+        
+        Condiviso da statistiche log, gestione rotazione e pulizia sistema.
+        I file di log (classify_log_name) hanno una classifica a parte e il
+        conteggio di quelli oltre le soglie LARGE_LOG_THRESHOLDS.
+        """
+        return SystemInfo.CACHE.cached('logs', 'largest_files',
+                                       lambda: LargestFiles(select=LogManager.classify_log_name,
+                                                            thresholds=LogManager.LARGE_LOG_THRESHOLDS)
+                                       .scan(LogManager.find_log_roots()))
+    
+    @staticmethod
+    def print_large_logs(min_allocated: int) -> bool:
+        """Stampa i log oltre min_allocated (una delle LARGE_LOG_THRESHOLDS); False se non ce ne sono"""
+        largest = LogManager.largest_files()
+        large = largest.largest(LogManager.LARGE_LOG_SHOWN, min_allocated=min_allocated, selected=True)
+        for entry in large:
+            print(LogManager.format_largest(entry))
+        if largest.over[min_allocated] > len(large):
+            print(f"... e altri {largest.over[min_allocated] - len(large)} log")
+        return bool(large)
+    
+    @staticmethod
+    def format_largest(entry: Dict) -> str:
+        """Spazio allocato, dimensione apparente se diversa (file sparsi) e percorso"""
+        apparent = ""
+        if abs(entry['size'] - entry['allocated']) > max(entry['allocated'] // 10, 64 * 1024):
+            apparent = f" (apparente {ProcCollector.format_bytes(entry['size'])})"
+        return f"{ProcCollector.format_bytes(entry['allocated']):>8}  {entry['path']}{apparent}"
+    
+    @staticmethod
+    def print_templates(templates: Dict[str, 'LogTemplates'], files: int = 5, per_file: int = 3):
+        """Template più frequenti dei file con più righe raggruppate"""
+        busiest = heapq.nlargest(files, templates.items(), key=lambda item: item[1].lines)
+        for path, miner in busiest:
+            print(f"\n{Colors.CYAN}{path}{Colors.RESET} ({miner.lines} righe, {len(miner.clusters)} template)")
+            for entry in miner.top(per_file):
+                seen = ""
+                if entry['first'] is not None:
+                    seen = (f" [{datetime.fromtimestamp(entry['first']).strftime('%m-%d %H:%M')} → "
+                            f"{datetime.fromtimestamp(entry['last']).strftime('%m-%d %H:%M')}]")
+                print(f"  {entry['count']:6}× {entry['template'][:LogSearch.DISPLAY_WIDTH]}{seen}")
+                print(f"          es.: {entry['example'][:LogSearch.DISPLAY_WIDTH]}")
+            if miner.evicted:
+                print(f"  {Colors.YELLOW}⚠️  {miner.evicted} righe in template scartati per il limite{Colors.RESET}")
+    
+    @staticmethod
+    def collect_logs() -> Dict[str, List]:
+        """Raccoglie log in directory standard, log aperti e servizi (con cache)"""
+        return SystemInfo.CACHE.cached('logs', 'collect_logs', LogManager._scan_logs)
+    
+    @staticmethod
+    def _scan_logs() -> Dict[str, List]:
+        """Esegue la scansione completa dei log applicativi"""
         # Cerca in directory standard
-        print(f"{Colors.CYAN}📁 Ricerca in directory standard...{Colors.RESET}")
-        for log_dir in LogManager.LOG_DIRECTORIES:
-            if "*" in log_dir:
-                ret, out, err = SystemInfo.run_command(f"find {log_dir.replace('*', '')} -name '*.log' -type f 2>/dev/null | head -20")
-            else:
-                ret, out, err = SystemInfo.run_command(f"find {log_dir} -name '*.log' -type f 2>/dev/null | head -20")
-            
-            if ret == 0 and out.strip():
-                log_files = out.strip().split('\n')
-                if log_files:
-                    discovered_logs[log_dir] = log_files
+        discovered_logs = LogManager.log_inventory()
         
         # Cerca processi con log attivi
-        print(f"\n{Colors.CYAN}🔍 Ricerca processi con log attivi...{Colors.RESET}")
         ret, out, err = SystemInfo.run_command("lsof 2>/dev/null | grep '\\.log' | awk '{print $2, $9}' | sort -u")
         active_logs = []
         if ret == 0 and out.strip():
             active_logs = out.strip().split('\n')
         
+        # Servizi systemd con log
+        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=active | grep -E '(apache|nginx|mysql|postgres|ssh|mail)' | awk '{print $1}'", cache='services')
+        services = []
+        if ret == 0 and out.strip():
+            services = out.strip().split('\n')
+        
+        return {
+            'directories': discovered_logs,
+            'active': active_logs,
+            'services': services,
+        }
+    
+    @staticmethod
+    def discover_logs(refresh: bool = False):
+        """Scopre i log applicativi nel sistema"""
+        print(f"\n{Colors.BLUE}{Colors.BOLD}🔍 SCOPERTA LOG APPLICATIVI{Colors.RESET}")
+        print("=" * 60)
+        
+        if refresh:
+            SystemInfo.CACHE.invalidate('logs')
+        
+        print(f"{Colors.CYAN}📁 Ricerca in directory standard e processi con log attivi...{Colors.RESET}")
+        collected = LogManager.collect_logs()
+        discovered_logs = collected['directories']
+        active_logs = collected['active']
+        
         # Mostra risultati
         print(f"\n{Colors.WHITE}📊 LOG SCOPERTI:{Colors.RESET}")
         total_logs = 0
         
         for directory, logs in discovered_logs.items():
-            if logs:
-                print(f"\n{Colors.GREEN}📁 {directory}:{Colors.RESET}")
-                for log in logs[:10]:  # Limita a 10 per directory
-                    # Mostra info sul file
-                    ret, out, err = SystemInfo.run_command(f"ls -lh '{log}' 2>/dev/null")
-                    if ret == 0:
-                        parts = out.split()
-                        if len(parts) >= 5:
-                            size = parts[4]
-                            print(f"   📄 {log} ({size})")
-                            total_logs += 1
-                
-                if len(logs) > 10:
-                    print(f"   ... e altri {len(logs) - 10} file")
+            active = [log for log in logs if not log['rotated']]
+            rotated = [log for log in logs if log['rotated']]
+            print(f"\n{Colors.GREEN}📁 {directory}:{Colors.RESET}")
+            for log in active[:10]:  # Limita a 10 per directory
+                print(f"   📄 {log['path']} ({ProcCollector.format_bytes(log['size'])})")
+            
+            if len(active) > 10:
+                print(f"   ... e altri {len(active) - 10} file")
+            if rotated:
+                compressed = sum(1 for log in rotated if log['compressed'])
+                print(f"   🗂️  {len(rotated)} file ruotati ({compressed} compressi, "
+                      f"{ProcCollector.format_bytes(sum(log['size'] for log in rotated))})")
+            total_logs += len(logs)
         
         if active_logs:
             print(f"\n{Colors.YELLOW}🔥 LOG CON PROCESSI ATTIVI:{Colors.RESET}")
@@ -892,11 +5349,8 @@ class LogManager:
         
         # Servizi systemd con log
         print(f"\n{Colors.CYAN}⚙️  SERVIZI SYSTEMD CON LOG:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=active | grep -E '(apache|nginx|mysql|postgres|ssh|mail)' | awk '{print $1}'")
-        if ret == 0 and out.strip():
-            services = out.strip().split('\n')
-            for service in services[:10]:
-                print(f"   🔧 {service} (journalctl -u {service})")
+        for service in collected['services'][:10]:
+            print(f"   🔧 {service} (journalctl -u {service})")
         
         print(f"\n{Colors.GREEN}✅ Totale log scoperti: {total_logs}{Colors.RESET}")
         
@@ -908,21 +5362,21 @@ class LogManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}📖 VISUALIZZA LOG FILE{Colors.RESET}")
         print("=" * 60)
         
-        # Scopri log prima
-        discovered_logs = LogManager.discover_logs()
-        
-        # Lista file per selezione
-        all_logs = []
-        for directory, logs in discovered_logs.items():
-            all_logs.extend(logs)
+        # Inventario dei log: solo i file attivi, i ruotati sono versioni precedenti;
+        # i più recenti per primi
+        discovered_logs = LogManager.log_inventory()
+        records = sorted((log for logs in discovered_logs.values() for log in logs if not log['rotated']),
+                         key=lambda log: log['mtime'], reverse=True)
+        all_logs = [log['path'] for log in records]
         
         if not all_logs:
             print(f"{Colors.YELLOW}⚠️  Nessun log file trovato{Colors.RESET}")
             return
         
         print(f"\n{Colors.WHITE}📋 Seleziona log file da visualizzare:{Colors.RESET}")
-        for i, log in enumerate(all_logs[:20], 1):
-            print(f"{i:2}. {log}")
+        for i, log in enumerate(records[:20], 1):
+            last = datetime.fromtimestamp(log['last'] or log['mtime']).strftime('%Y-%m-%d %H:%M')
+            print(f"{i:2}. {log['path']} ({ProcCollector.format_bytes(log['size'])}, ultimo evento {last})")
         
         if len(all_logs) > 20:
             print(f"    ... e altri {len(all_logs) - 20} file")
@@ -951,31 +5405,23 @@ class LogManager:
         print(f"\n{Colors.CYAN}Modalità visualizzazione:{Colors.RESET}")
         print("1. Ultime 50 righe (tail -50)")
         print("2. Prime 50 righe (head -50)")
-        print("3. Real-time (tail -f)")
+        print("3. Real-time (segue rotazioni e troncamenti)")
         print("4. File completo (less)")
         
         view_mode = input(f"{Colors.CYAN}Modalità (1-4): {Colors.RESET}")
         
-        if view_mode == "1":
-            ret, out, err = SystemInfo.run_command(f"tail -50 '{log_path}'")
-            if ret == 0:
-                print(out)
-            else:
-                print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
-        
-        elif view_mode == "2":
-            ret, out, err = SystemInfo.run_command(f"head -50 '{log_path}'")
-            if ret == 0:
-                print(out)
-            else:
-                print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
+        if view_mode in ["1", "2"]:
+            tool = "tail" if view_mode == "1" else "head"
+            stream = SystemInfo.stream_command([tool, "-n", "50", "--", log_path])
+            for line in stream:
+                print(line)
+            if stream.returncode != 0:
+                print(f"{Colors.RED}❌ Errore: {stream.stderr.strip()}{Colors.RESET}")
                 
         elif view_mode == "3":
-            print(f"{Colors.YELLOW}📡 Modalità real-time (Ctrl+C per uscire):{Colors.RESET}")
-            try:
-                SystemInfo.run_command(f"tail -f '{log_path}'", capture_output=False)
-            except KeyboardInterrupt:
-                print(f"\n{Colors.GREEN}✅ Uscita da modalità real-time{Colors.RESET}")
+            print(f"{Colors.YELLOW}📡 Modalità real-time:{Colors.RESET}")
+            LogManager.follow_logs([log_path])
+            print(f"{Colors.GREEN}✅ Uscita da modalità real-time{Colors.RESET}")
         
         elif view_mode == "4":
             SystemInfo.run_command(f"less '{log_path}'", capture_output=False)
@@ -998,72 +5444,92 @@ class LogManager:
         
         # Periodo temporale
         print(f"\n{Colors.WHITE}📅 Filtro temporale:{Colors.RESET}")
-        print("1. Ultima ora")
-        print("2. Ultime 24 ore") 
-        print("3. Ultima settimana")
-        print("4. Nessun filtro")
-        
-        time_filter = input(f"{Colors.CYAN}Selezione (1-4): {Colors.RESET}")
-        
-        # Costruisci comando grep
-        grep_cmd = "grep"
-        if not case_sensitive:
-            grep_cmd += " -i"
-        
-        grep_cmd += f" -r '{search_pattern}'"
-        
-        # Applica filtro temporale se necessario
-        if time_filter in ["1", "2", "3"]:
-            if time_filter == "1":
-                find_time = "-mmin -60"
-            elif time_filter == "2":
-                find_time = "-mtime 0"
-            else:  # time_filter == "3"
-                find_time = "-mtime -7"
-            
-            search_cmd = f"find /var/log -type f {find_time} -exec {grep_cmd} {{}} +"
-        else:
-            search_cmd = f"{grep_cmd} /var/log/* 2>/dev/null"
+        print("1. Ultimi 15 minuti")
+        print("2. Ultima ora")
+        print("3. Ultime 24 ore")
+        print("4. Ultima settimana")
+        print("5. Nessun filtro")
+        
+        time_filter = input(f"{Colors.CYAN}Selezione (1-5): {Colors.RESET}")
+        
+        # Filtro temporale: si escludono i file il cui ultimo evento precede la finestra;
+        # negli altri LogSearch salta con una ricerca binaria le righe più vecchie
+        max_age = {"1": 900, "2": 3600, "3": 86400, "4": 7 * 86400}.get(time_filter)
+        since = time.time() - max_age if max_age else None
+        paths = [log['path'] for logs in LogManager.log_inventory().values() for log in logs
+                 if since is None or max(log['last'] or 0, log['mtime']) >= since]
+        
+        index = None
+        if input("Usare l'indice trigrammi (più veloce per ricerche ripetute)? (y/N): ").lower() == 'y':
+            try:
+                index = TrigramIndex()
+                index.prune([log['path'] for logs in LogManager.log_inventory().values() for log in logs])
+                print(f"{Colors.BLUE}🔄 Aggiornamento indice...{Colors.RESET}")
+                updated = index.update(paths)
+                if updated['chunks']:
+                    print(f"   Indicizzati {ProcCollector.format_bytes(updated['bytes'])} "
+                          f"in {updated['files']} file")
+            except OSError as e:
+                print(f"{Colors.YELLOW}⚠️  Indice non disponibile: {e}{Colors.RESET}")
+                index = None
         
-        print(f"\n{Colors.BLUE}🔄 Ricerca in corso...{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command(search_cmd)
+        try:
+            search = LogSearch(search_pattern, ignore_case=not case_sensitive, limit=50, index=index, since=since)
+        except re.error as e:
+            print(f"{Colors.RED}❌ Pattern non valido: {e}{Colors.RESET}")
+            return
         
-        if ret == 0 and out.strip():
-            results = out.strip().split('\n')
-            print(f"\n{Colors.GREEN}✅ Trovate {len(results)} occorrenze:{Colors.RESET}")
-            
-            # Mostra prime 50 risultati
-            for i, result in enumerate(results[:50], 1):
-                if ':' in result:
-                    parts = result.split(':', 2)
-                    if len(parts) >= 3:
-                        file_path = parts[0]
-                        line_num = parts[1] if parts[1].isdigit() else ""
-                        content = parts[2] if len(parts) > 2 else parts[1]
-                        
-                        # Evidenzia il pattern trovato
-                        highlighted = content.replace(search_pattern, f"{Colors.YELLOW}{Colors.BOLD}{search_pattern}{Colors.RESET}")
-                        print(f"{i:3}. {Colors.CYAN}{file_path}{Colors.RESET}:{line_num} - {highlighted}")
-                else:
-                    print(f"{i:3}. {result}")
-            
-            if len(results) > 50:
-                print(f"\n{Colors.YELLOW}... e altri {len(results) - 50} risultati{Colors.RESET}")
-            
-            # Statistiche per file
-            file_counts = {}
-            for result in results:
-                if ':' in result:
-                    file_path = result.split(':', 1)[0]
-                    file_counts[file_path] = file_counts.get(file_path, 0) + 1
-            
-            if file_counts:
-                print(f"\n{Colors.WHITE}📊 Occorrenze per file:{Colors.RESET}")
-                sorted_files = sorted(file_counts.items(), key=lambda x: x[1], reverse=True)
-                for file_path, count in sorted_files[:10]:
-                    print(f"   {count:3} - {file_path}")
+        print(f"\n{Colors.BLUE}🔄 Ricerca in corso in {len(paths)} file...{Colors.RESET}\n")
+        started = time.monotonic()
+        shown = 0
+        try:
+            # Le righe compaiono man mano che i blocchi vengono completati
+            for shown, (file_path, line) in enumerate(search.search(paths), 1):
+                highlighted = search.regex.sub(lambda m: f"{Colors.YELLOW}{Colors.BOLD}{m.group(0)}{Colors.RESET}", line)
+                print(f"{shown:3}. {Colors.CYAN}{file_path}{Colors.RESET} - {highlighted}")
+        except KeyboardInterrupt:
+            print(f"\n{Colors.YELLOW}⚠️  Ricerca interrotta: conteggi parziali{Colors.RESET}")
+        except Exception as e:
+            # Ad esempio un file troncato durante la lettura che fa terminare un processo del pool
+            print(f"\n{Colors.RED}❌ Errore durante la ricerca: {e}{Colors.RESET}")
+        elapsed = time.monotonic() - started
+        
+        if search.total:
+            decompressed = f", {ProcCollector.format_bytes(search.bytes_decompressed)} decompressi" \
+                if search.bytes_decompressed else ""
+            print(f"\n{Colors.GREEN}✅ Trovate {search.total} occorrenze in {len(search.counts)} file "
+                  f"({ProcCollector.format_bytes(search.bytes_scanned)} analizzati{decompressed} "
+                  f"in {elapsed:.1f}s){Colors.RESET}")
+            if search.total > shown:
+                print(f"{Colors.YELLOW}... e altri {search.total - shown} risultati{Colors.RESET}")
         else:
             print(f"{Colors.YELLOW}⚠️  Nessun risultato trovato per '{search_pattern}'{Colors.RESET}")
+        
+        if search.bytes_before_window:
+            print(f"⏱️  Finestra temporale: {ProcCollector.format_bytes(search.bytes_before_window)} "
+                  f"di eventi precedenti saltati senza leggerli")
+        if search.unfiltered:
+            print(f"{Colors.YELLOW}⚠️  {len(search.unfiltered)} file senza timestamp riconosciuti cercati per intero "
+                  f"(risultati anche fuori dalla finestra):{Colors.RESET}")
+            for file_path in sorted(search.unfiltered)[:10]:
+                print(f"   {file_path}")
+        if index is not None:
+            if search.index_bits is None:
+                print(f"{Colors.YELLOW}⚠️  Pattern senza letterali indicizzabili: scansione completa{Colors.RESET}")
+            else:
+                print(f"🗂️  Indice: {ProcCollector.format_bytes(search.bytes_skipped)} saltati, "
+                      f"{ProcCollector.format_bytes(index.size())} su disco "
+                      f"(limite {ProcCollector.format_bytes(index.max_bytes)})")
+            if index.capped:
+                print(f"{Colors.YELLOW}⚠️  Limite dell'indice raggiunto: i byte oltre il limite "
+                      f"vengono letti per intero{Colors.RESET}")
+        
+        if search.total:
+            # Statistiche per file, dal più recente (rotazioni in ordine di età)
+            print(f"\n{Colors.WHITE}📊 Occorrenze per file:{Colors.RESET}")
+            for file_path, count in list(search.counts.items())[:10]:
+                suffix = " (file binario)" if file_path in search.binary else ""
+                print(f"   {count:3} - {file_path}{suffix}")
     
     @staticmethod
     def realtime_analysis():
@@ -1073,7 +5539,7 @@ class LogManager:
         
         print(f"{Colors.WHITE}Seleziona modalità:{Colors.RESET}")
         print("1. 📡 Monitor log di sistema (journalctl -f)")
-        print("2. 🌐 Monitor log web server")
+        print("2. 🌐 Analisi log di accesso web server")
         print("3. 🔒 Monitor log sicurezza")
         print("4. 📧 Monitor log mail")
         print("5. 🗃️  Monitor log personalizzato")
@@ -1086,32 +5552,37 @@ class LogManager:
                 SystemInfo.run_command("journalctl -f", capture_output=False)
             
             elif mode == "2":
-                # Trova log web server
-                web_logs = []
-                for log_path in ["/var/log/apache2/access.log", "/var/log/nginx/access.log", "/var/log/httpd/access_log"]:
-                    ret, out, err = SystemInfo.run_command(f"test -f '{log_path}'")
-                    if ret == 0:
-                        web_logs.append(log_path)
-                
-                if web_logs:
-                    print(f"{Colors.GREEN}🌐 Monitoring web server logs (Ctrl+C per uscire)...{Colors.RESET}")
-                    SystemInfo.run_command(f"tail -f {' '.join(web_logs)}", capture_output=False)
+                log_paths = [log_path for log_path in LogManager.ACCESS_LOGS if os.path.isfile(log_path)]
+                if log_paths:
+                    from_start = input("Includere il contenuto già presente? (y/N): ").lower() == 'y'
+                    LogManager.analyze_access_logs(log_paths, from_start)
                 else:
-                    print(f"{Colors.YELLOW}⚠️  Nessun log web server trovato{Colors.RESET}")
+                    print(f"{Colors.YELLOW}⚠️  Nessun log trovato tra: {', '.join(LogManager.ACCESS_LOGS)}{Colors.RESET}")
             
-            elif mode == "3":
-                print(f"{Colors.GREEN}🔒 Monitoring security logs (Ctrl+C per uscire)...{Colors.RESET}")
-                SystemInfo.run_command("tail -f /var/log/auth.log /var/log/secure 2>/dev/null", capture_output=False)
-            
-            elif mode == "4":
-                print(f"{Colors.GREEN}📧 Monitoring mail logs (Ctrl+C per uscire)...{Colors.RESET}")
-                SystemInfo.run_command("tail -f /var/log/mail.log /var/log/maillog 2>/dev/null", capture_output=False)
+            elif mode in LogManager.REALTIME_SOURCES:
+                title, candidates, categories = LogManager.REALTIME_SOURCES[mode]
+                log_paths = [log_path for log_path in candidates if os.path.isfile(log_path)]
+                if log_paths:
+                    print(f"{Colors.GREEN}{title}{Colors.RESET}")
+                    LogManager.follow_logs(log_paths, categories)
+                else:
+                    print(f"{Colors.YELLOW}⚠️  Nessun log trovato tra: {', '.join(candidates)}{Colors.RESET}")
             
             elif mode == "5":
                 log_path = input(f"{Colors.CYAN}Inserisci percorso log: {Colors.RESET}")
                 if log_path:
-                    print(f"{Colors.GREEN}📄 Monitoring {log_path} (Ctrl+C per uscire)...{Colors.RESET}")
-                    SystemInfo.run_command(f"tail -f '{log_path}'", capture_output=False)
+                    pattern = input(f"{Colors.CYAN}Pattern da evidenziare (regex, vuoto per nessuno): {Colors.RESET}")
+                    categories = {}
+                    if pattern:
+                        try:
+                            re.compile(pattern)
+                        except re.error as e:
+                            print(f"{Colors.RED}❌ Pattern non valido: {e}{Colors.RESET}")
+                            return
+                        categories = {pattern: [pattern]}
+                    show_all = not pattern or input("Mostrare solo le righe che corrispondono? (y/N): ").lower() != 'y'
+                    print(f"{Colors.GREEN}📄 Monitoring {log_path}{Colors.RESET}")
+                    LogManager.follow_logs([log_path], categories, show_all=show_all)
                     
         except KeyboardInterrupt:
             print(f"\n{Colors.GREEN}✅ Monitoring terminato{Colors.RESET}")
@@ -1125,40 +5596,63 @@ class LogManager:
         # Statistiche generali
         print(f"\n{Colors.CYAN}📊 STATISTICHE GENERALI{Colors.RESET}")
         
-        # Conteggio file log
-        ret, out, err = SystemInfo.run_command("find /var/log -name '*.log' -type f | wc -l")
-        if ret == 0:
-            log_count = out.strip()
-            print(f"File .log totali: {log_count}")
-        
-        # Spazio occupato
-        ret, out, err = SystemInfo.run_command("du -sh /var/log")
-        if ret == 0:
-            log_size = out.split()[0]
-            print(f"Spazio occupato da /var/log: {log_size}")
+        # Conteggio file log dall'inventario
+        records = [log for logs in LogManager.log_inventory().values() for log in logs]
+        rotated = [log for log in records if log['rotated']]
+        print(f"File di log totali: {len(records)} ({len(records) - len(rotated)} attivi, {len(rotated)} ruotati, "
+              f"{sum(1 for log in rotated if log['compressed'])} compressi)")
+        print(f"Spazio occupato dai log: {ProcCollector.format_bytes(sum(log['size'] for log in records))}")
+        
+        # Spazio occupato nelle radici dei log, compresi i file non di log (ad esempio il journal)
+        largest = LogManager.largest_files()
+        print(f"Spazio occupato nelle directory di log: {ProcCollector.format_bytes(largest.allocated)} allocati, "
+              f"{ProcCollector.format_bytes(largest.apparent)} apparenti ({largest.files} file)")
+        
+        # Formati e periodo coperto
+        formats = {}
+        for log in records:
+            if log['format']:
+                formats[log['format']] = formats.get(log['format'], 0) + 1
+        if formats:
+            print("Formati timestamp: " + ", ".join(f"{fmt} ({count})" for fmt, count in sorted(formats.items())))
+            first = min(log['first'] for log in records if log['first'])
+            last = max(log['last'] for log in records if log['last'])
+            print(f"Periodo coperto: {datetime.fromtimestamp(first).strftime('%Y-%m-%d %H:%M')} → "
+                  f"{datetime.fromtimestamp(last).strftime('%Y-%m-%d %H:%M')}")
         
         # Log più grandi
-        print(f"\n{Colors.CYAN}📊 LOG PIÙ GRANDI (top 10):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("find /var/log -type f -exec du -h {} + 2>/dev/null | sort -rh | head -10")
-        if ret == 0:
-            print(out)
+        print(f"\n{Colors.CYAN}📊 FILE PIÙ GRANDI (top 10, spazio allocato):{Colors.RESET}")
+        for entry in largest.largest(10):
+            print(LogManager.format_largest(entry))
         
         # Attività recente
         print(f"\n{Colors.CYAN}🕐 ATTIVITÀ RECENTE (file modificati nelle ultime 24h):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("find /var/log -type f -mtime 0 -exec ls -lth {} + 2>/dev/null | head -15")
-        if ret == 0:
-            print(out)
+        since = time.time() - 86400
+        recent = [log for log in records if log['mtime'] >= since]
+        for log in heapq.nlargest(15, recent, key=lambda log: log['mtime']):
+            print(f"{datetime.fromtimestamp(log['mtime']).strftime('%Y-%m-%d %H:%M')}  "
+                  f"{ProcCollector.format_bytes(log['size']):>8}  {log['path']}")
         
-        # Errori comuni nelle ultime 24h
+        # Errori comuni nelle ultime 24h: i cursori persistenti leggono solo i byte nuovi
         print(f"\n{Colors.CYAN}⚠️  ERRORI COMUNI (ultime 24h):{Colors.RESET}")
-        error_patterns = ["error", "Error", "ERROR", "fail", "FAIL", "exception", "Exception"]
-        
-        for pattern in error_patterns[:3]:  # Limita per performance
-            ret, out, err = SystemInfo.run_command(f"find /var/log -type f -mtime 0 -exec grep -l '{pattern}' {{}} + 2>/dev/null | wc -l")
-            if ret == 0:
-                count = out.strip()
-                if int(count) > 0:
-                    print(f"File con '{pattern}': {count}")
+        cursors = LogCursors({pattern: [pattern] for pattern in LogManager.STATISTICS_PATTERNS},
+                             LogCursors.default_path('statistics'), templates=LogManager.STATISTICS_TEMPLATES)
+        updated = cursors.update([log['path'] for log in recent])
+        cursors.save()
+        restarted = f", {updated['restarted']} riletti dopo troncamento" if updated['restarted'] else ""
+        print(f"Analizzati {ProcCollector.format_bytes(updated['bytes'])} nuovi in {updated['files']} file{restarted}")
+        
+        counts, sources = cursors.totals(since)
+        hourly = cursors.hourly(24)
+        for pattern in LogManager.STATISTICS_PATTERNS:
+            if sources[pattern]:
+                print(f"File con '{pattern}': {len(sources[pattern])} ({counts[pattern]} righe)  "
+                      f"{MetricStore.render_sparkline(hourly[pattern])}")
+        
+        templates = cursors.file_templates()
+        if templates:
+            print(f"\n{Colors.CYAN}🧩 TEMPLATE DI ERRORE PIÙ FREQUENTI:{Colors.RESET}")
+            LogManager.print_templates(templates)
     
     @staticmethod
     def search_common_errors():
@@ -1186,12 +5680,10 @@ class LogManager:
             
             if choice == len(categories) + 1:
                 # Cerca tutti gli errori
-                search_patterns = []
-                for patterns in error_patterns.values():
-                    search_patterns.extend(patterns)
+                selected = error_patterns
             elif 1 <= choice <= len(categories):
                 selected_category = categories[choice - 1]
-                search_patterns = error_patterns[selected_category]
+                selected = {selected_category: error_patterns[selected_category]}
                 print(f"\n{Colors.GREEN}🔍 Ricerca: {selected_category}{Colors.RESET}")
             else:
                 print(f"{Colors.RED}❌ Selezione non valida{Colors.RESET}")
@@ -1201,39 +5693,38 @@ class LogManager:
             print(f"{Colors.RED}❌ Input non valido{Colors.RESET}")
             return
         
-        # Esegui ricerca per ogni pattern
-        all_results = {}
-        for pattern in search_patterns:
-            print(f"\n{Colors.BLUE}🔍 Ricerca '{pattern}'...{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command(f"grep -ri '{pattern}' /var/log/*.log 2>/dev/null | head -20")
-            
-            if ret == 0 and out.strip():
-                results = out.strip().split('\n')
-                all_results[pattern] = results
-                
-                print(f"{Colors.GREEN}✅ Trovate {len(results)} occorrenze per '{pattern}'{Colors.RESET}")
-                
-                # Mostra prime 5 per questo pattern
-                for i, result in enumerate(results[:5], 1):
-                    if ':' in result:
-                        parts = result.split(':', 2)
-                        if len(parts) >= 2:
-                            file_path = parts[0]
-                            content = parts[-1].strip()
-                            print(f"  {i}. {Colors.CYAN}{file_path}{Colors.RESET}: {content}")
-                
-                if len(results) > 5:
-                    print(f"    ... e altri {len(results) - 5} risultati")
+        include_rotated = input(f"Includere le rotazioni, anche compresse? (y/N): ").lower() == 'y'
+        
+        # Una sola lettura dei log per tutte le categorie selezionate
+        paths = [log['path'] for logs in LogManager.log_inventory().values() for log in logs
+                 if include_rotated or not log['rotated']]
+        print(f"\n{Colors.BLUE}🔍 Analisi di {len(paths)} file...{Colors.RESET}")
+        matcher = MultiPatternMatcher(selected, max_samples=5, templates=True)
+        matcher.scan_files(paths)
+        
+        for category, count in matcher.counts.items():
+            if not count:
+                continue
+            print(f"\n{Colors.GREEN}✅ {category}: {count} occorrenze{Colors.RESET}")
+            for i, (file_path, content) in enumerate(matcher.samples[category], 1):
+                print(f"  {i}. {Colors.CYAN}{file_path}{Colors.RESET}: {content[:LogSearch.DISPLAY_WIDTH]}")
+            if count > len(matcher.samples[category]):
+                print(f"    ... e altri {count - len(matcher.samples[category])} risultati")
+        
+        # Righe quasi identiche (diverse solo per PID, IP, numeri) raggruppate per file
+        if matcher.templates:
+            print(f"\n{Colors.WHITE}🧩 TEMPLATE PIÙ FREQUENTI PER FILE:{Colors.RESET}")
+            LogManager.print_templates(matcher.templates)
         
         # Riepilogo
-        if all_results:
+        if any(matcher.counts.values()):
             print(f"\n{Colors.WHITE}📊 RIEPILOGO ERRORI TROVATI:{Colors.RESET}")
-            total_errors = sum(len(results) for results in all_results.values())
-            print(f"Totale errori: {total_errors}")
+            print(f"Righe analizzate: {matcher.lines}")
+            print(f"Totale errori: {sum(matcher.counts.values())}")
             
-            for pattern, results in all_results.items():
-                if results:
-                    print(f"  • {pattern}: {len(results)} occorrenze")
+            for pattern, count in matcher.pattern_counts.items():
+                if count:
+                    print(f"  • {pattern}: {count} occorrenze")
         else:
             print(f"\n{Colors.GREEN}✅ Nessun errore trovato per i pattern specificati{Colors.RESET}")
     
@@ -1274,12 +5765,20 @@ class LogManager:
         else:
             print("Informazioni rotazione non disponibili")
         
+        records = [log for logs in LogManager.log_inventory().values() for log in logs]
+        
+        # Rotazioni rilevate dall'inventario (cambio di inode o troncamento)
+        rotations = sorted((log for log in records if log.get('rotated_at')),
+                           key=lambda log: log['rotated_at'], reverse=True)
+        if rotations:
+            print(f"\n{Colors.CYAN}🔄 ROTAZIONI RILEVATE:{Colors.RESET}")
+            for log in rotations[:15]:
+                print(f"{datetime.fromtimestamp(log['rotated_at']).strftime('%Y-%m-%d %H:%M')}  "
+                      f"{log['path']} (rotazioni osservate: {log['rotations']})")
+        
         # Analisi log grandi che potrebbero necessitare rotazione
         print(f"\n{Colors.CYAN}🔍 LOG GRANDI (>100MB):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("find /var/log -type f -size +100M -exec ls -lh {} + 2>/dev/null")
-        if ret == 0 and out.strip():
-            print(out)
-        else:
+        if not LogManager.print_large_logs(100 * 1024 * 1024):
             print(f"{Colors.GREEN}✅ Nessun log file superiore a 100MB{Colors.RESET}")
         
         # Test configurazione logrotate
@@ -1299,10 +5798,9 @@ class LogManager:
                     print(f"{Colors.RED}❌ Errori nella configurazione: {err}{Colors.RESET}")
             
             elif test_choice == "2":
-                ret, out, err = SystemInfo.run_command("logrotate -d -f /etc/logrotate.conf | head -50")
-                if ret == 0:
-                    print(f"{Colors.WHITE}Simulazione rotazione forzata:{Colors.RESET}")
-                    print(out)
+                print(f"{Colors.WHITE}Simulazione rotazione forzata:{Colors.RESET}")
+                for line in SystemInfo.stream_command(["logrotate", "-d", "-f", "/etc/logrotate.conf"], max_lines=50):
+                    print(line)
         else:
             print(f"\n{Colors.YELLOW}⚠️  Privilegi di root richiesti per test configurazione{Colors.RESET}")
 
@@ -1342,45 +5840,44 @@ class SystemAuditManager:
         
         if choice == "1":
             print(f"\n{Colors.WHITE}📄 Ultime 50 entry del sistema:{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command("journalctl -n 50 --no-pager")
-            if ret == 0:
-                print(out)
-            else:
-                print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
+            stream = SystemInfo.stream_command(["journalctl", "-n", "50", "--no-pager"])
+            for line in stream:
+                print(line)
+            if stream.returncode != 0:
+                print(f"{Colors.RED}❌ Errore: {stream.stderr.strip()}{Colors.RESET}")
         
         elif choice == "2":
             print(f"\n{Colors.WHITE}📅 Log di oggi:{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command("journalctl --since today --no-pager")
-            if ret == 0:
-                lines = out.split('\n')
-                if len(lines) > 100:
-                    print('\n'.join(lines[:50]))
-                    print(f"\n{Colors.YELLOW}... [mostrate prime 50 righe di {len(lines)}]{Colors.RESET}")
-                else:
-                    print(out)
-            else:
-                print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
+            # Il journal di oggi può essere enorme: si leggono solo le righe mostrate
+            stream = SystemInfo.stream_command(["journalctl", "--since", "today", "--no-pager"], max_lines=50)
+            for line in stream:
+                print(line)
+            if stream.truncated:
+                print(f"\n{Colors.YELLOW}... [mostrate prime 50 righe]{Colors.RESET}")
+            elif stream.returncode != 0:
+                print(f"{Colors.RED}❌ Errore: {stream.stderr.strip()}{Colors.RESET}")
         
         elif choice == "3":
             print(f"\n{Colors.WHITE}⚠️  Errori di sistema:{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command("journalctl -p err --no-pager -n 100")
-            if ret == 0:
-                if out.strip():
-                    print(out)
-                else:
-                    print(f"{Colors.GREEN}✅ Nessun errore recente trovato{Colors.RESET}")
-            else:
-                print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
+            stream = SystemInfo.stream_command(["journalctl", "-p", "err", "--no-pager", "-n", "100"])
+            found = False
+            for line in stream:
+                print(line)
+                found = True
+            if stream.returncode != 0:
+                print(f"{Colors.RED}❌ Errore: {stream.stderr.strip()}{Colors.RESET}")
+            elif not found:
+                print(f"{Colors.GREEN}✅ Nessun errore recente trovato{Colors.RESET}")
         
         elif choice == "4":
             service_name = input(f"{Colors.CYAN}Nome del servizio: {Colors.RESET}")
             if service_name:
                 print(f"\n{Colors.WHITE}📋 Log per servizio '{service_name}':{Colors.RESET}")
-                ret, out, err = SystemInfo.run_command(f"journalctl -u {service_name} --no-pager -n 50")
-                if ret == 0:
-                    print(out)
-                else:
-                    print(f"{Colors.RED}❌ Errore: {err}{Colors.RESET}")
+                stream = SystemInfo.stream_command(["journalctl", "-u", service_name, "--no-pager", "-n", "50"])
+                for line in stream:
+                    print(line)
+                if stream.returncode != 0:
+                    print(f"{Colors.RED}❌ Errore: {stream.stderr.strip()}{Colors.RESET}")
         
         elif choice == "5":
             print(f"{Colors.GREEN}📡 Monitoring real-time (Ctrl+C per uscire)...{Colors.RESET}")
@@ -1389,56 +5886,61 @@ class SystemAuditManager:
             except KeyboardInterrupt:
                 print(f"\n{Colors.GREEN}✅ Monitoring terminato{Colors.RESET}")
     
+    @staticmethod
+    def journal_aggregate() -> 'JournalAggregator':
+        """Journal delle ultime 24h aggregato con un'unica lettura (con cache)
+        
+        Condiviso da autenticazione, eventi critici, statistiche e report audit.
+        Lo stato è persistente: ogni lettura parte dal cursore della precedente.
+        """
+        return SystemInfo.CACHE.cached('journal', 'aggregate_24h', lambda: JournalAggregator(
+            path=JournalAggregator.default_path('audit')).collect())
+    
     @staticmethod
     def auth_logs():
         """Analizza log di autenticazione"""
         print(f"\n{Colors.BLUE}{Colors.BOLD}🔐 LOG DI AUTENTICAZIONE{Colors.RESET}")
         print("=" * 60)
         
+        journal = SystemAuditManager.journal_aggregate()
+        if journal.error:
+            print(f"{Colors.YELLOW}⚠️  Journal non disponibile: {journal.error}{Colors.RESET}")
+        
         # Login riusciti
         print(f"\n{Colors.CYAN}✅ LOGIN RIUSCITI (ultime 24h):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl --since '24 hours ago' | grep -i 'session opened' | tail -20")
-        if ret == 0 and out.strip():
-            for line in out.split('\n'):
-                if line.strip():
-                    print(f"  {line}")
+        if journal.sessions:
+            for _, line in journal.sessions:
+                print(f"  {line}")
         else:
             print("Nessun login recente trovato")
         
         # Tentativi di login falliti
         print(f"\n{Colors.YELLOW}❌ TENTATIVI FALLITI:{Colors.RESET}")
-        failed_patterns = ["authentication failure", "failed login", "invalid user", "failed password"]
-        
-        for pattern in failed_patterns:
-            ret, out, err = SystemInfo.run_command(f"journalctl --since '24 hours ago' | grep -i '{pattern}' | wc -l")
-            if ret == 0 and out.strip():
-                count = int(out.strip())
-                if count > 0:
-                    print(f"  {pattern}: {count} tentativi")
-                    
-                    # Mostra alcuni esempi
-                    ret2, out2, err2 = SystemInfo.run_command(f"journalctl --since '24 hours ago' | grep -i '{pattern}' | head -3")
-                    if ret2 == 0 and out2.strip():
-                        for line in out2.split('\n')[:3]:
-                            if line.strip():
-                                print(f"    → {line}")
+        for pattern in JournalAggregator.AUTH_FAILURES:
+            count = journal.events[pattern]
+            if count > 0:
+                print(f"  {pattern}: {count} tentativi")
+                
+                # Mostra alcuni esempi
+                for _, line in journal.samples[pattern]:
+                    print(f"    → {line}")
         
         # Utenti più attivi
         print(f"\n{Colors.CYAN}👥 UTENTI PIÙ ATTIVI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl --since '24 hours ago' | grep 'session opened' | awk '{print $6}' | sort | uniq -c | sort -rn | head -10")
-        if ret == 0 and out.strip():
+        users = journal.top_users()
+        if users:
             print("Count  User")
             print("=" * 15)
-            print(out)
+            for user, count in users:
+                print(f"{count:5}  {user}")
         
         # Connessioni SSH
         print(f"\n{Colors.CYAN}🔗 CONNESSIONI SSH:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl -u ssh --since '24 hours ago' | grep -E '(Accepted|Failed)' | tail -15")
-        if ret == 0 and out.strip():
-            for line in out.split('\n'):
+        if journal.ssh:
+            for _, line in list(journal.ssh)[-15:]:
                 if 'Accepted' in line:
                     print(f"{Colors.GREEN}  ✅ {line}{Colors.RESET}")
-                elif 'Failed' in line:
+                else:
                     print(f"{Colors.RED}  ❌ {line}{Colors.RESET}")
         else:
             print("Nessuna attività SSH recente")
@@ -1456,9 +5958,9 @@ class SystemAuditManager:
             
             # Log audit recenti
             print(f"\n{Colors.CYAN}📋 LOG AUDIT RECENTI:{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command("ausearch -ts today 2>/dev/null | head -20")
-            if ret == 0 and out.strip():
-                print(out)
+            events = SystemInfo.stream_command(["ausearch", "-ts", "today"], max_lines=20).lines()
+            if events:
+                print('\n'.join(events))
             else:
                 print("Nessun evento audit recente")
             
@@ -1539,21 +6041,23 @@ class SystemAuditManager:
         
         # Comandi sudo recenti
         print(f"\n{Colors.CYAN}⚡ COMANDI SUDO RECENTI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl | grep sudo | tail -10")
-        if ret == 0 and out.strip():
-            for line in out.split('\n'):
-                if 'sudo' in line.lower():
-                    print(f"  {line}")
+        # Filtro nativo del journal: evita di decodificare l'intero journal
+        sudo_lines = SystemInfo.stream_command(["journalctl", "_COMM=sudo", "-n", "10", "--no-pager"]).lines()
+        sudo_lines = [line for line in sudo_lines if 'sudo' in line.lower()]
+        if sudo_lines:
+            for line in sudo_lines:
+                print(f"  {line}")
         else:
             print("Nessun comando sudo recente trovato")
         
         # File di configurazione utenti modificati di recente
         print(f"\n{Colors.CYAN}📝 FILE UTENTI MODIFICATI (ultime 24h):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("find /home -name '.*' -mtime 0 -type f 2>/dev/null | head -10")
-        if ret == 0 and out.strip():
-            for line in out.split('\n'):
-                if line.strip():
-                    print(f"  {line}")
+        recent_files = SystemInfo.stream_command(
+            ["find", "/home", "-name", ".*", "-mtime", "0", "-type", "f"], max_lines=10
+        ).lines()
+        if recent_files:
+            for line in recent_files:
+                print(f"  {line}")
         else:
             print("Nessun file utente modificato recentemente")
     
@@ -1565,32 +6069,28 @@ class SystemAuditManager:
         
         # Informazioni ultimo boot
         print(f"\n{Colors.CYAN}🚀 INFORMAZIONI ULTIMO BOOT:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl -b 0 | head -20")
-        if ret == 0:
-            print(out)
+        for line in SystemInfo.stream_command(["journalctl", "-b", "0", "--no-pager"], max_lines=20):
+            print(line)
         
         # Messaggi kernel
         print(f"\n{Colors.CYAN}🐧 MESSAGGI KERNEL RECENTI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("dmesg | tail -15")
-        if ret == 0:
-            print(out)
+        for line in deque(SystemInfo.stream_command(["dmesg"]), maxlen=15):
+            print(line)
         
         # Errori di boot
         print(f"\n{Colors.CYAN}❌ ERRORI DI BOOT:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl -b 0 -p err --no-pager")
-        if ret == 0 and out.strip():
-            lines = out.split('\n')
-            if len(lines) > 20:
-                print('\n'.join(lines[:20]))
-                print(f"\n{Colors.YELLOW}... [mostrate prime 20 righe di {len(lines)}]{Colors.RESET}")
-            else:
-                print(out)
+        stream = SystemInfo.stream_command(["journalctl", "-b", "0", "-p", "err", "--no-pager"], max_lines=20)
+        lines = stream.lines()
+        if lines:
+            print('\n'.join(lines))
+            if stream.truncated:
+                print(f"\n{Colors.YELLOW}... [mostrate prime 20 righe]{Colors.RESET}")
         else:
             print(f"{Colors.GREEN}✅ Nessun errore di boot trovato{Colors.RESET}")
         
         # Servizi falliti
         print(f"\n{Colors.CYAN}💥 SERVIZI FALLITI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("systemctl --failed --no-pager")
+        ret, out, err = SystemInfo.run_command("systemctl --failed --no-pager", cache='services')
         if ret == 0:
             if "0 loaded units" in out:
                 print(f"{Colors.GREEN}✅ Nessun servizio fallito{Colors.RESET}")
@@ -1599,11 +6099,14 @@ class SystemAuditManager:
         
         # Hardware detection
         print(f"\n{Colors.CYAN}🔌 RILEVAMENTO HARDWARE:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("dmesg | grep -E '(USB|PCI|SATA|eth|wlan)' | tail -10")
-        if ret == 0 and out.strip():
-            for line in out.split('\n'):
-                if line.strip():
-                    print(f"  {line}")
+        hardware = re.compile(r'(USB|PCI|SATA|eth|wlan)')
+        hardware_lines = deque(
+            (line for line in SystemInfo.stream_command(["dmesg"]) if hardware.search(line)),
+            maxlen=10
+        )
+        for line in hardware_lines:
+            if line.strip():
+                print(f"  {line}")
     
     @staticmethod
     def critical_events():
@@ -1611,36 +6114,25 @@ class SystemAuditManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}⚠️  ANALISI EVENTI CRITICI{Colors.RESET}")
         print("=" * 60)
         
-        # Eventi critici nelle ultime 24h
-        critical_patterns = [
-            ("Kernel Panic", "kernel panic"),
-            ("Out of Memory", "out of memory"),
-            ("Disk Full", "no space left"),
-            ("Hardware Error", "hardware error"),
-            ("System Crash", "segmentation fault"),
-            ("Network Error", "network unreachable"),
-            ("Authentication Failure", "authentication failure")
-        ]
-        
         print(f"{Colors.WHITE}🔍 Ricerca eventi critici (ultime 24h):{Colors.RESET}")
         
+        # Eventi critici nelle ultime 24h dalla lettura condivisa del journal
+        journal = SystemAuditManager.journal_aggregate()
+        if journal.error:
+            print(f"{Colors.YELLOW}⚠️  Journal non disponibile: {journal.error}{Colors.RESET}")
+        
         found_critical = False
-        for event_name, pattern in critical_patterns:
-            ret, out, err = SystemInfo.run_command(f"journalctl --since '24 hours ago' | grep -i '{pattern}' | wc -l")
-            if ret == 0:
-                count = int(out.strip())
-                if count > 0:
-                    found_critical = True
-                    print(f"\n{Colors.RED}🚨 {event_name}: {count} occorrenze{Colors.RESET}")
-                    
-                    # Mostra esempi
-                    ret2, out2, err2 = SystemInfo.run_command(f"journalctl --since '24 hours ago' | grep -i '{pattern}' | head -3")
-                    if ret2 == 0 and out2.strip():
-                        for line in out2.split('\n')[:3]:
-                            if line.strip():
-                                print(f"  → {line}")
-        
-        if not found_critical:
+        for event_name in JournalAggregator.CRITICAL_EVENTS:
+            count = journal.events[event_name]
+            if count > 0:
+                found_critical = True
+                print(f"\n{Colors.RED}🚨 {event_name}: {count} occorrenze{Colors.RESET}")
+                
+                # Mostra esempi
+                for _, line in journal.samples[event_name]:
+                    print(f"  → {line}")
+        
+        if not found_critical and not journal.error:
             print(f"{Colors.GREEN}✅ Nessun evento critico rilevato nelle ultime 24h{Colors.RESET}")
         
         # Controlli aggiuntivi
@@ -1705,30 +6197,40 @@ class SystemAuditManager:
             "debug": "Debug"
         }
         
+        journal = SystemAuditManager.journal_aggregate()
+        if journal.error:
+            print(f"{Colors.YELLOW}⚠️  Journal non disponibile: {journal.error}{Colors.RESET}")
+        else:
+            print(f"Voci del journal (ultime 24h): {journal.entries}, {journal.new_entries} lette dall'ultima analisi")
+        notices = {
+            'boot': "🔄 Riavvio rilevato dall'ultima analisi",
+            'vacuumed': "✂️  Cursore non più presente nel journal (vacuum o journal volatile): "
+                        "lettura ripresa dalla posizione più vicina",
+            'reset': "⚠️  Cursore rifiutato da journalctl: lettura ripresa dall'ultima voce contata",
+        }
+        for notice in journal.notices:
+            print(f"{Colors.YELLOW}{notices[notice]}{Colors.RESET}")
+        
         print(f"\n{Colors.WHITE}📊 MESSAGGI PER PRIORITÀ (ultime 24h):{Colors.RESET}")
         for level, description in priorities.items():
-            ret, out, err = SystemInfo.run_command(f"journalctl --since '24 hours ago' -p {level} | wc -l")
-            if ret == 0:
-                count = int(out.strip())
-                if count > 0:
-                    if level in ["emerg", "alert", "crit"]:
-                        color = Colors.RED
-                    elif level in ["err", "warning"]:
-                        color = Colors.YELLOW
-                    else:
-                        color = Colors.GREEN
-                    print(f"  {color}{description:10}: {count:6}{Colors.RESET}")
+            count = journal.priorities[level]
+            if count > 0:
+                if level in ["emerg", "alert", "crit"]:
+                    color = Colors.RED
+                elif level in ["err", "warning"]:
+                    color = Colors.YELLOW
+                else:
+                    color = Colors.GREEN
+                print(f"  {color}{description:10}: {count:6}{Colors.RESET}")
         
-        # Top servizi per numero di log
+        # Top servizi per numero di log (unità systemd o, in mancanza, identificatore syslog)
         print(f"\n{Colors.CYAN}🔝 SERVIZI PIÙ VERBOSI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("journalctl --since '24 hours ago' -o json | jq -r '._SYSTEMD_UNIT' 2>/dev/null | grep -v null | sort | uniq -c | sort -rn | head -10")
-        if ret != 0:  # Fallback se jq non è disponibile
-            ret, out, err = SystemInfo.run_command("journalctl --since '24 hours ago' | awk '{print $5}' | sort | uniq -c | sort -rn | head -10")
-        
-        if ret == 0 and out.strip():
+        units = journal.top_units()
+        if units:
             print("Count   Service")
             print("=" * 25)
-            print(out)
+            for unit, count in units:
+                print(f"{count:6}  {unit}")
         
         # Uptime e boot history
         print(f"\n{Colors.CYAN}🕐 INFORMAZIONI TEMPORALI:{Colors.RESET}")
@@ -1751,73 +6253,63 @@ class SystemAuditManager:
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"🕐 Report generato: {current_time}")
         
+        # Tutte le sezioni vengono raccolte in parallelo, ognuna con il suo timeout
+        data = AsyncCollector.collect(['system', 'audit', 'security', 'services', 'network'])
+        system, audit, security = data['system'], data['audit'], data['security']
+        services, network = data['services'], data['network']
+        
         # Sommario sistema
         print(f"\n{Colors.CYAN}💻 SOMMARIO SISTEMA:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("uname -a")
-        if ret == 0:
-            print(f"Sistema: {out.strip()}")
-        
-        ret, out, err = SystemInfo.run_command("uptime")
-        if ret == 0:
-            print(f"Uptime: {out.strip()}")
+        if system.get('uname'):
+            print(f"Sistema: {system['uname']}")
+        if system.get('uptime'):
+            print(f"Uptime: {system['uptime']}")
         
         # Conteggio eventi per categoria
         print(f"\n{Colors.CYAN}📊 EVENTI SISTEMA (24h):{Colors.RESET}")
-        
-        event_categories = [
-            ("Login riusciti", "journalctl --since '24 hours ago' | grep -i 'session opened' | wc -l"),
-            ("Tentativi login falliti", "journalctl --since '24 hours ago' | grep -i 'authentication failure' | wc -l"),
-            ("Comandi sudo", "journalctl --since '24 hours ago' | grep -i sudo | wc -l"),
-            ("Errori sistema", "journalctl --since '24 hours ago' -p err | wc -l"),
-            ("Warning", "journalctl --since '24 hours ago' -p warning | wc -l"),
-        ]
-        
-        for category, command in event_categories:
-            ret, out, err = SystemInfo.run_command(command)
-            if ret == 0:
-                count = out.strip()
-                print(f"  {category:20}: {count}")
+        if 'error' in audit:
+            print(f"{Colors.YELLOW}⚠️  Eventi non disponibili: {audit['error']}{Colors.RESET}")
+        else:
+            event_categories = [
+                ("Login riusciti", 'sessions_opened'),
+                ("Tentativi login falliti", 'auth_failures'),
+                ("Comandi sudo", 'sudo'),
+                ("Errori sistema", 'errors'),
+                ("Warning", 'warnings'),
+            ]
+            for category, key in event_categories:
+                print(f"  {category:20}: {audit[key]}")
         
         # Riepilogo sicurezza
         print(f"\n{Colors.CYAN}🔒 RIEPILOGO SICUREZZA:{Colors.RESET}")
-        
-        # Utenti con privilegi
-        ret, out, err = SystemInfo.run_command("getent group sudo | cut -d: -f4 | tr ',' '\n' | wc -l")
-        if ret == 0:
-            sudo_count = out.strip()
-            print(f"  Utenti con sudo: {sudo_count}")
-        
-        # Servizi attivi
-        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=active | wc -l")
-        if ret == 0:
-            active_services = int(out.strip()) - 1  # Rimuovi header
-            print(f"  Servizi attivi: {active_services}")
-        
-        # Porte aperte
-        ret, out, err = SystemInfo.run_command("ss -tuln | grep LISTEN | wc -l")
-        if ret == 0:
-            open_ports = out.strip()
-            print(f"  Porte in ascolto: {open_ports}")
+        if 'error' not in security:
+            print(f"  Utenti con sudo: {len(security['sudo_users'])}")
+        if 'error' not in services:
+            print(f"  Servizi attivi: {services['active_count']}")
+        if 'error' not in network:
+            print(f"  Porte in ascolto: {network['listening_ports']}")
         
         # Raccomandazioni
         print(f"\n{Colors.CYAN}💡 RACCOMANDAZIONI:{Colors.RESET}")
         recommendations = []
         
         # Controlla log grandi
-        ret, out, err = SystemInfo.run_command("find /var/log -name '*.log' -size +100M | wc -l")
-        if ret == 0 and int(out.strip()) > 0:
+        if security.get('has_big_logs'):
             recommendations.append("Considera la rotazione dei log grandi (>100MB)")
         
         # Controlla servizi falliti
-        ret, out, err = SystemInfo.run_command("systemctl --failed --quiet")
-        if ret != 0:  # Ha servizi falliti
+        if security.get('has_failed_services'):
             recommendations.append("Verifica e ripara servizi falliti")
         
         # Controlla errori recenti
-        ret, out, err = SystemInfo.run_command("journalctl --since '24 hours ago' -p err | wc -l")
-        if ret == 0 and int(out.strip()) > 10:
+        if audit.get('errors', 0) > 10:
             recommendations.append("Investiga errori di sistema frequenti")
         
+        # Sezioni non completate
+        for name, section in data.items():
+            if 'error' in section:
+                recommendations.append(f"Sezione '{name}' incompleta: {section['error']}")
+        
         if recommendations:
             for i, rec in enumerate(recommendations, 1):
                 print(f"  {i}. {rec}")
@@ -1843,71 +6335,112 @@ class SystemMonitor:
         print(f"0. ↩️  Torna al menu principale")
         print(f"{Colors.RESET}")
     
+    # Intervallo di refresh predefinito (secondi) per l'overview in tempo reale
+    REFRESH_INTERVAL = 3.0
+    
     @staticmethod
-    def system_overview():
-        """Overview sistema in tempo reale"""
+    def record_metrics(cpu: Dict, load_avg: List[float], memory: Dict, disk: Dict):
+        """Registra un campione delle metriche principali in SystemInfo.METRICS"""
+        now = time.time()
+        if cpu.get('cpu'):
+            SystemInfo.METRICS.add('cpu.busy', cpu['cpu']['busy'], now)
+            SystemInfo.METRICS.add('cpu.iowait', cpu['cpu']['iowait'], now)
+        if load_avg:
+            SystemInfo.METRICS.add('load.1m', load_avg[0], now)
+        if memory:
+            SystemInfo.METRICS.add('memory.used_percent', memory['used'] * 100.0 / memory['total'], now)
+        if disk:
+            SystemInfo.METRICS.add('disk.root_percent', disk['used'] * 100.0 / disk['total'], now)
+    
+    @staticmethod
+    def print_trends(names: List[str], window: float):
+        """Sparkline e min/media/max delle metriche indicate"""
+        for name in names:
+            stats = SystemInfo.METRICS.stats(name, window)
+            if stats:
+                print(f"  {name:20} {SystemInfo.METRICS.sparkline(name, window, 30):30} "
+                      f"min {stats['min']:6.1f}  avg {stats['avg']:6.1f}  max {stats['max']:6.1f}")
+    
+    @staticmethod
+    def system_overview(interval: Optional[float] = None):
+        """Overview sistema in tempo reale (fino a Ctrl+C)"""
         print(f"\n{Colors.BLUE}{Colors.BOLD}💻 OVERVIEW SISTEMA TEMPO REALE{Colors.RESET}")
         print("=" * 60)
         
-        for i in range(10):  # 10 refresh invece di infinito
-            # Clear screen per refresh
-            os.system('clear')
-            print(f"\n{Colors.BLUE}{Colors.BOLD}💻 OVERVIEW SISTEMA TEMPO REALE{Colors.RESET}")
-            print("=" * 60)
-            print(f"{Colors.YELLOW}⚠️  Refresh automatico ({10-i} rimanenti) - Ctrl+C per uscire{Colors.RESET}")
-            print()
-            
-            # Timestamp
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"🕐 Aggiornamento: {current_time}")
-            print()
-            
-            # CPU
-            ret, out, err = SystemInfo.run_command("top -bn1 | grep 'Cpu(s)' | awk '{print $2}' | sed 's/%us,//'")
-            if ret == 0:
-                cpu_usage = out.strip()
-                print(f"🧠 CPU: {cpu_usage}%")
-            
-            # Load Average
-            ret, out, err = SystemInfo.run_command("uptime | awk -F'load average:' '{ print $2 }'")
-            if ret == 0:
-                load_avg = out.strip()
-                print(f"📊 Load Average:{load_avg}")
-            
-            # Memoria
-            ret, out, err = SystemInfo.run_command("free -m | awk 'NR==2{printf \"%.1f%% (%s/%s MB)\", $3*100/$2, $3, $2}'")
-            if ret == 0:
-                mem_info = out.strip()
-                print(f"💾 Memoria: {mem_info}")
-            
-            # Disco
-            ret, out, err = SystemInfo.run_command("df -h / | awk 'NR==2{printf \"%s/%s (%s)\", $3, $2, $5}'")
-            if ret == 0:
-                disk_info = out.strip()
-                print(f"💽 Disco /: {disk_info}")
-            
-            # Processi top CPU
-            print(f"\n{Colors.CYAN}🔥 TOP 5 PROCESSI CPU:{Colors.RESET}")
-            ret, out, err = SystemInfo.run_command("ps aux --sort=-%cpu | head -6")
-            if ret == 0:
-                lines = out.split('\n')[1:6]  # Skip header
-                for line in lines:
-                    if line.strip():
-                        parts = line.split()
-                        if len(parts) >= 11:
-                            user = parts[0]
-                            cpu = parts[2]
-                            mem = parts[3]
-                            command = ' '.join(parts[10:])[:40]
-                            print(f"  {user:8} {cpu:5}% {mem:5}% {command}")
-            
+        if interval is None:
+            value = input(f"{Colors.CYAN}Intervallo di refresh in secondi [{SystemMonitor.REFRESH_INTERVAL:g}]: {Colors.RESET}").strip()
             try:
-                time.sleep(3)
-            except KeyboardInterrupt:
-                print(f"\n{Colors.GREEN}✅ Monitoring terminato{Colors.RESET}")
-                return
+                interval = float(value) if value else SystemMonitor.REFRESH_INTERVAL
+            except ValueError:
+                interval = SystemMonitor.REFRESH_INTERVAL
+        interval = max(interval, 0.2)
         
-        print(f"\n{Colors.GREEN}✅ Monitoring completato{Colors.RESET}")
+        sampler = CpuSampler()
+        sampler.sample()
+        scanner = ProcessScanner()
+        scanner.scan()
+        next_refresh = time.monotonic() + min(interval, 0.5)
+        
+        try:
+            while True:
+                # Attesa senza deriva: il ritardo del rendering non si accumula
+                time.sleep(max(next_refresh - time.monotonic(), 0))
+                next_refresh += interval
+                cpu = sampler.sample()
+                
+                # Clear screen per refresh (sequenza ANSI, senza fork di clear)
+                print("\033[H\033[2J", end="")
+                print(f"\n{Colors.BLUE}{Colors.BOLD}💻 OVERVIEW SISTEMA TEMPO REALE{Colors.RESET}")
+                print("=" * 60)
+                print(f"{Colors.YELLOW}⚠️  Refresh ogni {interval:g}s - Ctrl+C per uscire{Colors.RESET}")
+                print()
+                
+                # Timestamp
+                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"🕐 Aggiornamento: {current_time}")
+                print()
+                
+                # CPU
+                total = cpu.get('cpu')
+                if total:
+                    print(f"🧠 CPU: {total['busy']:.1f}% (user {total['user']:.1f}% | sys {total['system']:.1f}% | "
+                          f"iowait {total['iowait']:.1f}% | steal {total['steal']:.1f}% | irq {total['irq']:.1f}%)")
+                    cores = sorted((name for name in cpu if name != 'cpu'), key=lambda name: int(name[3:]))
+                    for start in range(0, len(cores), 4):
+                        print("   " + "  ".join(f"{name:>6} {cpu[name]['busy']:5.1f}%" for name in cores[start:start + 4]))
+                
+                # Load Average
+                load_avg = ProcCollector.load_average()
+                if load_avg:
+                    print(f"📊 Load Average: {', '.join(f'{value:.2f}' for value in load_avg)}")
+                
+                # Memoria
+                memory = ProcCollector.memory()
+                if memory:
+                    print(f"💾 Memoria: {memory['used'] * 100.0 / memory['total']:.1f}% "
+                          f"({memory['used'] // 1048576}/{memory['total'] // 1048576} MB)")
+                
+                # Disco
+                disk = ProcCollector.disk_usage("/")
+                if disk:
+                    print(f"💽 Disco /: {ProcCollector.format_bytes(disk['used'])}/"
+                          f"{ProcCollector.format_bytes(disk['total'])} ({disk['percent']}%)")
+                
+                # Storico: alimenta l'archivio metriche e mostra l'andamento
+                SystemMonitor.record_metrics(cpu, load_avg, memory, disk)
+                print(f"\n{Colors.CYAN}📈 ANDAMENTO (ultimi 10 minuti):{Colors.RESET}")
+                SystemMonitor.print_trends(['cpu.busy', 'memory.used_percent', 'load.1m'], 600)
+                
+                # Processi top CPU (nell'intervallo appena trascorso)
+                print(f"\n{Colors.CYAN}🔥 TOP 5 PROCESSI CPU:{Colors.RESET}")
+                for process in scanner.top(5, 'cpu'):
+                    print(f"  {process['user'][:8]:8} {process['cpu']:5.1f}% {process['mem']:5.1f}% {process['command'][:40]}")
+                
+                # Se il rendering ha superato l'intervallo si salta al prossimo tick
+                if next_refresh < time.monotonic():
+                    next_refresh = time.monotonic() + interval
+        except KeyboardInterrupt:
+            print(f"\n{Colors.GREEN}✅ Monitoring terminato{Colors.RESET}")
     
     @staticmethod
     def cpu_monitoring():
@@ -1921,11 +6454,13 @@ class SystemMonitor:
         if ret == 0:
             print(out)
         
-        # Top processi CPU
-        print(f"\n{Colors.CYAN}🔥 TOP 15 PROCESSI CPU:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("ps aux --sort=-%cpu | head -16")
-        if ret == 0:
-            print(out)
+        # Top processi CPU: due scansioni ravvicinate misurano l'utilizzo attuale
+        print(f"\n{Colors.CYAN}🔥 TOP 15 PROCESSI CPU (ultimo secondo):{Colors.RESET}")
+        scanner = ProcessScanner()
+        scanner.scan()
+        time.sleep(1)
+        for line in ProcessScanner.format_table(scanner.top(15, 'cpu')):
+            print(line)
     
     @staticmethod
     def memory_monitoring():
@@ -1941,9 +6476,8 @@ class SystemMonitor:
         
         # Top processi memoria
         print(f"\n{Colors.CYAN}🧠 TOP 15 PROCESSI MEMORIA:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("ps aux --sort=-%mem | head -16")
-        if ret == 0:
-            print(out)
+        for line in ProcessScanner.format_table(ProcessScanner().top(15, 'rss')):
+            print(line)
 
 class ServiceManager:
     """Gestore per servizi di sistema"""
@@ -1970,7 +6504,7 @@ class ServiceManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}📋 LISTA TUTTI I SERVIZI{Colors.RESET}")
         print("=" * 60)
         
-        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --all --no-pager")
+        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --all --no-pager", cache='services')
         if ret == 0:
             lines = out.split('\n')
             if len(lines) > 50:
@@ -1987,7 +6521,7 @@ class ServiceManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}✅ SERVIZI ATTIVI{Colors.RESET}")
         print("=" * 60)
         
-        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=active --no-pager")
+        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=active --no-pager", cache='services')
         if ret == 0:
             print(out)
         else:
@@ -1999,7 +6533,7 @@ class ServiceManager:
         print(f"\n{Colors.BLUE}{Colors.BOLD}❌ SERVIZI FALLITI{Colors.RESET}")
         print("=" * 60)
         
-        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=failed --no-pager")
+        ret, out, err = SystemInfo.run_command("systemctl list-units --type=service --state=failed --no-pager", cache='services')
         if ret == 0:
             if "0 loaded units" in out:
                 print(f"{Colors.GREEN}✅ Nessun servizio fallito{Colors.RESET}")
@@ -2086,25 +6620,38 @@ class MaintenanceManager:
         if ret == 0:
             print(out)
         
-        # File temporanei
+        # File temporanei: totali e file più grandi con la stessa visita in-process dei log
         print(f"\n{Colors.CYAN}🗂️  FILE TEMPORANEI:{Colors.RESET}")
         temp_dirs = ["/tmp", "/var/tmp", "/var/cache"]
         for temp_dir in temp_dirs:
-            ret, out, err = SystemInfo.run_command(f"du -sh {temp_dir} 2>/dev/null")
-            if ret == 0:
-                print(f"  {out.strip()}")
+            if os.path.isdir(temp_dir):
+                usage = LargestFiles(limit=3).scan([temp_dir])
+                print(f"  {ProcCollector.format_bytes(usage.allocated):>8}  {temp_dir} ({usage.files} file)")
+                for entry in usage.largest(min_allocated=10 * 1024 * 1024):
+                    print(f"    {LogManager.format_largest(entry)}")
         
-        # Log grandi
+        # Log grandi (la visita delle directory di log è condivisa con le statistiche log)
         print(f"\n{Colors.CYAN}📋 LOG FILES GRANDI (>10MB):{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("find /var/log -name '*.log' -size +10M -exec du -h {} \\; 2>/dev/null")
-        if ret == 0 and out.strip():
-            print(out)
-        else:
+        if not LogManager.print_large_logs(10 * 1024 * 1024):
             print(f"{Colors.GREEN}✅ Nessun log file grande trovato{Colors.RESET}")
 
 class ReportManager:
     """Gestore per report e dashboard"""
     
+    # Metriche dell'archivio mostrate nei report storici: etichetta e formato
+    HISTORY_METRICS = [
+        ('cpu.busy', 'CPU %', '{:.1f}'),
+        ('cpu.iowait', 'I/O wait %', '{:.1f}'),
+        ('load.1m', 'Load 1m', '{:.2f}'),
+        ('memory.used_percent', 'Memoria %', '{:.1f}'),
+        ('memory.swap_percent', 'Swap %', '{:.1f}'),
+        ('disk.root_percent', 'Disco / %', '{:.1f}'),
+        ('net.rx_rate', 'Rete RX/s', 'bytes'),
+        ('net.tx_rate', 'Rete TX/s', 'bytes'),
+        ('services.failed', 'Servizi falliti', '{:.0f}'),
+        ('journal.errors_per_min', 'Errori/min', '{:.2f}'),
+    ]
+    
     @staticmethod
     def show_report_menu():
         """Mostra il menu report"""
@@ -2121,6 +6668,69 @@ class ReportManager:
         print(f"0. ↩️  Torna al menu principale")
         print(f"{Colors.RESET}")
     
+    @staticmethod
+    def _format_metric(value: float, style: str) -> str:
+        return ProcCollector.format_bytes(value) if style == 'bytes' else style.format(value)
+    
+    @staticmethod
+    def history_report(days: int, bucket: int, title: str):
+        """Riepilogo delle metriche registrate da --monitor-daemon negli ultimi days giorni"""
+        print(f"\n{Colors.BLUE}{Colors.BOLD}{title}{Colors.RESET}")
+        print("=" * 60)
+        
+        now = time.time()
+        since = now - days * 86400
+        try:
+            with MetricArchive() as archive:
+                data = archive.read(since, now)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.RED}❌ Archivio metriche non leggibile: {e}{Colors.RESET}")
+            return
+        
+        timestamps = data['timestamp']
+        if not timestamps:
+            print(f"{Colors.YELLOW}⚠️  Nessun dato registrato nel periodo{Colors.RESET}")
+            print("Avvia il campionamento continuo con: sah --monitor-daemon")
+            return
+        
+        period = f"{datetime.fromtimestamp(timestamps[0]).strftime('%Y-%m-%d %H:%M')} → " \
+                 f"{datetime.fromtimestamp(timestamps[-1]).strftime('%Y-%m-%d %H:%M')}"
+        print(f"🕐 Periodo: {period}")
+        print(f"📊 Campioni: {len(timestamps)}")
+        print(f"📈 Andamento: una barra ogni {bucket // 3600} ore\n" if bucket >= 7200
+              else "📈 Andamento: una barra ogni ora\n")
+        
+        buckets = int(days * 86400 // bucket)
+        print(f"{'Metrica':<16} {'Min':>9} {'Media':>9} {'P95':>9} {'Max':>9}  Andamento")
+        print("-" * (58 + buckets))
+        for name, label, style in ReportManager.HISTORY_METRICS:
+            pairs = [(ts, value) for ts, value in zip(timestamps, data[name]) if value == value]
+            if not pairs:
+                continue
+            values = sorted(value for _, value in pairs)
+            sums = [0.0] * buckets
+            counts = [0] * buckets
+            for ts, value in pairs:
+                index = min(int((ts - since) // bucket), buckets - 1)
+                sums[index] += value
+                counts[index] += 1
+            trend = MetricStore.render_sparkline([total / count if count else math.nan
+                                                  for total, count in zip(sums, counts)])
+            columns = [values[0], sum(values) / len(values), values[min(int(len(values) * 0.95), len(values) - 1)],
+                       values[-1]]
+            print(f"{label:<16} " + " ".join(f"{ReportManager._format_metric(v, style):>9}" for v in columns)
+                  + f"  {trend}")
+    
+    @staticmethod
+    def daily_report():
+        """Report delle ultime 24 ore dall'archivio metriche"""
+        ReportManager.history_report(1, 3600, "📋 REPORT GIORNALIERO")
+    
+    @staticmethod
+    def weekly_report():
+        """Report degli ultimi 7 giorni dall'archivio metriche"""
+        ReportManager.history_report(7, 4 * 3600, "📈 REPORT SETTIMANALE")
+    
     @staticmethod
     def complete_dashboard():
         """Dashboard completo sistema"""
@@ -2132,46 +6742,72 @@ class ReportManager:
         print(f"🕐 Report generato: {current_time}")
         print()
         
+        # Sezioni lente raccolte in parallelo; la panoramica è letta da /proc
+        data = AsyncCollector.collect(['services', 'network', 'lvm'])
+        services, network, lvm = data['services'], data['network'], data['lvm']
+        
         # Sistema base
         overview = SystemInfo.get_system_overview()
         print(f"{Colors.CYAN}💻 SISTEMA:{Colors.RESET}")
-        for key, value in overview.items():
-            print(f"  {key}: {value}")
+        for key in ['os', 'uptime', 'memory_total', 'memory_used', 'memory_available',
+                    'disk_total', 'disk_used', 'disk_available', 'disk_usage', 'load_avg']:
+            if key in overview:
+                print(f"  {key}: {overview[key]}")
         print()
         
+        SystemMonitor.record_metrics(
+            {}, overview.get('load_avg_values', []),
+            ProcCollector.memory(), ProcCollector.disk_usage("/")
+        )
+        if (SystemInfo.METRICS.stats('memory.used_percent', 3600) or {}).get('samples', 0) > 1:
+            print(f"{Colors.CYAN}📈 ANDAMENTO (ultima ora):{Colors.RESET}")
+            SystemMonitor.print_trends(['cpu.busy', 'memory.used_percent', 'load.1m', 'disk.root_percent'], 3600)
+            print()
+        
         # Status servizi
         print(f"{Colors.CYAN}⚙️  SERVIZI:{Colors.RESET}")
-        ret, out, err = SystemInfo.run_command("systemctl list-units --failed --no-pager | wc -l")
-        if ret == 0:
-            failed_count = int(out.strip()) - 1  # Remove header
+        if 'error' in services:
+            print(f"  ⚠️  Stato servizi non disponibile: {services['error']}")
+        else:
+            failed_count = len(services['failed_units'])
             if failed_count > 0:
                 print(f"  ❌ Servizi falliti: {failed_count}")
             else:
                 print(f"  ✅ Tutti i servizi OK")
+            print(f"  ⚡ Servizi attivi: {services['active_count']}")
         
         # Rete
-        ret, out, err = SystemInfo.run_command("ip route | grep default")
-        if ret == 0:
-            print(f"  🌐 Gateway: {out.split()[2] if len(out.split()) > 2 else 'N/A'}")
+        if 'error' not in network:
+            print(f"  🌐 Gateway: {network['gateway'] or 'N/A'}")
+            print(f"  👂 Porte in ascolto: {network['listening_ports']}")
+        
+        # LVM
+        if lvm.get('volume_groups'):
+            print(f"\n{Colors.CYAN}💾 LVM:{Colors.RESET}")
+            for group in lvm['volume_groups']:
+                print(f"  {group['name']}: {group['size']} (libero {group['free']})")
+            print(f"  Logical Volumes: {len(lvm['logical_volumes'])}")
         
         # Alert
         print(f"\n{Colors.YELLOW}🚨 ALERT:{Colors.RESET}")
         alerts = []
         
         # Check memoria
-        ret, out, err = SystemInfo.run_command("free | awk 'NR==2{print ($3/$2)*100}'")
-        if ret == 0:
-            mem_usage = float(out.strip())
+        if overview.get('memory_total_bytes'):
+            mem_usage = overview['memory_used_bytes'] * 100 / overview['memory_total_bytes']
             if mem_usage > 90:
                 alerts.append(f"Memoria alta: {mem_usage:.1f}%")
         
         # Check disco
-        ret, out, err = SystemInfo.run_command("df / | awk 'NR==2{print ($3/$2)*100}'")
-        if ret == 0:
-            disk_usage = float(out.strip())
+        if overview.get('disk_total_bytes'):
+            disk_usage = overview['disk_used_bytes'] * 100 / overview['disk_total_bytes']
             if disk_usage > 90:
                 alerts.append(f"Disco pieno: {disk_usage:.1f}%")
         
+        for name, section in data.items():
+            if section.get('error', '').startswith('timeout'):
+                alerts.append(f"Sezione '{name}' interrotta: {section['error']}")
+        
         if alerts:
             for alert in alerts:
                 print(f"  ⚠️  {alert}")
@@ -2208,6 +6844,11 @@ class ConfigManager:
         print(f"🐍 Python: {sys.version}")
         print(f"💻 Piattaforma: {os.uname().system} {os.uname().release}")
         print(f"📁 Directory: {os.getcwd()}")
+        
+        cache_stats = SystemInfo.CACHE.stats()
+        print(f"🗄️  Cache risultati: {cache_stats['entries']} voci, "
+              f"{cache_stats['hits']} hit / {cache_stats['misses']} miss, "
+              f"{cache_stats['evictions']} evict")
 
 def main():
     """Funzione principale"""
@@ -2215,11 +6856,41 @@ def main():
     parser = argparse.ArgumentParser(description='SysAdmin Helper - Super Tool per Sistemisti Linux')
     parser.add_argument('--version', action='version', version='SysAdmin Helper v1.0')
     parser.add_argument('--monitor-daemon', action='store_true', help='Avvia in modalità daemon per monitoring continuo')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help="Misura i tempi di comandi e sezioni; all'uscita stampa il report o lo salva in FILE (JSON)")
     args = parser.parse_args()
     
+    if args.profile:
+        Profiler.enabled = True
+        # Le sezioni misurate sono le voci dei menu
+        sections = {
+            LVMManager: ['show_lvm_info', 'show_available_disks', 'expand_logical_volume', 'check_filesystem_space',
+                         'storage_report'],
+            NetworkManager: ['show_network_interfaces', 'network_diagnostics', 'traffic_statistics', 'ip_configuration',
+                             'routing_management', 'dns_management', 'firewall_status', 'network_report'],
+            LogManager: ['discover_logs', 'view_log_file', 'search_in_logs', 'realtime_analysis', 'log_statistics',
+                         'search_common_errors', 'log_rotation_management'],
+            SystemAuditManager: ['system_logs', 'auth_logs', 'security_audit_logs', 'user_activity', 'boot_kernel_logs',
+                                 'critical_events', 'system_statistics', 'full_audit_report'],
+            SystemMonitor: ['system_overview', 'cpu_monitoring', 'memory_monitoring'],
+            ServiceManager: ['list_all_services', 'active_services', 'failed_services'],
+            SecurityManager: ['user_management'],
+            MaintenanceManager: ['system_cleanup'],
+            ReportManager: ['complete_dashboard', 'daily_report', 'weekly_report'],
+            ConfigManager: ['version_info'],
+        }
+        for manager_class, names in sections.items():
+            Profiler.instrument(manager_class, names)
+        atexit.register(Profiler.report, args.profile)
+    
     if args.monitor_daemon:
-        print("Modalità daemon non ancora implementata")
-        sys.exit(1)
+        try:
+            archive = MetricArchive(writable=True)
+        except (OSError, RuntimeError, ValueError) as e:
+            MonitorDaemon.log(f"archivio metriche non disponibile, solo campionamento in memoria: {e}")
+            archive = None
+        MonitorDaemon(archive=archive).run()
+        sys.exit(0)
     
     menu = MenuSystem()
     lvm = LVMManager()
@@ -2336,7 +7007,7 @@ def main():
                         break
                     elif log_choice == "1":
                         menu.clear_screen()
-                        log.discover_logs()
+                        log.discover_logs(refresh=True)
                         menu.pause()
                     elif log_choice == "2":
                         menu.clear_screen()
@@ -2517,7 +7188,15 @@ def main():
                         menu.clear_screen()
                         report.complete_dashboard()
                         menu.pause()
-                    elif rep_choice in ["2", "3", "4", "5", "6", "7", "8"]:
+                    elif rep_choice == "2":
+                        menu.clear_screen()
+                        report.daily_report()
+                        menu.pause()
+                    elif rep_choice == "3":
+                        menu.clear_screen()
+                        report.weekly_report()
+                        menu.pause()
+                    elif rep_choice in ["4", "5", "6", "7", "8"]:
                         print(f"{Colors.YELLOW}🚧 Funzionalità in sviluppo...{Colors.RESET}")
                         menu.pause()
                     else:
@@ -43,12 +43,1215 @@ def test_system_info():
         else:
             print("❌ SystemInfo.run_command(): FAIL")
             return False
+        
+        # Test run_commands: ordine preservato ed esecuzione parallela
+        import time
+        start = time.monotonic()
+        results = SystemInfo.run_commands(["sleep 0.3; echo a", "echo b", "sleep 0.3; echo c"])
+        elapsed = time.monotonic() - start
+        if [out.strip() for _, out, _ in results] == ["a", "b", "c"] and elapsed < 0.55:
+            print("✅ SystemInfo.run_commands(): OK")
+        else:
+            print("❌ SystemInfo.run_commands(): FAIL")
+            return False
+        
+        ret, out, err = SystemInfo.run_commands(["sleep 2"], timeout=0.2)[0]
+        if ret != -1:
+            print("❌ SystemInfo.run_commands() timeout: FAIL")
+            return False
+        
+        # Test stream_command: interruzione anticipata e limite in byte
+        stream = SystemInfo.stream_command(["seq", "1", "1000000"], max_lines=3)
+        if stream.lines() != ["1", "2", "3"] or not stream.truncated or stream.returncode != 0:
+            print("❌ SystemInfo.stream_command() max_lines: FAIL")
+            return False
+        
+        stream = SystemInfo.stream_command(["seq", "1", "1000000"], max_bytes=1000)
+        if len(stream.lines()) > 300 or not stream.truncated:
+            print("❌ SystemInfo.stream_command() max_bytes: FAIL")
+            return False
+        
+        # Il codice di uscita reale viene conservato anche a fine output
+        for _ in range(20):
+            stream = SystemInfo.stream_command(["sh", "-c", "echo x; exit 1"])
+            if stream.lines() != ["x"] or stream.returncode != 1:
+                print("❌ SystemInfo.stream_command() exit status: FAIL")
+                return False
+        print("✅ SystemInfo.stream_command(): OK")
             
         return True
     except Exception as e:
         print(f"❌ SystemInfo: FAIL - {e}")
         return False
 
+def test_proc_collector():
+    """Test ProcCollector"""
+    try:
+        from sysadmin_helper import ProcCollector, SystemInfo
+        
+        memory = ProcCollector.memory()
+        if not (memory and memory['total'] >= memory['available'] > 0):
+            print("❌ ProcCollector.memory(): FAIL")
+            return False
+        
+        disk = ProcCollector.disk_usage("/")
+        if not (disk and 0 <= disk['percent'] <= 100):
+            print("❌ ProcCollector.disk_usage(): FAIL")
+            return False
+        
+        if ProcCollector.format_bytes(1536) != "1.5K" or ProcCollector.format_uptime(3720) != "up 1 hour, 2 minutes":
+            print("❌ ProcCollector formattazione: FAIL")
+            return False
+        
+        overview = SystemInfo.get_system_overview()
+        if not isinstance(overview.get('memory_total_bytes'), int):
+            print("❌ Valori numerici overview: FAIL")
+            return False
+        
+        print("✅ ProcCollector: OK")
+        return True
+    except Exception as e:
+        print(f"❌ ProcCollector: FAIL - {e}")
+        return False
+
+def test_command_cache():
+    """Test CommandCache"""
+    try:
+        from sysadmin_helper import CommandCache
+        
+        cache = CommandCache(max_entries=2, ttls={'lvm': 60, 'short': 0})
+        calls = []
+        for _ in range(3):
+            cache.cached('lvm', 'pvs', lambda: calls.append(1) or "pv")
+        if len(calls) != 1 or cache.hits != 2 or cache.misses != 1:
+            print("❌ CommandCache hit/miss: FAIL")
+            return False
+        
+        # TTL scaduto
+        cache.cached('short', 'x', lambda: calls.append(1) or "x")
+        cache.cached('short', 'x', lambda: calls.append(1) or "x")
+        if len(calls) != 3:
+            print("❌ CommandCache TTL: FAIL")
+            return False
+        
+        # Evizione LRU e invalidazione per sorgente
+        cache.put('a', 1, 'lvm')
+        cache.put('b', 2, 'lvm')
+        cache.put('c', 3, 'default')
+        if cache.get('a')[0] or cache.stats()['evictions'] < 1:
+            print("❌ CommandCache LRU: FAIL")
+            return False
+        cache.invalidate('lvm')
+        if cache.get('b')[0] or not cache.get('c')[0]:
+            print("❌ CommandCache invalidate: FAIL")
+            return False
+        
+        print("✅ CommandCache: OK")
+        return True
+    except Exception as e:
+        print(f"❌ CommandCache: FAIL - {e}")
+        return False
+
+def test_profiler():
+    """Test Profiler"""
+    from sysadmin_helper import Profiler, SystemInfo
+    enabled, records = Profiler.enabled, Profiler._records
+    try:
+        import json
+        import tempfile
+        
+        Profiler.enabled = True
+        Profiler._records = {}
+        
+        # Comandi: una miss seguita da una hit sulla stessa chiave
+        SystemInfo.CACHE.invalidate('default')
+        SystemInfo.run_command("echo profiler-test", cache='default')
+        SystemInfo.run_command("echo profiler-test", cache='default')
+        
+        # Sezioni: vengono avvolti solo i metodi indicati, non quelli di supporto
+        class Dummy:
+            @staticmethod
+            def section():
+                return SystemInfo.run_command("sleep 0.05")[0] + Dummy.helper()
+            
+            @staticmethod
+            def helper():
+                return 1
+        
+        Profiler.instrument(Dummy, ['section'])
+        if Dummy.section() != 1:
+            print("❌ Profiler.instrument(): FAIL")
+            return False
+        
+        by_label = {r['label']: r for r in Profiler.records()}
+        command = by_label.get("echo profiler-test")
+        section = by_label.get("Dummy.section")
+        if (not command or command['calls'] != 2 or command['cache_hits'] != 1
+                or command['cache_misses'] != 1 or command['bytes'] != 2 * len("profiler-test\n")):
+            print(f"❌ Profiler comandi: FAIL ({command})")
+            return False
+        if not section or section['kind'] != 'section' or section['wall'] < 0.05:
+            print(f"❌ Profiler sezioni: FAIL ({section})")
+            return False
+        if "Dummy.helper" in by_label:
+            print("❌ Profiler metodi di supporto: FAIL")
+            return False
+        
+        # Report JSON ordinato per tempo reale decrescente
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            Profiler.report(path)
+            with open(path) as f:
+                walls = [r['wall'] for r in json.load(f)['records']]
+        if walls != sorted(walls, reverse=True) or len(walls) < 3:
+            print("❌ Profiler.report(): FAIL")
+            return False
+        
+        # Disattivato: nessuna misura registrata
+        Profiler.enabled = False
+        Profiler._records = {}
+        SystemInfo.run_command("echo profiler-off")
+        if Profiler.records():
+            print("❌ Profiler disattivato: FAIL")
+            return False
+        
+        print("✅ Profiler: OK")
+        return True
+    except Exception as e:
+        print(f"❌ Profiler: FAIL - {e}")
+        return False
+    finally:
+        Profiler.enabled, Profiler._records = enabled, records
+
+def test_async_collector():
+    """Test AsyncCollector"""
+    try:
+        from sysadmin_helper import AsyncCollector
+        
+        data = AsyncCollector.collect(['system', 'network'])
+        if not data['system'].get('uname') or 'listening_ports' not in data['network']:
+            print("❌ AsyncCollector.collect(): FAIL")
+            return False
+        
+        # Una sezione oltre il timeout viene cancellata senza bloccare le altre
+        data = AsyncCollector.collect(['audit', 'system'], timeouts={'audit': 0.0001})
+        if not data['audit'].get('error', '').startswith('timeout') or 'error' in data['system']:
+            print("❌ AsyncCollector timeout per sezione: FAIL")
+            return False
+        
+        print("✅ AsyncCollector: OK")
+        return True
+    except Exception as e:
+        print(f"❌ AsyncCollector: FAIL - {e}")
+        return False
+
+def test_cpu_sampler():
+    """Test CpuSampler"""
+    try:
+        import time
+        from sysadmin_helper import CpuSampler
+        
+        sampler = CpuSampler()
+        if sampler.sample() != {}:
+            print("❌ CpuSampler prima lettura: FAIL")
+            return False
+        
+        end = time.monotonic() + 0.2
+        while time.monotonic() < end:
+            pass
+        usage = sampler.sample()
+        total = usage.get('cpu')
+        if not total or not 0 <= total['busy'] <= 100:
+            print("❌ CpuSampler.sample(): FAIL")
+            return False
+        parts = total['user'] + total['system'] + total['iowait'] + total['steal'] + total['irq'] + total['idle']
+        if abs(parts - 100) > 0.5 or not any(name.startswith('cpu') and name != 'cpu' for name in usage):
+            print("❌ CpuSampler percentuali: FAIL")
+            return False
+        
+        print("✅ CpuSampler: OK")
+        return True
+    except Exception as e:
+        print(f"❌ CpuSampler: FAIL - {e}")
+        return False
+
+def test_metric_store():
+    """Test MetricStore"""
+    try:
+        from sysadmin_helper import MetricStore
+        
+        store = MetricStore(tiers=[(1, 60), (10, 30)], max_metrics=2)
+        start = 1000000.0
+        for second in range(200):
+            store.add('load', float(second % 10), start + second)
+        now = start + 199
+        
+        stats = store.stats('load', 60, now)
+        if not stats or stats['min'] != 0 or stats['max'] != 9 or stats['last'] != 9 or stats['samples'] != 60:
+            print("❌ MetricStore.stats(): FAIL")
+            return False
+        # Finestra più lunga del primo livello: risponde il livello a 10 secondi
+        if len(store.points('load', 200, now)) != 20 or store.stats('load', 200, now)['samples'] != 200:
+            print("❌ MetricStore livelli: FAIL")
+            return False
+        if len(store.sparkline('load', 60, 20, now)) != 20:
+            print("❌ MetricStore.sparkline(): FAIL")
+            return False
+        
+        # Memoria fissa e limite di metriche
+        used = store.memory_bytes()
+        store.add('load', 1.0, now + 10000)
+        store.add('memory', 1.0, now)
+        if store.add('disk', 1.0, now) or store.memory_bytes() != used * 2 or store.names() != ['load', 'memory']:
+            print("❌ MetricStore limiti: FAIL")
+            return False
+        
+        print("✅ MetricStore: OK")
+        return True
+    except Exception as e:
+        print(f"❌ MetricStore: FAIL - {e}")
+        return False
+
+def test_process_scanner():
+    """Test ProcessScanner"""
+    try:
+        from sysadmin_helper import ProcessScanner
+        
+        scanner = ProcessScanner()
+        processes = scanner.scan()
+        own = [p for p in processes if p['pid'] == os.getpid()]
+        if not own or own[0]['rss'] <= 0 or 'python' not in own[0]['command'].lower():
+            print("❌ ProcessScanner.scan(): FAIL")
+            return False
+        
+        top = scanner.top(5, 'rss')
+        if len(top) > 5 or [p['rss'] for p in top] != sorted((p['rss'] for p in top), reverse=True):
+            print("❌ ProcessScanner.top(): FAIL")
+            return False
+        
+        print("✅ ProcessScanner: OK")
+        return True
+    except Exception as e:
+        print(f"❌ ProcessScanner: FAIL - {e}")
+        return False
+
+def test_metric_archive():
+    """Test MetricArchive"""
+    try:
+        import math
+        import tempfile
+        from sysadmin_helper import MetricArchive
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.bin')
+            writer = MetricArchive(path, writable=True, capacity=100)
+            # 250 record in 100 slot: restano gli ultimi 100
+            for index in range(250):
+                writer.append({'cpu.busy': float(index)}, 1000.0 + index * 10)
+            # Record scritto a metà dopo l'ultima sincronizzazione
+            offset = writer._offset(writer.written - 1)
+            writer._map[offset + 20] ^= 0xFF
+            
+            with writer, MetricArchive(path) as archive:
+                data = archive.read(0)
+                if len(data['timestamp']) != 99 or data['cpu.busy'][0] != 150 or data['cpu.busy'][-1] != 248:
+                    print("❌ MetricArchive buffer circolare/crc: FAIL")
+                    return False
+                window = archive.read(1000.0 + 200 * 10, 1000.0 + 210 * 10, ['cpu.busy', 'load.1m'])
+                if window['cpu.busy'] != [float(i) for i in range(200, 210)] or not math.isnan(window['load.1m'][0]):
+                    print("❌ MetricArchive.read() intervallo: FAIL")
+                    return False
+            
+            # Sovrascrittura interrotta del record più vecchio, già sincronizzato: lo slot
+            # contiene metà del record nuovo (sequenza 250) sopra quello vecchio (150)
+            writer = MetricArchive(path, writable=True)
+            oldest = writer._offset(150)
+            torn = bytearray(writer.RECORD.pack(0, 250, 99999.0, *[1.0] * writer.SLOTS))
+            writer._map[oldest + 8:oldest + 40] = torn[8:40]
+            with writer, MetricArchive(path) as archive:
+                data = archive.read(0)
+                if archive.synced <= 150 or len(data['timestamp']) != 98 or data['cpu.busy'][0] != 151:
+                    print("❌ MetricArchive record sovrascritto: FAIL")
+                    return False
+            
+            if MetricArchive(os.path.join(tmp, 'missing.bin')).read(0)['timestamp'] != []:
+                print("❌ MetricArchive archivio assente: FAIL")
+                return False
+        
+        print("✅ MetricArchive: OK")
+        return True
+    except Exception as e:
+        print(f"❌ MetricArchive: FAIL - {e}")
+        return False
+
+def test_monitor_daemon():
+    """Test MonitorDaemon"""
+    try:
+        import time
+        from sysadmin_helper import MonitorDaemon, MetricStore
+        
+        daemon = MonitorDaemon(intervals={'cpu': 0.05, 'memory': 0.05, 'disk': 0.1}, store=MetricStore())
+        stats = daemon.run(0.4)
+        if stats['cpu']['runs'] < 3 or not {'cpu.busy', 'memory.used_percent', 'disk.root_percent'} <= set(daemon.store.names()):
+            print("❌ MonitorDaemon campionamento: FAIL")
+            return False
+        
+        # Un collector più lento del proprio intervallo salta i tick invece di accumularli
+        daemon = MonitorDaemon(intervals={'memory': 0.05}, store=MetricStore())
+        daemon.collect_memory = lambda now: time.sleep(0.12)
+        stats = daemon.run(0.5)
+        if stats['memory']['skipped'] == 0 or stats['memory']['runs'] > 5:
+            print("❌ MonitorDaemon overrun: FAIL")
+            return False
+        
+        # Host con swap: la percentuale di swap è derivata da swap_total e swap_free
+        from sysadmin_helper import ProcCollector
+        original = ProcCollector.memory
+        ProcCollector.memory = staticmethod(lambda: {'total': 1000, 'used': 400, 'available': 600, 'free': 500,
+                                                     'swap_total': 200, 'swap_free': 150})
+        try:
+            daemon = MonitorDaemon(intervals={'memory': 0.05}, store=MetricStore())
+            daemon.run_collector('memory', time.time())
+        finally:
+            ProcCollector.memory = original
+        swap = daemon.store.stats('memory.swap_percent', 60, time.time())
+        if daemon.stats['memory']['runs'] != 1 or daemon.stats['memory']['errors'] or not swap or swap['last'] != 25.0:
+            print("❌ MonitorDaemon swap: FAIL")
+            return False
+        
+        # Serie per interfaccia solo per le schede fisiche, entro MAX_INTERFACES; i totali sempre
+        import io
+        import tempfile
+        from contextlib import redirect_stdout
+        counters = {iface: {'rx_bytes': 0, 'tx_bytes': 0}
+                    for iface in ['lo', 'eth0', 'eth1', 'eth2', 'eth3', 'eth4'] + [f'cali{n}' for n in range(20)]}
+        original_net, original_sys = ProcCollector.net_dev, MonitorDaemon.SYS_NET
+        with tempfile.TemporaryDirectory() as tmp:
+            for iface in ['eth0', 'eth1', 'eth2', 'eth3', 'eth4']:
+                os.makedirs(os.path.join(tmp, iface, 'device'))
+            ProcCollector.net_dev = staticmethod(lambda: counters)
+            MonitorDaemon.SYS_NET = tmp
+            try:
+                daemon = MonitorDaemon(store=MetricStore())
+                daemon.collect_network(1000.0)
+                daemon.collect_network(1010.0)
+            finally:
+                ProcCollector.net_dev, MonitorDaemon.SYS_NET = original_net, original_sys
+        names = set(daemon.store.names())
+        if len(names) != 2 + 2 * MonitorDaemon.MAX_INTERFACES or not {'net.rx_rate', 'net.eth0.rx_rate'} <= names:
+            print(f"❌ MonitorDaemon interfacce: FAIL ({sorted(names)})")
+            return False
+        
+        # Le metriche rifiutate dallo store pieno vengono segnalate una volta sola
+        daemon = MonitorDaemon(store=MetricStore(max_metrics=1))
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for now in (1000.0, 1001.0):
+                daemon._add('cpu.busy', 1.0, now)
+                daemon._add('services.failed', 0, now)
+        if output.getvalue().count('services.failed') != 1 or 'cpu.busy' in output.getvalue():
+            print("❌ MonitorDaemon metriche rifiutate: FAIL")
+            return False
+        
+        print("✅ MonitorDaemon: OK")
+        return True
+    except Exception as e:
+        print(f"❌ MonitorDaemon: FAIL - {e}")
+        return False
+
+def test_log_discovery():
+    """Test scoperta log con os.scandir"""
+    try:
+        import tempfile
+        from sysadmin_helper import LogManager
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for relative in ['var/app.log', 'var/app.log.1', 'var/app.log.2.gz', 'var/notes.txt',
+                             'var/nginx/access.log', 'home/alice/logs/web.log', 'home/bob/logs/messages-20240101']:
+                path = os.path.join(tmp, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as f:
+                    f.write("riga\n")
+            
+            original = LogManager.LOG_DIRECTORIES
+            LogManager.LOG_DIRECTORIES = [os.path.join(tmp, 'var'), os.path.join(tmp, 'var/nginx'),
+                                          os.path.join(tmp, 'home/*/logs'), os.path.join(tmp, 'missing')]
+            try:
+                found = LogManager.scan_log_directories()
+            finally:
+                LogManager.LOG_DIRECTORIES = original
+        
+        paths = {os.path.relpath(record['path'], tmp): record for records in found.values() for record in records}
+        if sorted(paths) != ['home/alice/logs/web.log', 'home/bob/logs/messages-20240101', 'var/app.log',
+                             'var/app.log.1', 'var/app.log.2.gz', 'var/nginx/access.log']:
+            print("❌ LogManager.scan_log_directories(): FAIL")
+            return False
+        # Le sottodirectory radice non vengono attribuite anche alla directory padre
+        if len(found[os.path.join(tmp, 'var')]) != 3 or len(found) != 4:
+            print("❌ LogManager radici annidate/glob: FAIL")
+            return False
+        record = paths['var/app.log.2.gz']
+        if not (record['compressed'] and record['rotated']) or paths['var/app.log']['rotated'] or record['size'] != 5:
+            print("❌ LogManager record: FAIL")
+            return False
+        
+        # Nomi di log senza .log: httpd e rsyslog per livello
+        for name in ['access_log', 'ssl_access_log', 'error_log-20240101', 'mail.err', 'mail.warn.1.gz']:
+            if LogManager.classify_log_name(name) is None:
+                print(f"❌ LogManager.classify_log_name({name}): FAIL")
+                return False
+        if LogManager.classify_log_name('notes.txt') is not None or LogManager.classify_log_name('catalog') is not None:
+            print("❌ LogManager.classify_log_name() non log: FAIL")
+            return False
+        
+        print("✅ Scoperta log: OK")
+        return True
+    except Exception as e:
+        print(f"❌ Scoperta log: FAIL - {e}")
+        return False
+
+def test_log_inventory():
+    """Test LogInventory e LogTimestamps"""
+    try:
+        import tempfile
+        from sysadmin_helper import LogInventory, LogTimestamps
+        
+        samples = {
+            'syslog': "Jan  2 15:04:05 host sshd[1]: ok",
+            'iso8601': "2024-01-02T15:04:05.123+01:00 INFO ok",
+            'clf': '10.0.0.1 - - [02/Jan/2024:15:04:05 +0100] "GET / HTTP/1.1" 200 5',
+        }
+        for fmt, line in samples.items():
+            if LogTimestamps.detect([line]) != fmt:
+                print(f"❌ LogTimestamps.detect() {fmt}: FAIL")
+                return False
+        if not LogTimestamps.parse(samples['iso8601'], 'iso8601') == LogTimestamps.parse(samples['clf'], 'clf') == 1704204245:
+            print("❌ LogTimestamps.parse(): FAIL")
+            return False
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, 'log')
+            os.makedirs(os.path.join(root, 'app'))
+            log_path = os.path.join(root, 'app', 'app.log')
+            with open(log_path, 'w') as f:
+                f.write("2024-01-02 10:00:00 start\n2024-01-02 11:00:00 stop\n")
+            
+            index = os.path.join(tmp, 'inventory.json')
+            inventory = LogInventory(index)
+            counters = inventory.refresh([root])
+            inventory.save()
+            record = inventory.files[log_path]
+            if counters['rescanned'] != 2 or record['format'] != 'iso8601' or record['last'] - record['first'] != 3600:
+                print("❌ LogInventory prima scansione: FAIL")
+                return False
+            
+            # Ricaricato da disco, senza modifiche: nessuna directory riletta
+            inventory = LogInventory(index)
+            if inventory.refresh([root])['rescanned'] != 0 or log_path not in inventory.files:
+                print("❌ LogInventory incrementale: FAIL")
+                return False
+            
+            # Rotazione: il file viene rinominato e ricreato con un nuovo inode
+            os.rename(log_path, log_path + '.1')
+            with open(log_path, 'w') as f:
+                f.write("2024-01-03 09:00:00 start\n")
+            counters = inventory.refresh([root])
+            record = inventory.files[log_path]
+            if (counters['rotations'] != 1 or record['rotations'] != 1 or not inventory.files[log_path + '.1']['rotated']
+                    or record['first'] != record['last']):
+                print("❌ LogInventory rotazione: FAIL")
+                return False
+        
+        print("✅ LogInventory: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LogInventory: FAIL - {e}")
+        return False
+
+def test_log_search():
+    """Test LogSearch"""
+    try:
+        import tempfile
+        from sysadmin_helper import LogSearch
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            text_path = os.path.join(tmp, 'app.log')
+            with open(text_path, 'wb') as f:
+                for index in range(500):
+                    f.write(b"riga %d ok\n" % index if index % 10 else b"riga %d ERROR \xff\xfe it's bad\n" % index)
+            binary_path = os.path.join(tmp, 'data.log')
+            with open(binary_path, 'wb') as f:
+                f.write(b"\0\0error\0\n" * 3)
+            
+            # Blocchi piccoli e pool di processi forzato: i conteggi restano esatti
+            for workers, chunk in [(1, LogSearch.CHUNK_SIZE), (2, 256)]:
+                search = LogSearch("error.*it's", ignore_case=True, limit=5, workers=workers)
+                search.CHUNK_SIZE, search.POOL_THRESHOLD = chunk, 0
+                lines = list(search.search([text_path, binary_path, os.path.join(tmp, 'missing.log')]))
+                if search.counts != {text_path: 50} or search.files != 2 or len(lines) != 5:
+                    print(f"❌ LogSearch conteggi ({workers} processi): FAIL")
+                    return False
+                if not all(path == text_path and 'ERROR' in line and '\ufffd' in line for path, line in lines):
+                    print("❌ LogSearch righe: FAIL")
+                    return False
+            
+            # Nei file binari le corrispondenze si contano ma le righe non si mostrano
+            search = LogSearch("error")
+            if list(search.search([binary_path])) or search.counts != {binary_path: 3}:
+                print("❌ LogSearch file binario: FAIL")
+                return False
+        
+        print("✅ LogSearch: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LogSearch: FAIL - {e}")
+        return False
+
+def test_multi_pattern_matcher():
+    """Test MultiPatternMatcher"""
+    try:
+        import tempfile
+        from sysadmin_helper import MultiPatternMatcher
+        
+        categories = {
+            'Rete': ["connection refused", r"timeout after \d+s"],
+            'Applicazione': ["fatal error", "error"],
+            'Sistema': ["out of memory"],
+        }
+        lines = [
+            "app: Connection refused by 10.0.0.1",
+            "app: FATAL ERROR, exiting",
+            "worker: timeout after 30s",
+            "kernel: Out of memory: killed process 42",
+            "nothing to see here",
+        ]
+        
+        matcher = MultiPatternMatcher(categories, max_samples=1)
+        matcher.feed_lines(lines, batch=2)
+        expected = {'Rete': 2, 'Applicazione': 1, 'Sistema': 1}
+        # "error" è contenuto in "fatal error": entrambi i pattern contano la riga
+        if (matcher.counts != expected or matcher.pattern_counts['error'] != 1
+                or matcher.pattern_counts['fatal error'] != 1 or matcher.lines != 5):
+            print("❌ MultiPatternMatcher conteggi: FAIL")
+            return False
+        if matcher.samples['Rete'] != [(None, lines[0])]:
+            print("❌ MultiPatternMatcher esempi: FAIL")
+            return False
+        
+        # 'İ'.lower() è lungo due caratteri: le righe vanno comunque individuate correttamente
+        unicode_lines = ["İİİİ utente İstanbul", "ok", "app: fatal error İİ", "db: connection refused"]
+        shifted = MultiPatternMatcher(categories)
+        shifted.feed('\n'.join(unicode_lines))
+        if shifted.samples['Applicazione'] != [(None, unicode_lines[2])] or \
+                shifted.samples['Rete'] != [(None, unicode_lines[3])] or shifted.counts['Rete'] != 1:
+            print("❌ MultiPatternMatcher unicode: FAIL")
+            return False
+        
+        # Stesso risultato leggendo un file come bytes
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as f:
+            f.write('\n'.join(lines))
+            f.flush()
+            from_file = MultiPatternMatcher(categories)
+            from_file.scan_file(f.name)
+        if from_file.counts != expected or from_file.samples['Sistema'][0] != (f.name, lines[3]):
+            print("❌ MultiPatternMatcher.scan_file(): FAIL")
+            return False
+        
+        print("✅ MultiPatternMatcher: OK")
+        return True
+    except Exception as e:
+        print(f"❌ MultiPatternMatcher: FAIL - {e}")
+        return False
+
+def test_compressed_search():
+    """Test ricerca nelle rotazioni compresse"""
+    try:
+        import bz2
+        import gzip
+        import lzma
+        import tempfile
+        from sysadmin_helper import LogSearch, MultiPatternMatcher
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, 'app.log')
+            openers = [('', open), ('.1', open), ('.2.gz', gzip.open), ('.3.xz', lzma.open), ('.4.bz2', bz2.open)]
+            paths = []
+            for age, (suffix, opener) in enumerate(openers):
+                path = base + suffix
+                with opener(path, 'wb') as f:
+                    f.write(b"".join(b"rotation %d line %d %s\n" % (age, index, b"ERROR" if index % 4 == 0 else b"ok")
+                                     for index in range(40)))
+                os.utime(path, (1700000000 - age * 86400,) * 2)
+                paths.append(path)
+            
+            # Ordine dei file mescolato: i risultati seguono comunque l'età delle rotazioni
+            shuffled = paths[::-1]
+            for workers in (1, 2):
+                search = LogSearch("error", ignore_case=True, limit=12, workers=workers)
+                lines = list(search.search(shuffled))
+                if list(search.counts) != paths or set(search.counts.values()) != {10} or search.files != 5:
+                    print(f"❌ LogSearch compressi ({workers} processi): FAIL")
+                    return False
+                if [path for path, _ in lines] != [paths[0]] * 10 + [paths[1]] * 2 or not search.bytes_decompressed:
+                    print("❌ LogSearch ordine per età: FAIL")
+                    return False
+            
+            matcher = MultiPatternMatcher({'Errori': ["error"]}, max_samples=15)
+            matcher.scan_files(shuffled, workers=2)
+            if (matcher.counts['Errori'] != 50 or matcher.lines != 200 or len(matcher.pattern_sources['error']) != 5
+                    or matcher.samples['Errori'][10][0] != paths[1]):
+                print("❌ MultiPatternMatcher.scan_files(): FAIL")
+                return False
+        
+        print("✅ Ricerca log compressi: OK")
+        return True
+    except Exception as e:
+        print(f"❌ Ricerca log compressi: FAIL - {e}")
+        return False
+
+def test_log_time_window():
+    """Test ricerca binaria per finestra temporale"""
+    try:
+        import tempfile
+        from datetime import datetime, timedelta
+        from sysadmin_helper import LogTimestamps, LogSearch
+        
+        start = datetime(2024, 3, 1, 8, 0, 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Circa 2 MB: la ricerca binaria lavora prima del tratto sequenziale finale
+            for fmt, stamp in [('iso8601', '%Y-%m-%dT%H:%M:%S'), ('syslog', '%b %d %H:%M:%S')]:
+                log_path = os.path.join(tmp, f'{fmt}.log')
+                offsets = []
+                with open(log_path, 'wb') as f:
+                    for second in range(30000):
+                        offsets.append(f.tell())
+                        moment = start + timedelta(seconds=second)
+                        f.write(f"{moment.strftime(stamp)} app: evento {second} ok\n".encode())
+                        if second % 100 == 0:
+                            f.write(b"    at stack.trace(Continuazione.java:1)\n")
+                os.utime(log_path, (offsets[-1], (start + timedelta(seconds=30000)).timestamp()))
+                
+                for second in [0, 2, 12345, 29999]:
+                    since = (start + timedelta(seconds=second)).timestamp()
+                    if LogTimestamps.window_start(log_path, since) != offsets[second]:
+                        print(f"❌ Finestra temporale {fmt} ({second}s): FAIL")
+                        return False
+                if LogTimestamps.window_start(log_path, (start + timedelta(days=1)).timestamp()) != \
+                        os.path.getsize(log_path):
+                    print(f"❌ Finestra temporale {fmt} oltre la fine: FAIL")
+                    return False
+            
+            # Le righe precedenti alla finestra non vengono lette né contate
+            search = LogSearch(r"evento \d+ ok", since=(start + timedelta(seconds=29000)).timestamp())
+            list(search.search([os.path.join(tmp, 'iso8601.log')]))
+            if search.total != 1000 or search.bytes_before_window <= 0:
+                print("❌ Finestra temporale in LogSearch: FAIL")
+                return False
+            
+            # Rotazioni compresse: le righe precedenti vengono scartate durante la lettura a blocchi;
+            # i file senza timestamp sono cercati per intero e segnalati
+            import gzip
+            import shutil
+            rotated = os.path.join(tmp, 'iso8601.log.1.gz')
+            with open(os.path.join(tmp, 'iso8601.log'), 'rb') as source, gzip.open(rotated, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            plain = os.path.join(tmp, 'plain.log')
+            with open(plain, 'w') as f:
+                f.write("evento 1 ok\n")
+            chunk_size = LogSearch.CHUNK_SIZE
+            LogSearch.CHUNK_SIZE = 64 * 1024
+            try:
+                search = LogSearch(r"evento \d+ ok", since=(start + timedelta(seconds=29000)).timestamp(), workers=1)
+                list(search.search([rotated, plain]))
+            finally:
+                LogSearch.CHUNK_SIZE = chunk_size
+            if search.counts.get(rotated) != 1000 or search.unfiltered != {plain} or search.counts.get(plain) != 1:
+                print(f"❌ Finestra temporale nei file compressi: FAIL ({search.counts})")
+                return False
+        
+        print("✅ Finestra temporale: OK")
+        return True
+    except Exception as e:
+        print(f"❌ Finestra temporale: FAIL - {e}")
+        return False
+
+def test_trigram_index():
+    """Test TrigramIndex"""
+    try:
+        import tempfile
+        from sysadmin_helper import LogSearch, TrigramIndex
+        
+        literals = {
+            'a|b': [],
+            'fail(ed)? login': ['fail', ' login'],
+            r'user \w+ denied': ['user ', ' denied'],
+            r'\x41bc': [],
+        }
+        for pattern, expected in literals.items():
+            if TrigramIndex.required_literals(pattern) != expected:
+                print(f"❌ TrigramIndex letterali '{pattern}': FAIL")
+                return False
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, 'app.log')
+            with open(log_path, 'wb') as f:
+                for number in range(5000):
+                    f.write(b"riga %d ok\n" % number if number != 1234 else b"riga 1234 Disk Quota exceeded\n")
+            
+            index = TrigramIndex(os.path.join(tmp, 'index'))
+            index.CHUNK_SIZE = 4096
+            stats = index.update([log_path], workers=2)
+            if not stats['chunks'] or index.update([log_path], workers=1)['chunks']:
+                print("❌ TrigramIndex aggiornamento: FAIL")
+                return False
+            
+            # Stessi conteggi della scansione completa, leggendo solo i blocchi candidati
+            plain = LogSearch("quota exceeded", ignore_case=True)
+            list(plain.search([log_path]))
+            indexed = LogSearch("quota exceeded", ignore_case=True, index=index)
+            list(indexed.search([log_path]))
+            if plain.counts != {log_path: 1} or indexed.counts != plain.counts or indexed.bytes_skipped <= 0:
+                print("❌ TrigramIndex ricerca: FAIL")
+                return False
+            
+            # Le righe aggiunte dopo l'ultimo aggiornamento si trovano nella coda non indicizzata
+            with open(log_path, 'ab') as f:
+                f.write(b"riga finale quota exceeded\n")
+            indexed = LogSearch("quota exceeded", ignore_case=True, index=index)
+            list(indexed.search([log_path]))
+            if indexed.total != 2:
+                print("❌ TrigramIndex coda: FAIL")
+                return False
+            
+            # copytruncate: stesso inode, contenuto nuovo già oltre la parte indicizzata
+            with open(log_path, 'r+b') as f:
+                f.truncate(0)
+                for number in range(6000):
+                    f.write(b"line %d ok\n" % number if number != 10 else b"line 10 quota exceeded\n")
+            indexed = LogSearch("quota exceeded", ignore_case=True, index=index)
+            list(indexed.search([log_path]))
+            index.update([log_path], workers=1)
+            updated = LogSearch("quota exceeded", ignore_case=True, index=index)
+            list(updated.search([log_path]))
+            if indexed.total != 1 or updated.total != 1 or updated.bytes_skipped <= 0:
+                print("❌ TrigramIndex copytruncate: FAIL")
+                return False
+            
+            os.unlink(log_path)
+            if index.prune([log_path]) != 1 or index.size():
+                print("❌ TrigramIndex pulizia: FAIL")
+                return False
+        
+        print("✅ TrigramIndex: OK")
+        return True
+    except Exception as e:
+        print(f"❌ TrigramIndex: FAIL - {e}")
+        return False
+
+def test_log_templates():
+    """Test LogTemplates"""
+    try:
+        import json
+        from sysadmin_helper import LogTemplates, MultiPatternMatcher
+        
+        lines = []
+        for number in range(300):
+            lines.append(f"2024-01-02T10:{number % 60:02d}:00 sshd[{1000 + number}]: Failed password for root "
+                         f"from 10.0.{number % 7}.{number % 250} port {40000 + number}")
+            if number % 3 == 0:
+                lines.append(f"2024-01-02T11:00:00 kernel: Out of memory: killed process {number} (java)")
+        
+        miner = LogTemplates()
+        miner.feed("\n".join(lines).encode())
+        top = miner.top(5)
+        if len(miner.clusters) != 2 or [entry['count'] for entry in top] != [300, 100]:
+            print("❌ LogTemplates raggruppamento: FAIL")
+            return False
+        if '<IP>' not in top[0]['template'] or 'Failed password' not in top[0]['template'] \
+                or top[0]['example'] != lines[0] or top[0]['last'] <= top[0]['first']:
+            print("❌ LogTemplates template: FAIL")
+            return False
+        
+        # Stato serializzabile: il template ricaricato continua a raccogliere righe
+        restored = LogTemplates.from_state(json.loads(json.dumps(miner.state())))
+        restored.add(lines[0])
+        if restored.top(1)[0]['count'] != 301 or len(restored.clusters) != 2:
+            print("❌ LogTemplates stato: FAIL")
+            return False
+        
+        # Cardinalità esplosa: i template restano entro il limite
+        capped = LogTemplates(max_clusters=10)
+        for number in range(200):
+            capped.add(f"evento{chr(97 + number % 26)} {chr(97 + number // 26)}x fase")
+        if len(capped.clusters) > 10 or capped.evicted + sum(c['count'] for c in capped.clusters.values()) != 200:
+            print("❌ LogTemplates limite: FAIL")
+            return False
+        
+        # Ricaricato con un limite più basso conserva i template più recenti
+        shrunk = LogTemplates.from_state(capped.state(), max_clusters=3)
+        if [c['tokens'] for c in shrunk.clusters.values()] != [c['tokens'] for c in list(capped.clusters.values())[-3:]] \
+                or shrunk.lines != capped.lines - capped.evicted:
+            print("❌ LogTemplates stato con limite: FAIL")
+            return False
+        
+        # Nel matcher si raggruppano solo le righe corrispondenti, per origine
+        matcher = MultiPatternMatcher({'Memoria': ['out of memory']}, templates=True)
+        matcher.feed("\n".join(lines), 'kern.log')
+        if list(matcher.templates) != ['kern.log'] or matcher.templates['kern.log'].lines != 100:
+            print("❌ LogTemplates nel matcher: FAIL")
+            return False
+        
+        print("✅ LogTemplates: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LogTemplates: FAIL - {e}")
+        return False
+
+def test_log_cursors():
+    """Test LogCursors"""
+    try:
+        import tempfile
+        from datetime import datetime
+        from sysadmin_helper import LogCursors
+        
+        now = datetime(2024, 1, 2, 12).timestamp()
+        categories = {'error': ['error'], 'fail': ['fail']}
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, 'app.log')
+            store_path = os.path.join(tmp, 'cursors.json')
+            with open(log_path, 'wb') as f:
+                f.write(b"2024-01-02T10:00:00 error uno\n2024-01-02T11:30:00 fail due\n2024-01-02T11:31:00 error in corso")
+            
+            # La riga senza a capo non viene consumata
+            cursors = LogCursors(categories, store_path, templates=10)
+            stats = cursors.update([log_path], now)
+            cursors.save()
+            counts, _ = cursors.totals()
+            if stats['files'] != 1 or counts != {'error': 1, 'fail': 1} or \
+                    cursors.file_templates()[log_path].lines != 2:
+                print("❌ LogCursors prima lettura: FAIL")
+                return False
+            
+            # Riaperto da disco: legge solo la parte aggiunta
+            with open(log_path, 'ab') as f:
+                f.write(b"\n")
+            cursors = LogCursors(categories, store_path)
+            stats = cursors.update([log_path], now)
+            counts, sources = cursors.totals()
+            if stats['bytes'] != len(b"2024-01-02T11:31:00 error in corso\n") or counts['error'] != 2 \
+                    or sources['error'] != {log_path}:
+                print("❌ LogCursors incrementale: FAIL")
+                return False
+            # Ogni blocco conta nell'ora della sua ultima riga datata (le 11)
+            if cursors.hourly(3, now)['error'] != [0, 2, 0]:
+                print("❌ LogCursors ore: FAIL")
+                return False
+            
+            # File senza a capo: la riga parziale non cresce oltre MAX_LINE_BYTES
+            flat_path = os.path.join(tmp, 'flat.log')
+            with open(flat_path, 'wb') as f:
+                f.write(b'x' * (4 * 1024 * 1024))
+            stats = LogCursors(categories).update([flat_path], now)
+            if not 0 <= os.path.getsize(flat_path) - stats['bytes'] <= LogCursors.MAX_LINE_BYTES:
+                print("❌ LogCursors righe senza a capo: FAIL")
+                return False
+            
+            # Rotazione con rinomina: il cursore segue l'inode, il nuovo file parte da zero
+            os.rename(log_path, log_path + '.1')
+            with open(log_path, 'wb') as f:
+                f.write(b"fail nuovo\n")
+            stats = cursors.update([log_path, log_path + '.1'], now)
+            if stats['files'] != 1 or cursors.totals()[0] != {'error': 2, 'fail': 2}:
+                print("❌ LogCursors rotazione: FAIL")
+                return False
+            
+            # Troncamento e riscrittura: si rilegge dall'inizio
+            with open(log_path, 'wb') as f:
+                f.write(b"error riscritto\n")
+            stats = cursors.update([log_path], now)
+            if stats['restarted'] != 1 or cursors.totals()[0]['error'] != 3:
+                print("❌ LogCursors troncamento: FAIL")
+                return False
+            
+            # Copia di copytruncate (inode nuovo di un file ruotato): già contata
+            with open(log_path + '.2', 'wb') as f:
+                f.write(b"error copiato\n")
+            cursors.update([log_path + '.2'], now)
+            if cursors.totals()[0]['error'] != 3:
+                print("❌ LogCursors copytruncate: FAIL")
+                return False
+            
+            # Categorie diverse: l'archivio salvato non vale più
+            if LogCursors({'error': ['error']}, store_path).cursors:
+                print("❌ LogCursors firma: FAIL")
+                return False
+        
+        print("✅ LogCursors: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LogCursors: FAIL - {e}")
+        return False
+
+def test_log_follower():
+    """Test LogFollower"""
+    try:
+        import tempfile
+        from sysadmin_helper import LogFollower
+        
+        def collect(follower, rounds=3):
+            data = b''
+            for _ in range(rounds):
+                data += b''.join(block for _, block in follower.poll(0.2))
+            return data
+        
+        for use_inotify in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                log_path = os.path.join(tmp, 'app.log')
+                with open(log_path, 'wb') as f:
+                    f.write(b"vecchia riga\n")
+                
+                with LogFollower([log_path], use_inotify=use_inotify) as follower:
+                    # Partenza dalla fine; la riga incompleta arriva solo quando termina
+                    with open(log_path, 'ab') as f:
+                        f.write(b"uno\ndu")
+                    first = collect(follower)
+                    with open(log_path, 'ab') as f:
+                        f.write(b"e\n")
+                    if first != b"uno\n" or collect(follower) != b"due\n":
+                        print(f"❌ LogFollower righe ({follower.mode}): FAIL")
+                        return False
+                    
+                    # Rotazione: il vecchio file si legge fino in fondo, il nuovo dall'inizio
+                    with open(log_path, 'ab') as f:
+                        f.write(b"prima della rotazione\n")
+                    os.rename(log_path, log_path + '.1')
+                    with open(log_path, 'wb') as f:
+                        f.write(b"nuovo file\n")
+                    if collect(follower) != b"prima della rotazione\nnuovo file\n":
+                        print(f"❌ LogFollower rotazione ({follower.mode}): FAIL")
+                        return False
+                    
+                    # Troncamento (copytruncate)
+                    with open(log_path, 'r+b') as f:
+                        f.truncate(0)
+                    with open(log_path, 'ab') as f:
+                        f.write(b"dopo\n")
+                    if collect(follower) != b"dopo\n":
+                        print(f"❌ LogFollower troncamento ({follower.mode}): FAIL")
+                        return False
+                    
+                    state = follower.files[log_path]
+                    kinds = [kind for _, kind in follower.notices]
+                    if state['lines'] != 5 or kinds != ['rotated', 'truncated']:
+                        print(f"❌ LogFollower contatori ({follower.mode}): FAIL")
+                        return False
+        
+        print("✅ LogFollower: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LogFollower: FAIL - {e}")
+        return False
+
+def test_largest_files():
+    """Test LargestFiles"""
+    try:
+        import tempfile
+        from sysadmin_helper import LargestFiles
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for directory in range(4):
+                os.makedirs(os.path.join(tmp, f'd{directory}', 'sub'))
+                for number in range(10):
+                    with open(os.path.join(tmp, f'd{directory}', 'sub', f'f{number}.log'), 'wb') as f:
+                        f.write(b'x' * (4096 * (directory * 10 + number + 1)))
+            # File sparso: grande in apparenza, nessun blocco allocato
+            with open(os.path.join(tmp, 'lastlog'), 'wb') as f:
+                f.truncate(512 * 1024 * 1024)
+            # Link fisico: contato una volta sola
+            os.link(os.path.join(tmp, 'd3', 'sub', 'f9.log'), os.path.join(tmp, 'link.log'))
+            
+            # Le radici contenute in un'altra radice non vengono visitate due volte
+            usage = LargestFiles(limit=3).scan([tmp, os.path.join(tmp, 'd1')])
+            top = usage.largest()
+            if usage.files != 41 or [os.path.basename(entry['path']) for entry in top][1:] != ['f8.log', 'f7.log']:
+                print("❌ LargestFiles classifica: FAIL")
+                return False
+            if top[0]['allocated'] < top[0]['size'] or len(top) != 3:
+                print("❌ LargestFiles spazio allocato: FAIL")
+                return False
+            if usage.apparent < 512 * 1024 * 1024 or usage.allocated >= usage.apparent:
+                print("❌ LargestFiles totali: FAIL")
+                return False
+            if usage.largest(min_allocated=top[1]['allocated']) != top[:2]:
+                print("❌ LargestFiles soglia: FAIL")
+                return False
+            
+            # Classifica a parte dei file selezionati: i non selezionati più grandi non la riducono
+            with open(os.path.join(tmp, 'core.bin'), 'wb') as f:
+                f.write(b'x' * 4096 * 50)
+            threshold = 4096 * 35
+            usage = LargestFiles(limit=3, select=lambda name: name.endswith('.log'),
+                                 thresholds=(threshold,)).scan([tmp])
+            names = [os.path.basename(entry['path']) for entry in usage.largest(selected=True)]
+            if names != ['link.log', 'f8.log', 'f7.log'] or usage.largest(1)[0]['path'] != os.path.join(tmp, 'core.bin'):
+                print("❌ LargestFiles selezionati: FAIL")
+                return False
+            if usage.over[threshold] != 6 or len(usage.largest(min_allocated=threshold, selected=True)) != 3:
+                print("❌ LargestFiles conteggio oltre soglia: FAIL")
+                return False
+        
+        print("✅ LargestFiles: OK")
+        return True
+    except Exception as e:
+        print(f"❌ LargestFiles: FAIL - {e}")
+        return False
+
+def test_access_log_analyzer():
+    """Test AccessLogAnalyzer e sketch"""
+    try:
+        from sysadmin_helper import AccessLogAnalyzer, DDSketch, HyperLogLog
+        
+        sketch = DDSketch()
+        for value in range(1, 10001):
+            sketch.add(value)
+        if abs(sketch.quantile(0.99) - 9900) > 9900 * 0.011 or abs(sketch.quantile(0.5) - 5000) > 5000 * 0.011:
+            print("❌ DDSketch quantili: FAIL")
+            return False
+        
+        unique = HyperLogLog()
+        for number in range(20000):
+            unique.add(f"client-{number}")
+        if abs(unique.count() - 20000) > 20000 * 0.05:
+            print("❌ HyperLogLog stima: FAIL")
+            return False
+        
+        lines = []
+        for number in range(600):
+            status = 500 if number % 10 == 0 else 200
+            url = "/api/hot" if number % 3 else f"/page/{number}"
+            lines.append(f'10.0.0.{number % 20} - - [10/Oct/2024:13:55:{number // 10:02d} +0000] '
+                         f'"GET {url}?id={number} HTTP/1.1" {status} {number} "-" "curl/8.0" 0.{number % 100:03d}')
+        lines.append("riga non valida")
+        first, second = AccessLogAnalyzer(), AccessLogAnalyzer()
+        first.feed("\n".join(lines[:300]) + "\n")
+        second.feed(("\n".join(lines[300:]) + "\n").encode())
+        first.merge(second)
+        
+        if first.requests != 600 or first.unparsed != 1 or first.status_classes() != {'2xx': 540, '5xx': 60}:
+            print("❌ AccessLogAnalyzer conteggi: FAIL")
+            return False
+        if first.urls.top(1) != [("/api/hot", 400)] or first.unique_clients.count() != 20:
+            print("❌ AccessLogAnalyzer classifiche: FAIL")
+            return False
+        if abs(first.latencies.quantile(0.5) - 49.5) > 1 or abs(first.rate() - 10) > 0.01:
+            print("❌ AccessLogAnalyzer latenza/velocità: FAIL")
+            return False
+        
+        # combinedio di Apache (%I %O): i byte in fondo alla riga non sono latenze
+        line = '10.0.0.1 - - [10/Oct/2024:13:55:00 +0000] "GET / HTTP/1.1" 200 512 "-" "curl/8.0" 431 2048'
+        automatic, configured = AccessLogAnalyzer(), AccessLogAnalyzer(latency='us')
+        automatic.feed(line)
+        configured.feed(line.replace(' 431 2048', ' 2500'))
+        if automatic.latencies.count or abs(configured.latencies.quantile(0.5) - 2.5) > 0.05:
+            print("❌ AccessLogAnalyzer campi finali ambigui: FAIL")
+            return False
+        
+        print("✅ AccessLogAnalyzer: OK")
+        return True
+    except Exception as e:
+        print(f"❌ AccessLogAnalyzer: FAIL - {e}")
+        return False
+
+def test_journal_aggregator():
+    """Test JournalAggregator"""
+    try:
+        import json
+        from sysadmin_helper import JournalAggregator
+        
+        def entry(second, priority, identifier, message, unit=None, cursor=None):
+            fields = {'__REALTIME_TIMESTAMP': str((1700000000 + second) * 1000000), 'PRIORITY': str(priority),
+                      'SYSLOG_IDENTIFIER': identifier, '_PID': '42', '_HOSTNAME': 'host', 'MESSAGE': message}
+            if cursor:
+                fields['__CURSOR'] = cursor
+            if unit:
+                fields['_SYSTEMD_UNIT'] = unit
+            return json.dumps(fields)
+        
+        lines = [
+            entry(0, 6, 'sshd', 'pam_unix(sshd:session): session opened for user alice(uid=1000) by (uid=0)', 'ssh.service'),
+            entry(1, 6, 'sshd', 'Accepted publickey for alice from 10.0.0.1 port 22 ssh2', 'ssh.service'),
+            entry(2, 5, 'sshd', 'Failed password for invalid user bob from 10.0.0.2 port 22 ssh2', 'ssh.service'),
+            entry(3, 5, 'sudo', 'alice : TTY=pts/0 ; PWD=/ ; USER=root ; COMMAND=/bin/ls'),
+            entry(4, 2, 'kernel', 'Out of memory: Killed process 123 (java)'),
+            entry(5, 3, 'app', [104, 105, 255]),
+            "-- No entries --",
+        ]
+        journal = JournalAggregator().feed_lines(lines)
+        
+        if journal.entries != 6 or journal.priorities['info'] != 2 or journal.at_least('err') != 2:
+            print("❌ JournalAggregator priorità: FAIL")
+            return False
+        if journal.top_units(1) != [('ssh.service', 3)] or journal.top_users() != [('alice', 1)]:
+            print("❌ JournalAggregator unità/utenti: FAIL")
+            return False
+        events = journal.events
+        if (events['sessions_opened'], events['sudo'], events['auth_failures'], events['Out of Memory']) != (1, 1, 1, 1):
+            print("❌ JournalAggregator eventi: FAIL")
+            return False
+        if events['invalid user'] != 1 or events['failed password'] != 1 or len(journal.ssh) != 2:
+            print("❌ JournalAggregator accessi: FAIL")
+            return False
+        if 'kernel[42]: Out of memory' not in journal.samples['Out of Memory'][0][1]:
+            print("❌ JournalAggregator esempi: FAIL")
+            return False
+        
+        # OpenSSH 9.8+: accessi registrati da sshd-session (anche fuori da ssh.service)
+        sessions = JournalAggregator().feed_lines([
+            entry(0, 6, 'sshd-session', 'Accepted publickey for carol from 10.0.0.3 port 22 ssh2', 'ssh.service'),
+            entry(1, 5, 'sshd-session', 'Failed password for carol from 10.0.0.3 port 22 ssh2', 'session-4.scope'),
+            entry(2, 6, 'app', 'Accepted job 7'),
+        ])
+        if len(sessions.ssh) != 2 or 'sshd-session[42]: Accepted' not in sessions.ssh[0][1]:
+            print("❌ JournalAggregator sshd-session: FAIL")
+            return False
+        
+        # Stato persistente: cursore verificato, voci già contate saltate, finestra a bucket
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            state = os.path.join(tmp, 'journal.json')
+            stored = JournalAggregator(path=state, window=600)
+            stored.feed_lines(entry(second * 60, 3, 'app', 'disk error', cursor=f"s=x;i={second}") for second in range(5))
+            stored.expire(1700000000 + 300)
+            stored.save()
+            
+            resumed = JournalAggregator(path=state, window=600)
+            if resumed.cursor != "s=x;i=4" or resumed.at_least('err') != 5 or len(resumed.buckets) != 5:
+                print("❌ JournalAggregator stato: FAIL")
+                return False
+            resumed.feed_lines([entry(240, 3, 'app', 'disk error', cursor="s=x;i=4"),
+                                entry(300, 3, 'app', 'disk error', cursor="s=x;i=5")], cursor=resumed.cursor)
+            if resumed.notices or resumed.new_entries != 1 or resumed.at_least('err', since=1700000000 + 240) != 2:
+                print("❌ JournalAggregator cursore: FAIL")
+                return False
+            # Cursore sparito (vacuum): ripresa senza contare due volte
+            resumed.feed_lines([entry(300, 3, 'app', 'disk error', cursor="s=y;i=1"),
+                                entry(360, 3, 'app', 'disk error', cursor="s=y;i=2")], cursor="s=x;i=9")
+            resumed.expire(1700000000 + 900)
+            if resumed.notices != ['vacuumed'] or resumed.new_entries != 2 or resumed.entries != 2:
+                print("❌ JournalAggregator vacuum/finestra: FAIL")
+                return False
+            # Un errore di una lettura precedente non resta dopo una nuova collect()
+            resumed.error = "journalctl non disponibile"
+            if resumed.collect(timeout=10).error is not None:
+                print("❌ JournalAggregator errore precedente: FAIL")
+                return False
+        
+        print("✅ JournalAggregator: OK")
+        return True
+    except Exception as e:
+        print(f"❌ JournalAggregator: FAIL - {e}")
+        return False
+
 def test_managers():
     """Test basic manager functionality"""
     try:
@@ -93,6 +1296,28 @@ def main():
     tests = [
         ("Import moduli", test_imports),
         ("SystemInfo", test_system_info),
+        ("ProcCollector", test_proc_collector),
+        ("CommandCache", test_command_cache),
+        ("Profiler", test_profiler),
+        ("AsyncCollector", test_async_collector),
+        ("CpuSampler", test_cpu_sampler),
+        ("ProcessScanner", test_process_scanner),
+        ("MetricStore", test_metric_store),
+        ("MetricArchive", test_metric_archive),
+        ("MonitorDaemon", test_monitor_daemon),
+        ("Scoperta log", test_log_discovery),
+        ("LogInventory", test_log_inventory),
+        ("LogSearch", test_log_search),
+        ("MultiPatternMatcher", test_multi_pattern_matcher),
+        ("Log compressi", test_compressed_search),
+        ("Finestra temporale", test_log_time_window),
+        ("TrigramIndex", test_trigram_index),
+        ("LogTemplates", test_log_templates),
+        ("LogCursors", test_log_cursors),
+        ("LogFollower", test_log_follower),
+        ("LargestFiles", test_largest_files),
+        ("AccessLogAnalyzer", test_access_log_analyzer),
+        ("JournalAggregator", test_journal_aggregator),
         ("Managers", test_managers)
     ]
     